@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from core.sqlite import pooled
+
+
+DB_PATH = Path(os.getenv("AI_CACHE_PATH", Path(__file__).resolve().parent.parent / "demo" / "ai_cache.sqlite3"))
+AI_CACHE_DB_POOL_SIZE = max(1, int(os.getenv("AI_CACHE_DB_POOL_SIZE", "8")))
+
+AI_CACHE_MEMORY_ITEMS = int(os.getenv("AI_CACHE_MEMORY_ITEMS", "2000"))
+AI_CACHE_DISK_ITEMS = int(os.getenv("AI_CACHE_DISK_ITEMS", "100000"))
+AI_CACHE_TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Disk eviction runs once per this many writes instead of on every insert.
+_EVICT_EVERY = 100
+
+_memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+_writes_since_evict = 0
+_initialized = False
+
+
+@contextmanager
+def _pooled() -> Iterator[sqlite3.Connection]:
+    with pooled(DB_PATH, AI_CACHE_DB_POOL_SIZE) as conn:
+        yield conn
+
+
+@contextmanager
+def _conn() -> Iterator[sqlite3.Connection]:
+    if not _initialized:
+        init_ai_cache()
+    with _pooled() as conn:
+        yield conn
+
+
+def init_ai_cache() -> None:
+    global _initialized
+    with _pooled() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ai_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                created_at REAL,
+                accessed_at REAL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ai_cache_accessed ON ai_cache (accessed_at)")
+    _initialized = True
+
+
+def cache_key(kind: str, model: str, prompt_version: str, temperature: float, *inputs: Any) -> str:
+    """
+    Content address for one completion: identical inputs, model, prompt and sampling share a key.
+    """
+    material = json.dumps([kind, model, prompt_version, temperature, *inputs], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _bump(name: str) -> None:
+    with _lock:
+        _stats[name] += 1
+
+
+def _remember(key: str, value: str, created_at: float) -> None:
+    with _lock:
+        _memory[key] = (value, created_at)
+        _memory.move_to_end(key)
+        while len(_memory) > AI_CACHE_MEMORY_ITEMS:
+            _memory.popitem(last=False)
+
+
+def cache_get(key: str) -> Optional[str]:
+    now = time.time()
+    with _lock:
+        entry = _memory.get(key)
+        if entry and now - entry[1] < AI_CACHE_TTL_SECONDS:
+            _memory.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return entry[0]
+        if entry:
+            del _memory[key]
+
+    with _conn() as conn:
+        row = conn.execute("SELECT value, created_at FROM ai_cache WHERE key = ?", (key,)).fetchone()
+        if row and now - row["created_at"] >= AI_CACHE_TTL_SECONDS:
+            conn.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+            row = None
+        elif row:
+            conn.execute("UPDATE ai_cache SET accessed_at = ? WHERE key = ?", (now, key))
+
+    if not row:
+        _bump("misses")
+        return None
+
+    _bump("disk_hits")
+    _remember(key, row["value"], row["created_at"])
+    return row["value"]
+
+
+def cache_put(key: str, value: str) -> None:
+    global _writes_since_evict
+    now = time.time()
+    _remember(key, value, now)
+
+    with _lock:
+        _stats["writes"] += 1
+        _writes_since_evict += 1
+        evict = _writes_since_evict >= _EVICT_EVERY
+        if evict:
+            _writes_since_evict = 0
+
+    with _conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO ai_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now, now),
+        )
+        if evict:
+            _evict(conn, now)
+
+
+def _evict(conn: sqlite3.Connection, now: float) -> None:
+    expired = conn.execute("DELETE FROM ai_cache WHERE created_at <= ?", (now - AI_CACHE_TTL_SECONDS,)).rowcount
+    # Least recently used rows beyond the size bound.
+    overflow = conn.execute(
+        """
+        DELETE FROM ai_cache WHERE key IN (
+            SELECT key FROM ai_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+        )
+        """,
+        (AI_CACHE_DISK_ITEMS,),
+    ).rowcount
+    with _lock:
+        _stats["evictions"] += expired + overflow
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+        out["memory_items"] = len(_memory)
+    lookups = out["memory_hits"] + out["disk_hits"] + out["misses"]
+    out["hit_rate"] = round((out["memory_hits"] + out["disk_hits"]) / lookups, 4) if lookups else 0.0
+    return out
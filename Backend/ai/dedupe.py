@@ -0,0 +1,169 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, List, Optional, Tuple, TypeVar
+
+# Bodies whose 64-bit SimHash fingerprints differ in at most this many bits count as near-duplicates
+# (0 turns near-duplicate reuse off).
+SIMHASH_MAX_DISTANCE = max(0, min(int(os.getenv("SIMHASH_MAX_DISTANCE", "6")), 15))
+# Recent summaries near-duplicates from the same mailbox can reuse across requests, and for how long.
+DEDUPE_HISTORY_ITEMS = int(os.getenv("DEDUPE_HISTORY_ITEMS", "5000"))
+DEDUPE_TTL_SECONDS = float(os.getenv("DEDUPE_TTL_SECONDS", str(24 * 3600)))
+
+SHINGLE_WORDS = 3
+# Fewer words than this make fingerprints too coarse to trust; only the first MAX_WORDS are hashed.
+MIN_WORDS = 20
+MAX_WORDS = 2000
+BITS = 64
+
+# Parts of a body that differ between otherwise identical mails (tracking links, recipient
+# addresses); numbers are kept, since amounts and dates matter to a summary.
+_URL = re.compile(r"https?://\S+|www\.\S+", re.I)
+_EMAIL = re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b")
+_WORD = re.compile(r"\w+")
+
+_V = TypeVar("_V")
+
+
+def normalize_body(text: str) -> List[str]:
+    text = _EMAIL.sub(" email ", _URL.sub(" url ", text.lower()))
+    return _WORD.findall(text)
+
+
+def fingerprint(text: str) -> Optional[int]:
+    """
+    64-bit SimHash over word shingles of the normalized text; None for short texts or when disabled.
+    """
+    if not SIMHASH_MAX_DISTANCE:
+        return None
+    words = normalize_body(text)
+    if len(words) < MIN_WORDS:
+        return None
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(min(len(words), MAX_WORDS) - SHINGLE_WORDS + 1)}
+    # Bit columns counted on binary strings: much faster than per-bit arithmetic in Python.
+    rows = [format(int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big"), "064b") for s in shingles]
+    half = len(rows) / 2
+    fp = 0
+    for bit, column in enumerate(zip(*rows)):
+        if column.count("1") > half:
+            fp |= 1 << (BITS - 1 - bit)
+    return fp
+
+
+def _bands(max_distance: int) -> List[Tuple[int, int]]:
+    # max_distance + 1 disjoint bit ranges: two fingerprints within max_distance bits of each
+    # other agree exactly on at least one of them.
+    count = max_distance + 1
+    width = BITS // count
+    return [(i * width, BITS if i == count - 1 else (i + 1) * width) for i in range(count)]
+
+
+class SimHashIndex(Generic[_V]):
+    """
+    Fingerprint -> value map that finds the closest stored fingerprint within max_distance bits.
+    Entries live under a scope (e.g. one per mailbox) and lookups only see their own scope.
+    Holds at most max_items entries across scopes (least recently added go first). Not thread-safe.
+    """
+
+    def __init__(self, max_distance: int, max_items: Optional[int] = None):
+        self.max_distance = max_distance
+        self.max_items = max_items
+        self._bands = _bands(max_distance)
+        self._entries: "OrderedDict[Tuple[str, int], _V]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, int], set] = {}
+
+    def _keys(self, fp: int, scope: str = "") -> List[Tuple[str, int, int]]:
+        return [(scope, i, fp >> lo & ((1 << (hi - lo)) - 1)) for i, (lo, hi) in enumerate(self._bands)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, fp: int, value: _V, scope: str = "") -> None:
+        if (scope, fp) in self._entries:
+            self._entries.move_to_end((scope, fp))
+        else:
+            for key in self._keys(fp, scope):
+                self._buckets.setdefault(key, set()).add(fp)
+        self._entries[(scope, fp)] = value
+        while self.max_items is not None and len(self._entries) > self.max_items:
+            oldest_scope, oldest = next(iter(self._entries))
+            self.remove(oldest, oldest_scope)
+
+    def remove(self, fp: int, scope: str = "") -> None:
+        if self._entries.pop((scope, fp), None) is None:
+            return
+        for key in self._keys(fp, scope):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(fp)
+                if not bucket:
+                    del self._buckets[key]
+
+    def find(self, fp: int, scope: str = "") -> Optional[Tuple[int, _V]]:
+        best: Optional[Tuple[int, int]] = None
+        for key in self._keys(fp, scope):
+            for other in self._buckets.get(key, ()):
+                distance = bin(fp ^ other).count("1")
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, other)
+        if best is None:
+            return None
+        return best[1], self._entries[(scope, best[1])]
+
+
+_recent: SimHashIndex[Tuple[str, float]] = SimHashIndex(max(SIMHASH_MAX_DISTANCE, 1), DEDUPE_HISTORY_ITEMS)
+_lock = threading.Lock()
+_stats = {"history_hits": 0, "history_misses": 0, "request_duplicates": 0}
+
+
+def cluster(fingerprints: List[Optional[int]]) -> List[int]:
+    """
+    For each position, the position of the first earlier fingerprint it nearly duplicates, else itself.
+    """
+    index: SimHashIndex[int] = SimHashIndex(SIMHASH_MAX_DISTANCE)
+    reps: List[int] = []
+    for pos, fp in enumerate(fingerprints):
+        match = index.find(fp) if fp is not None else None
+        if match is None:
+            if fp is not None:
+                index.add(fp, pos)
+            reps.append(pos)
+        else:
+            reps.append(match[1])
+    duplicates = sum(1 for pos, rep in enumerate(reps) if rep != pos)
+    if duplicates:
+        with _lock:
+            _stats["request_duplicates"] += duplicates
+    return reps
+
+
+def recall_summary(owner: Optional[str], fp: Optional[int]) -> Optional[str]:
+    """
+    Summary of a near-duplicate recently summarized for the same owner (mailbox), if there is one.
+    History never crosses owners: a summary can carry names, amounts and links from its email.
+    """
+    if owner is None or fp is None:
+        return None
+    now = time.time()
+    with _lock:
+        match = _recent.find(fp, owner)
+        if match is not None and now - match[1][1] >= DEDUPE_TTL_SECONDS:
+            _recent.remove(match[0], owner)
+            match = None
+        _stats["history_hits" if match else "history_misses"] += 1
+        return match[1][0] if match else None
+
+
+def remember_summary(owner: Optional[str], fp: Optional[int], summary: str) -> None:
+    if owner is None or fp is None:
+        return
+    with _lock:
+        _recent.add(fp, (summary, time.time()), owner)
+
+
+def dedupe_stats() -> Dict[str, Any]:
+    with _lock:
+        return {**_stats, "items": len(_recent), "max_distance": SIMHASH_MAX_DISTANCE}
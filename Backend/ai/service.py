@@ -1,38 +1,532 @@
+import asyncio
+import json
 import os
-from openai import OpenAI
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from openai import AsyncOpenAI, RateLimitError
+
+from ai.cache import cache_get, cache_key, cache_put
+from ai.dedupe import cluster, fingerprint, recall_summary, remember_summary
+from core.metrics import SPANS, SUMMARY_ROUTES, span
 
 # Groq is OpenAI-compatible. Use OpenAI SDK pointed to Groq.
-client = OpenAI(
+# SDK retries are off: 429s are handled below so the rate limiter sees them.
+async_client = AsyncOpenAI(
     api_key=os.getenv("GROQ_API_KEY"),
-    base_url="https://api.groq.com/openai/v1",
+    base_url=os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1"),
+    max_retries=0,
 )
 
 # Good default Groq model (fast + solid quality)
 DEFAULT_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+# Larger model for long or complex emails; unset keeps every summary on DEFAULT_MODEL.
+LARGE_MODEL = os.getenv("GROQ_LARGE_MODEL", "")
+
+# Summary routing: emails up to SUMMARY_HEURISTIC_CHARS (after trimming) and templated ones
+# (notifications, newsletters) are summarized without an LLM call; ones over SUMMARY_LARGE_TOKENS,
+# or asking SUMMARY_LARGE_QUESTIONS or more questions, go to LARGE_MODEL; everything else to DEFAULT_MODEL.
+SUMMARY_HEURISTIC_CHARS = int(os.getenv("SUMMARY_HEURISTIC_CHARS", "160"))
+# Length of the lead excerpt used as a templated email's summary; 0 sends templated emails to the models.
+SUMMARY_TEMPLATE_CHARS = int(os.getenv("SUMMARY_TEMPLATE_CHARS", "200"))
+SUMMARY_LARGE_TOKENS = int(os.getenv("SUMMARY_LARGE_TOKENS", "1000"))
+SUMMARY_LARGE_QUESTIONS = int(os.getenv("SUMMARY_LARGE_QUESTIONS", "4"))
+
+# Bump when a prompt changes so cached completions from the old prompt are not reused.
+SUMMARY_PROMPT_VERSION = "summary-v2"
+REPLY_PROMPT_VERSION = "reply-v2"
+CHUNK_PROMPT_VERSION = "chunk-v1"
+SUMMARY_TEMPERATURE = 0.2
+REPLY_TEMPERATURE = 0.3
+
+# Provider budgets (defaults match Groq's free tier) and scheduler width.
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "6000"))
+LLM_CONCURRENCY = max(1, int(os.getenv("LLM_CONCURRENCY", "8")))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+# Share of the request/token budgets background work (precompute) must leave for interactive calls.
+LLM_BACKGROUND_RESERVE = float(os.getenv("LLM_BACKGROUND_RESERVE", "0.5"))
+
+# Email text allowed into one prompt; longer bodies are summarized map-reduce style in chunks.
+LLM_INPUT_TOKENS = max(200, int(os.getenv("LLM_INPUT_TOKENS", "1500")))
+LLM_MAX_CHUNKS = max(2, int(os.getenv("LLM_MAX_CHUNKS", "8")))
+CHARS_PER_TOKEN = 4
+
+# Several short emails share one summary call: emails up to LLM_BATCH_ITEM_TOKENS each are packed
+# until the batch holds LLM_BATCH_TOKENS of email text or LLM_BATCH_MAX_EMAILS emails.
+LLM_BATCH_TOKENS = max(200, int(os.getenv("LLM_BATCH_TOKENS", "2500")))
+LLM_BATCH_ITEM_TOKENS = max(50, int(os.getenv("LLM_BATCH_ITEM_TOKENS", "600")))
+LLM_BATCH_MAX_EMAILS = max(1, int(os.getenv("LLM_BATCH_MAX_EMAILS", "10")))
+BATCH_SUMMARY_TOKENS = 90
+
+# Lines that start quoted history or a signature; everything from them on is dropped.
+_CUT_MARKERS = [
+    re.compile(r"^On .{0,200}wrote:\s*$"),
+    re.compile(r"^-{2,}\s*(Original|Forwarded) Message\s*-{2,}", re.I),
+    re.compile(r"^_{10,}\s*$"),
+    re.compile(r"^-- ?$"),
+    re.compile(r"^Sent from my \w+", re.I),
+]
+_BLANK_RUNS = re.compile(r"\n{3,}")
+# Opening and closing lines left out of heuristic summaries.
+_GREETING = re.compile(r"^(hi|hello|hey|dear|greetings|good (morning|afternoon|evening))\b[^.!?]{0,40}[,!:]?$", re.I)
+_SIGN_OFF = re.compile(r"^(thanks|thank you|many thanks|cheers|best|regards|best regards|kind regards|sincerely)\b.{0,30}$", re.I)
+# Footer phrases of bulk and automated mail; an email with one is summarized by its lead text.
+_TEMPLATE_FOOTER = re.compile(
+    r"\bunsubscribe\b|\bmanage (your )?(email |notification |subscription )?(preferences|settings)\b"
+    r"|\byou('re| are) receiving this (email|message|notification)\b|\bview (this email |it )?in (your |a )?browser\b"
+    r"|\bthis is an automated (message|email|notification)\b|\bdo not reply to this (email|message)\b",
+    re.I,
+)
+
+
+class RateLimiter:
+    """
+    Two token buckets (requests and tokens per minute) refilled continuously.
+    acquire_async() waits until both budgets cover the call; pause() holds every caller back after a 429.
+    Background callers only run while no interactive caller is waiting and leave `reserve`
+    (a fraction of each budget) untouched for interactive traffic.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, reserve: float = 0.0):
+        self.rpm = max(1, requests_per_minute)
+        self.tpm = max(1, tokens_per_minute)
+        self.reserve = min(max(reserve, 0.0), 0.9)
+        self._requests = float(self.rpm)
+        self._tokens = float(self.tpm)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _try_acquire(self, tokens: int, background: bool, waiting: bool) -> float:
+        # Takes the budget and returns 0, or returns how long to wait before trying again.
+        tokens = min(tokens, self.tpm)
+        # Budget that must be left over after the call: nothing for interactive callers.
+        keep_requests = min(self.rpm * self.reserve, self.rpm - 1) if background else 0.0
+        keep_tokens = min(self.tpm * self.reserve, self.tpm - tokens) if background else 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = self._paused_until - now
+            if wait <= 0 and background and self._waiting:
+                wait = 0.25
+            elif wait <= 0:
+                if self._requests >= 1 + keep_requests and self._tokens >= tokens + keep_tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return 0.0
+                wait = max(
+                    (1 + keep_requests - self._requests) * 60 / self.rpm,
+                    (tokens + keep_tokens - self._tokens) * 60 / self.tpm,
+                )
+            if not background and not waiting:
+                self._waiting += 1
+        return max(wait, 0.01)
+
+    def _stop_waiting(self) -> None:
+        with self._lock:
+            self._waiting -= 1
+
+    async def acquire_async(self, tokens: int, background: bool = False) -> None:
+        waiting = False
+        try:
+            while True:
+                wait = self._try_acquire(tokens, background, waiting)
+                if not wait:
+                    return
+                waiting = not background
+                await asyncio.sleep(wait)
+        finally:
+            if waiting:
+                self._stop_waiting()
+
+    def settle(self, estimated: int, actual: int) -> None:
+        # Charge (or refund) the difference once the provider reports real usage.
+        with self._lock:
+            self._tokens = min(self.tpm, self._tokens + estimated - actual)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+rate_limiter = RateLimiter(LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, reserve=LLM_BACKGROUND_RESERVE)
+# Set while running background work; _complete_async then acquires at background priority.
+_background: ContextVar[bool] = ContextVar("llm_background", default=False)
+# (loop, semaphore) capping in-flight LLM calls; see _llm_slots.
+_async_slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+
+def _llm_slots() -> asyncio.Semaphore:
+    # Created on first use inside the running loop (and again if a new loop takes over), so the
+    # semaphore is never bound to a loop that no longer runs.
+    global _async_slots
+    loop = asyncio.get_running_loop()
+    if _async_slots is None or _async_slots[0] is not loop:
+        _async_slots = (loop, asyncio.Semaphore(LLM_CONCURRENCY))
+    return _async_slots[1]
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """
+    LLM calls made inside this block (including chunk calls they fan out) yield to interactive ones.
+    """
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    # Accepts "12", "7.66s", "120ms" and "2m59.56s" (Groq's x-ratelimit-reset-* format).
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        matched = True
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total if matched else None
+
+
+def _retry_after(error: RateLimitError, attempt: int) -> float:
+    headers = error.response.headers if error.response is not None else {}
+    retry_after = _parse_duration(headers.get("retry-after"))
+    if retry_after is not None:
+        return retry_after
+    resets = [_parse_duration(headers.get(name)) for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")]
+    resets = [r for r in resets if r is not None]
+    return max(resets) if resets else min(2 ** attempt, 30)
+
+
+def _estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    # ~4 characters per token is close enough for budgeting.
+    return sum(len(m["content"]) for m in messages) // 4 + max_tokens
+
+
+async def _complete_async(
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    json_output: bool = False,
+    op: str = "completion",
+    model: str = DEFAULT_MODEL,
+) -> str:
+    estimated = _estimate_tokens(messages, max_tokens)
+    extra: Dict[str, Any] = {"response_format": {"type": "json_object"}} if json_output else {}
+    background = _background.get()
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        with span("llm_wait", op):
+            await rate_limiter.acquire_async(estimated, background=background)
+        try:
+            async with _llm_slots():
+                with span("llm", op):
+                    resp = await async_client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        **extra,
+                    )
+        except RateLimitError as e:
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            rate_limiter.pause(_retry_after(e, attempt))
+            continue
+
+        return _response_text(resp, estimated)
+    raise RuntimeError("unreachable")
+
+
+async def _stream_complete_async(
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    op: str = "completion",
+) -> AsyncIterator[str]:
+    """
+    _complete_async as a stream of text deltas. 429s arrive before the first delta, so retrying
+    never repeats text already yielded.
+    """
+    estimated = _estimate_tokens(messages, max_tokens)
+    background = _background.get()
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        with span("llm_wait", op):
+            await rate_limiter.acquire_async(estimated, background=background)
+        usage = None
+        try:
+            async with _llm_slots():
+                with span("llm", op):
+                    started = time.perf_counter()
+                    stream = await async_client.chat.completions.create(
+                        model=DEFAULT_MODEL,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True,
+                    )
+                    # Closes the upstream response even when the consumer stops early.
+                    async with stream:
+                        first = True
+                        async for chunk in stream:
+                            usage = _chunk_usage(chunk) or usage
+                            delta = chunk.choices[0].delta.content if chunk.choices else None
+                            if not delta:
+                                continue
+                            if first:
+                                SPANS["llm_first_token"].observe(time.perf_counter() - started, op)
+                                first = False
+                            yield delta
+        except RateLimitError as e:
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            rate_limiter.pause(_retry_after(e, attempt))
+            continue
+
+        if usage:
+            rate_limiter.settle(estimated, usage)
+        return
+
+
+def _chunk_usage(chunk: Any) -> Optional[int]:
+    # Total tokens from the final stream chunk: OpenAI-style `usage` or Groq's `x_groq.usage`.
+    usage = getattr(chunk, "usage", None) or (getattr(chunk, "x_groq", None) or {}).get("usage")
+    if isinstance(usage, dict):
+        return usage.get("total_tokens")
+    return getattr(usage, "total_tokens", None)
+
+
+def _response_text(resp: Any, estimated: int) -> str:
+    usage = getattr(resp, "usage", None)
+    if usage is not None and getattr(usage, "total_tokens", None):
+        rate_limiter.settle(estimated, usage.total_tokens)
+    return resp.choices[0].message.content.strip()
+
+
+def trim_email_body(body: str) -> str:
+    """
+    Drops quoted history, forwarded/original-message blocks and signatures.
+    Falls back to the untrimmed text if nothing would be left.
+    """
+    lines = body.replace("\r\n", "\n").split("\n")
+    kept: List[str] = []
+    for line in lines:
+        stripped = line.strip()
+        if any(marker.match(stripped) for marker in _CUT_MARKERS) and any(k.strip() for k in kept):
+            break
+        if stripped.startswith(">"):
+            continue
+        kept.append(line.rstrip())
+    text = _BLANK_RUNS.sub("\n\n", "\n".join(kept)).strip()
+    return text or body.strip()
+
+
+def _fits(text: str, tokens: int = LLM_INPUT_TOKENS) -> bool:
+    return len(text) <= tokens * CHARS_PER_TOKEN
+
+
+def chunk_text(text: str, max_chars: int) -> List[str]:
+    """
+    Splits text into pieces of at most max_chars, preferring paragraph, then line, then word boundaries.
+    """
+    chunks: List[str] = []
+    while len(text) > max_chars:
+        window = text[:max_chars]
+        cut = max(window.rfind("\n\n"), 0)
+        if cut < max_chars // 2:
+            cut = window.rfind("\n")
+        if cut < max_chars // 2:
+            cut = window.rfind(" ")
+        if cut < max_chars // 2:
+            cut = max_chars
+        chunks.append(text[:cut].strip())
+        text = text[cut:].lstrip()
+    if text.strip():
+        chunks.append(text.strip())
+    return [c for c in chunks if c]
+
+
+def _chunk_key(chunk: str, part: int, parts: int) -> str:
+    return cache_key("chunk-summary", DEFAULT_MODEL, CHUNK_PROMPT_VERSION, SUMMARY_TEMPERATURE, chunk, part, parts)
+
+
+def _chunk_messages(chunk: str, part: int, parts: int) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": "You are a helpful email assistant."},
+        {
+            "role": "user",
+            "content": (
+                f"This is part {part} of {parts} of a long email.\n"
+                "List its key facts, requests, dates and amounts in at most 4 short bullet points.\n\n"
+                f"Email part:\n{chunk}"
+            ),
+        },
+    ]
+
+
+def _chunks_for_notes(text: str) -> Tuple[List[str], bool]:
+    chunks = chunk_text(text, LLM_INPUT_TOKENS * CHARS_PER_TOKEN)
+    return chunks[:LLM_MAX_CHUNKS], len(chunks) > LLM_MAX_CHUNKS
+
+
+def _join_notes(summaries: List[str], dropped: bool) -> str:
+    notes = [f"Part {i}:\n{summary}" for i, summary in enumerate(summaries, 1)]
+    if dropped:
+        notes.append("(The rest of the email was too long and was left out.)")
+    return "\n\n".join(notes)
+
+
+def _summary_key(body: str, model: str = DEFAULT_MODEL) -> str:
+    return cache_key("summary", model, SUMMARY_PROMPT_VERSION, SUMMARY_TEMPERATURE, body)
+
+
+def is_templated(body: str) -> bool:
+    """
+    Whether an email (before trimming, since footers often sit under a signature marker) carries
+    a bulk-mail or automated-notification footer.
+    """
+    return SUMMARY_TEMPLATE_CHARS > 0 and _TEMPLATE_FOOTER.search(body) is not None
+
+
+def summary_route(text: str, templated: bool = False) -> str:
+    """
+    "heuristic", "template", "small" or "large" for a trimmed email body.
+    """
+    if len(text) <= SUMMARY_HEURISTIC_CHARS:
+        return "heuristic"
+    if templated:
+        return "template"
+    if LARGE_MODEL and (
+        not _fits(text, SUMMARY_LARGE_TOKENS) or text.count("?") >= SUMMARY_LARGE_QUESTIONS
+    ):
+        return "large"
+    return "small"
+
+
+def _route_model(route: str) -> str:
+    return LARGE_MODEL if route == "large" else DEFAULT_MODEL
+
+
+def heuristic_summary(text: str) -> str:
+    """
+    Extractive summary of a short email: its own lines without greeting and sign-off, on one line.
+    """
+    lines = [line.strip() for line in text.split("\n") if line.strip()]
+    if len(lines) > 1 and _GREETING.match(lines[0]):
+        lines = lines[1:]
+    for i, line in enumerate(lines[1:], 1):
+        if _SIGN_OFF.match(line):
+            lines = lines[:i]
+            break
+    return " ".join(lines) or "Empty email content."
+
+
+def template_summary(text: str) -> str:
+    """
+    Lead excerpt of a templated email: its text without footer lines, cut to SUMMARY_TEMPLATE_CHARS at a word.
+    """
+    summary = heuristic_summary("\n".join(line for line in text.split("\n") if not _TEMPLATE_FOOTER.search(line)))
+    if len(summary) <= SUMMARY_TEMPLATE_CHARS:
+        return summary
+    return summary[:SUMMARY_TEMPLATE_CHARS].rsplit(" ", 1)[0].rstrip(" ,;:.") + "…"
+
 
-def summarize_email(body: str) -> str:
+def _routed_summary(body: str) -> Tuple[str, str, Optional[str]]:
+    # (route, trimmed text, summary if no LLM call is needed); counts the no-LLM outcomes.
     if not body or not body.strip():
-        return "Empty email content."
+        SUMMARY_ROUTES.inc(1, "heuristic")
+        return "heuristic", "", "Empty email content."
+    text = trim_email_body(body)
+    route = summary_route(text, is_templated(body))
+    if route == "heuristic":
+        SUMMARY_ROUTES.inc(1, "heuristic")
+        return route, text, heuristic_summary(text)
+    if route == "template":
+        SUMMARY_ROUTES.inc(1, "template")
+        return route, text, template_summary(text)
+    return route, text, None
 
+
+def _summary_fingerprint(body: str) -> Optional[int]:
+    # Near-duplicate fingerprint for bodies that would need an LLM call; None for the rest.
+    text = trim_email_body(body) if body and body.strip() else ""
+    return fingerprint(text) if text and summary_route(text, is_templated(body)) in ("small", "large") else None
+
+
+def _summary_reps(bodies: List[str]) -> List[int]:
+    """
+    Position of each body's representative: near-duplicates in one request share its summary call.
+    """
+    reps = cluster([_summary_fingerprint(body) for body in bodies])
+    duplicates = sum(1 for pos, rep in enumerate(reps) if rep != pos)
+    if duplicates:
+        SUMMARY_ROUTES.inc(duplicates, "duplicate")
+    return reps
+
+
+def _recalled(key: str, fp: Optional[int], owner: Optional[str]) -> Optional[str]:
+    # A recent near-duplicate's summary from the same mailbox, also cached under this body's own key.
+    summary = recall_summary(owner, fp)
+    if summary is not None:
+        SUMMARY_ROUTES.inc(1, "duplicate")
+        cache_put(key, summary)
+    return summary
+
+
+def summary_route_stats() -> Dict[str, Any]:
+    counts = {route: 0 for route in ("heuristic", "template", "cached", "duplicate", "small", "large")}
+    for (route,), value in SUMMARY_ROUTES.values().items():
+        counts[route] = int(value)
+    total = sum(counts.values())
+    llm_free = total - counts["small"] - counts["large"]
+    return {
+        **counts,
+        "llm_free_rate": round(llm_free / total, 3) if total else 0.0,
+        "small_model": DEFAULT_MODEL,
+        "large_model": LARGE_MODEL or DEFAULT_MODEL,
+    }
+
+
+def _summary_messages(text: str, label: str) -> List[Dict[str, str]]:
     prompt = (
         "Summarize this email in 2–3 sentences.\n"
         "Focus on the sender's intent, key details, and any action required.\n\n"
-        f"Email:\n{body}"
+        f"{label}:\n{text}"
     )
+    return [
+        {"role": "system", "content": "You are a helpful email assistant."},
+        {"role": "user", "content": prompt},
+    ]
 
-    resp = client.chat.completions.create(
-        model=DEFAULT_MODEL,
-        messages=[
-            {"role": "system", "content": "You are a helpful email assistant."},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.2,
-        max_tokens=160,
-    )
 
-    return resp.choices[0].message.content.strip()
+def _reply_key(email_from: str, subject: str, body: str) -> str:
+    return cache_key("reply", DEFAULT_MODEL, REPLY_PROMPT_VERSION, REPLY_TEMPERATURE, email_from, subject, body)
+
 
-def draft_reply(email_from: str, subject: str, body: str) -> str:
+def _reply_with_notes(text: str, notes: str) -> str:
+    # Opening of the email verbatim, plus notes covering all of it.
+    head = chunk_text(text, LLM_INPUT_TOKENS * CHARS_PER_TOKEN // 2)[0]
+    return f"{head}\n[...]\n\nNotes on the full email:\n{notes}"
+
+
+def _reply_messages(email_from: str, subject: str, text: str) -> List[Dict[str, str]]:
     prompt = (
         "Write a professional, concise reply to this email.\n"
         "Be polite, clear, and action-oriented.\n"
@@ -41,17 +535,337 @@ def draft_reply(email_from: str, subject: str, body: str) -> str:
         "Do NOT include a subject line. Only write the email body.\n\n"
         f"From: {email_from}\n"
         f"Subject: {subject}\n\n"
-        f"Email:\n{body}"
+        f"Email:\n{text}"
+    )
+    return [
+        {"role": "system", "content": "You are a helpful email assistant that drafts replies."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _parse_batch(content: str, ids: List[str]) -> Dict[str, str]:
+    # Whatever summaries came back well-formed, keyed by the ids we sent; the rest fall back.
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return {}
+    items = data.get("summaries") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return {}
+    found: Dict[str, str] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        email_id, summary = str(item.get("id", "")), item.get("summary")
+        if email_id in ids and isinstance(summary, str) and summary.strip():
+            found[email_id] = summary.strip()
+    return found
+
+
+def _batch_messages(bodies: List[str]) -> Tuple[List[str], List[Dict[str, str]]]:
+    ids = [str(i) for i in range(1, len(bodies) + 1)]
+    sections = "\n\n".join(
+        f'<email id="{email_id}">\n{trim_email_body(body)}\n</email>' for email_id, body in zip(ids, bodies)
+    )
+    prompt = (
+        f"Summarize each of the {len(bodies)} emails below in 2–3 sentences.\n"
+        "Focus on the sender's intent, key details, and any action required.\n"
+        'Reply with JSON only: {"summaries": [{"id": "<email id>", "summary": "<summary>"}]}, '
+        "one entry per email.\n\n"
+        f"{sections}"
+    )
+    return ids, [
+        {"role": "system", "content": "You are a helpful email assistant. You answer in JSON."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _pack_batches(bodies: Dict[int, str]) -> Tuple[List[List[int]], List[int]]:
+    # Greedy packing by estimated tokens; bodies too long to share a call are returned separately.
+    batches: List[List[int]] = []
+    singles: List[int] = []
+    current: List[int] = []
+    used = 0
+    for pos, body in bodies.items():
+        tokens = len(trim_email_body(body)) // CHARS_PER_TOKEN + 1
+        if tokens > LLM_BATCH_ITEM_TOKENS:
+            singles.append(pos)
+            continue
+        if current and (used + tokens > LLM_BATCH_TOKENS or len(current) >= LLM_BATCH_MAX_EMAILS):
+            batches.append(current)
+            current, used = [], 0
+        current.append(pos)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches, singles
+
+
+def _plan_summaries(
+    bodies: List[str],
+    owner: Optional[str],
+) -> Tuple[List[str], Dict[int, str], List[List[int]], Dict[int, int]]:
+    # Fills in heuristic, cached and recently seen near-duplicate summaries; of the rest, each
+    # cluster of near-duplicates is summarized once (members map to their representative),
+    # small-model emails are grouped into batches and large-model ones get a call of their own.
+    results: List[str] = [""] * len(bodies)
+    todo: Dict[int, Tuple[str, Optional[int]]] = {}
+    for pos, body in enumerate(bodies):
+        route, text, summary = _routed_summary(body)
+        if summary is None:
+            key = _summary_key(body, _route_model(route))
+            summary = cache_get(key)
+            if summary is not None:
+                SUMMARY_ROUTES.inc(1, "cached")
+            else:
+                fp = fingerprint(text)
+                summary = _recalled(key, fp, owner)
+                if summary is None:
+                    todo[pos] = (route, fp)
+        if summary is not None:
+            results[pos] = summary
+
+    positions = list(todo)
+    reps = cluster([todo[pos][1] for pos in positions])
+    members = {pos: positions[rep] for pos, rep in zip(positions, reps) if positions[rep] != pos}
+    if members:
+        SUMMARY_ROUTES.inc(len(members), "duplicate")
+    small = {pos: bodies[pos] for pos, (route, _) in todo.items() if pos not in members and route == "small"}
+    large = {pos: bodies[pos] for pos, (route, _) in todo.items() if pos not in members and route == "large"}
+
+    batches, singles = _pack_batches(small)
+    groups = [group for group in batches if len(group) > 1]
+    groups += [[pos] for pos in singles + [group[0] for group in batches if len(group) == 1] + list(large)]
+    return results, {**small, **large}, groups, members
+
+
+# LLM calls. Job workers and precompute run these too, on the app loop (core/loop.py).
+# Cache reads/writes run in a worker thread.
+
+
+async def _summarize_chunk_async(chunk: str, part: int, parts: int) -> str:
+    key = _chunk_key(chunk, part, parts)
+    cached = await asyncio.to_thread(cache_get, key)
+    if cached is not None:
+        return cached
+
+    summary = await _complete_async(
+        _chunk_messages(chunk, part, parts), temperature=SUMMARY_TEMPERATURE, max_tokens=140, op="chunk"
     )
+    await asyncio.to_thread(cache_put, key, summary)
+    return summary
+
+
+async def condense_email_async(text: str) -> str:
+    """
+    Map step for a (trimmed) email over the prompt budget: per-chunk notes, summarized concurrently,
+    for the first LLM_MAX_CHUNKS chunks. Keeps the reduce prompt bounded however long the email is.
+    """
+    chunks, dropped = _chunks_for_notes(text)
+    summaries = await asyncio.gather(
+        *(_summarize_chunk_async(chunk, i, len(chunks)) for i, chunk in enumerate(chunks, 1))
+    )
+    return _join_notes(list(summaries), dropped)
+
 
-    response = client.chat.completions.create(
-        model=DEFAULT_MODEL,
-        messages=[
-            {"role": "system", "content": "You are a helpful email assistant that drafts replies."},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.3,
-        max_tokens=220,
+async def summarize_email_async(body: str, owner: Optional[str]) -> str:
+    """
+    owner (the mailbox, or None for no history) scopes near-duplicate reuse across requests.
+    """
+    route, text, summary = _routed_summary(body)
+    if summary is not None:
+        return summary
+
+    model = _route_model(route)
+    key = _summary_key(body, model)
+    cached = await asyncio.to_thread(cache_get, key)
+    if cached is not None:
+        SUMMARY_ROUTES.inc(1, "cached")
+        return cached
+    fp = await asyncio.to_thread(fingerprint, text)
+    reused = await asyncio.to_thread(_recalled, key, fp, owner)
+    if reused is not None:
+        return reused
+
+    label = "Email"
+    if not _fits(text):
+        text = await condense_email_async(text)
+        label = "Notes taken from each part of a long email"
+
+    summary = await _complete_async(
+        _summary_messages(text, label),
+        temperature=SUMMARY_TEMPERATURE,
+        max_tokens=160,
+        op=f"summary_{route}",
+        model=model,
     )
+    SUMMARY_ROUTES.inc(1, route)
+    await asyncio.to_thread(cache_put, key, summary)
+    remember_summary(owner, fp, summary)
+    return summary
+
+
+async def draft_reply_async(email_from: str, subject: str, body: str) -> str:
+    key = _reply_key(email_from, subject, body)
+    cached = await asyncio.to_thread(cache_get, key)
+    if cached is not None:
+        return cached
+
+    text = trim_email_body(body or "")
+    if not _fits(text):
+        text = _reply_with_notes(text, await condense_email_async(text))
+
+    reply = await _complete_async(
+        _reply_messages(email_from, subject, text), temperature=REPLY_TEMPERATURE, max_tokens=220, op="reply"
+    )
+    await asyncio.to_thread(cache_put, key, reply)
+    return reply
+
+
+async def summarize_batch_async(bodies: List[str], owner: Optional[str]) -> List[str]:
+    """
+    One JSON-mode completion summarizing several short emails.
+    Emails missing from (or unparseable in) the output are summarized one by one.
+    """
+    ids, messages = _batch_messages(bodies)
+    try:
+        content = await _complete_async(
+            messages,
+            temperature=SUMMARY_TEMPERATURE,
+            max_tokens=BATCH_SUMMARY_TOKENS * len(bodies) + 40,
+            json_output=True,
+            op="batch",
+        )
+        found = _parse_batch(content, ids)
+    except RateLimitError:
+        raise
+    except Exception:
+        found = {}
+
+    async def settle(email_id: str, body: str) -> str:
+        summary = found.get(email_id)
+        if summary is None:
+            return await summarize_email_async(body, owner)
+        SUMMARY_ROUTES.inc(1, "small")
+        await asyncio.to_thread(cache_put, _summary_key(body), summary)
+        remember_summary(owner, await asyncio.to_thread(_summary_fingerprint, body), summary)
+        return summary
 
-    return response.choices[0].message.content.strip()
+    return list(await asyncio.gather(*(settle(email_id, body) for email_id, body in zip(ids, bodies))))
+
+
+async def summarize_many_async(bodies: List[str], owner: Optional[str]) -> List[str]:
+    """
+    Summaries for a page of one owner's emails, in order. Cached summaries are reused, near-duplicates
+    share one summary, short emails are summarized several per call, and long ones get their own call.
+    """
+    results, pending, groups, members = await asyncio.to_thread(_plan_summaries, bodies, owner)
+
+    async def run(group: List[int]) -> List[str]:
+        if len(group) > 1:
+            return await summarize_batch_async([pending[pos] for pos in group], owner)
+        return [await summarize_email_async(pending[group[0]], owner)]
+
+    for group, summaries in zip(groups, await asyncio.gather(*(run(group) for group in groups))):
+        for pos, summary in zip(group, summaries):
+            results[pos] = summary
+    for pos, rep in members.items():
+        results[pos] = results[rep]
+    return results
+
+
+async def summarize_and_draft_many_async(messages: List[Dict[str, Any]], owner: Optional[str]) -> List[Tuple[str, str]]:
+    """
+    Summary and reply draft for every message, all calls scheduled concurrently.
+    Each message needs "from", "subject" and "body"; results keep message order.
+    Near-duplicate messages share one summary; each still gets its own draft.
+    """
+    bodies = [msg.get("body") or "" for msg in messages]
+    reps = await asyncio.to_thread(_summary_reps, bodies)
+    unique = [pos for pos in range(len(bodies)) if reps[pos] == pos]
+    summaries, drafts = await asyncio.gather(
+        asyncio.gather(*(summarize_email_async(bodies[pos], owner) for pos in unique)),
+        asyncio.gather(
+            *(draft_reply_async(msg.get("from") or "", msg.get("subject") or "", body)
+              for msg, body in zip(messages, bodies))
+        ),
+    )
+    by_rep = dict(zip(unique, summaries))
+    return [(by_rep[reps[pos]], drafts[pos]) for pos in range(len(messages))]
+
+
+async def iter_summaries_and_drafts_async(
+    messages: List[Dict[str, Any]],
+    owner: Optional[str],
+    with_replies: bool = True,
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yields (position, fields) for each message as soon as all of its LLM calls finish.
+    fields holds "ai_summary" (and "ai_reply_draft"), or "error"/"detail" if a call failed.
+    """
+    bodies = [msg.get("body") or "" for msg in messages]
+    reps = await asyncio.to_thread(_summary_reps, bodies)
+    # One summary task per near-duplicate cluster, awaited by every member.
+    summaries = {
+        pos: asyncio.ensure_future(summarize_email_async(body, owner))
+        for pos, body in enumerate(bodies)
+        if reps[pos] == pos
+    }
+
+    async def fields_for(pos: int, msg: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        body = bodies[pos]
+        calls = [summaries[reps[pos]]]
+        if with_replies:
+            calls.append(draft_reply_async(msg.get("from") or "", msg.get("subject") or "", body))
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        fields: Dict[str, Any] = {}
+        for field, result in zip(("ai_summary", "ai_reply_draft"), results):
+            if isinstance(result, Exception):
+                fields["error"] = "llm_failed"
+                fields["detail"] = str(result)
+            else:
+                fields[field] = result
+        return pos, fields
+
+    tasks = [asyncio.ensure_future(fields_for(pos, msg)) for pos, msg in enumerate(messages)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks + list(summaries.values()):
+            task.cancel()
+
+
+async def stream_draft_reply(email_from: str, subject: str, body: str) -> AsyncIterator[str]:
+    """
+    draft_reply_async as text pieces yielded while the model writes them. A cached draft comes back
+    as a single piece; a finished draft is cached under the same key draft_reply_async uses.
+    """
+    key = _reply_key(email_from, subject, body)
+    cached = await asyncio.to_thread(cache_get, key)
+    if cached is not None:
+        yield cached
+        return
+
+    text = trim_email_body(body or "")
+    if not _fits(text):
+        text = _reply_with_notes(text, await condense_email_async(text))
+
+    pieces: List[str] = []
+    stream = _stream_complete_async(
+        _reply_messages(email_from, subject, text), temperature=REPLY_TEMPERATURE, max_tokens=220, op="reply_stream"
+    )
+    try:
+        async for piece in stream:
+            if not pieces:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+            pieces.append(piece)
+            yield piece
+    finally:
+        # Releases the LLM slot now rather than whenever the generator is collected.
+        await stream.aclose()
+    reply = "".join(pieces).strip()
+    if reply:
+        await asyncio.to_thread(cache_put, key, reply)
@@ -1,14 +1,17 @@
 import os
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Header, Request
 from fastapi.responses import RedirectResponse
 from google_auth_oauthlib.flow import Flow
-import requests
 from core.config import (
     GOOGLE_CLIENT_ID,
     GOOGLE_CLIENT_SECRET,
     GOOGLE_REDIRECT_URI,
     SCOPES,
 )
+from auth.tokens import expires_at_from, forget_tokens, login_for_bearer, remember_tokens
+from core.http import get_http_client
+from gmail.mirror import forget_mirror_user
+from jobs.precompute import cancel_precompute, start_precompute
 
 router = APIRouter(prefix="/auth")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
@@ -47,7 +50,7 @@ def auth_callback(request: Request):
     if not code:
         return RedirectResponse("/auth/error?reason=missing_code")
 
-    token_response = requests.post(
+    token_response = get_http_client().post(
         "https://oauth2.googleapis.com/token",
         data={
             "code": code,
@@ -65,9 +68,16 @@ def auth_callback(request: Request):
 
     request.session["user"] = {
         "access_token": tokens["access_token"],
+        # Handed to the frontend, which sends it as its bearer token; the access token is refreshed under it.
+        "bearer_token": tokens["access_token"],
         "refresh_token": tokens.get("refresh_token"),
         "expires_in": tokens.get("expires_in"),
+        "expires_at": expires_at_from(tokens.get("expires_in")),
     }
+    remember_tokens(request.session["user"])
+
+    # Warm summaries and drafts for the dashboard while the browser follows the redirect.
+    start_precompute(tokens["access_token"])
 
     return RedirectResponse(
     f"{FRONTEND_URL}/dashboard?token={tokens['access_token']}",
@@ -76,6 +86,17 @@ def auth_callback(request: Request):
 
 
 @router.post("/logout")
-def logout(request: Request):
+def logout(request: Request, authorization: str = Header(None)):
+    user = request.session.get("user")
+    if not user and (authorization or "").lower().startswith("bearer "):
+        # Cross-origin logout: no session cookie, only the bearer the frontend was given.
+        user = login_for_bearer(authorization.split(" ", 1)[1].strip())
+    user = user or {}
+    bearer = user.get("bearer_token") or user.get("access_token")
+    if bearer:
+        cancel_precompute(bearer)
+    for token in {user.get("bearer_token"), user.get("access_token")} - {None}:
+        forget_mirror_user(token)
+    forget_tokens(user)
     request.session.clear()
     return {"message": "Logged out"}
@@ -0,0 +1,214 @@
+import asyncio
+import calendar
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+from google.oauth2.credentials import Credentials
+
+from core.config import GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, SCOPES
+from core.http import GoogleAuthRequest
+
+
+TOKEN_URI = "https://oauth2.googleapis.com/token"
+
+# Tokens are refreshed this long before Google's expiry, so requests never carry a dying token.
+TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+TOKEN_CACHE_MAX_USERS = max(1, int(os.getenv("TOKEN_CACHE_MAX_USERS", "10000")))
+# Used when Google omits expires_in.
+DEFAULT_TOKEN_LIFETIME = 3600
+
+# user key -> (access_token, expires_at)
+_tokens: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+# access token -> expires_at, for callers holding only a token (the mirror's mailbox lookup).
+_expiry_by_token: Dict[str, float] = {}
+# bearer token handed to the frontend at login -> that login's tokens. The frontend calls the API
+# cross-origin with only its bearer (no session cookie), so this is how those requests find the login.
+_logins: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+# user key -> refresh in flight; concurrent callers wait on it instead of refreshing again.
+_inflight: Dict[str, Future] = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "refreshes": 0, "coalesced": 0, "refresh_errors": 0}
+
+
+def user_key(user_session: Dict[str, Any]) -> Optional[str]:
+    # The refresh token is the stable per-user secret; hash it rather than keep it as a key.
+    secret = user_session.get("refresh_token") or user_session.get("access_token")
+    if not secret:
+        return None
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+
+def expires_at_from(expires_in: Any, now: Optional[float] = None) -> float:
+    try:
+        lifetime = float(expires_in)
+    except (TypeError, ValueError):
+        lifetime = DEFAULT_TOKEN_LIFETIME
+    return (now or time.time()) + lifetime
+
+
+def _fresh(entry: Optional[Tuple[str, float]], now: float) -> bool:
+    return entry is not None and entry[1] - TOKEN_REFRESH_MARGIN_SECONDS > now
+
+
+def _store(key: str, token: str, expires_at: float) -> None:
+    # Caller holds _lock.
+    _drop(key)
+    _tokens[key] = (token, expires_at)
+    _expiry_by_token[token] = expires_at
+    while len(_tokens) > TOKEN_CACHE_MAX_USERS:
+        _drop(next(iter(_tokens)))
+
+
+def _drop(key: str) -> None:
+    # Caller holds _lock.
+    entry = _tokens.pop(key, None)
+    if entry is not None:
+        _expiry_by_token.pop(entry[0], None)
+
+
+def remember_tokens(user_session: Dict[str, Any]) -> None:
+    key = user_key(user_session)
+    bearer = user_session.get("bearer_token")
+    with _lock:
+        if key and user_session.get("access_token") and user_session.get("expires_at"):
+            _store(key, user_session["access_token"], float(user_session["expires_at"]))
+        if bearer and user_session.get("refresh_token"):
+            _logins[bearer] = {
+                "access_token": user_session.get("access_token"),
+                "bearer_token": bearer,
+                "refresh_token": user_session["refresh_token"],
+                "expires_at": user_session.get("expires_at"),
+            }
+            _logins.move_to_end(bearer)
+            while len(_logins) > TOKEN_CACHE_MAX_USERS:
+                _logins.popitem(last=False)
+
+
+def forget_tokens(user_session: Dict[str, Any]) -> None:
+    key = user_key(user_session)
+    with _lock:
+        if key:
+            _drop(key)
+        _logins.pop(user_session.get("bearer_token"), None)
+
+
+def login_for_bearer(bearer: str) -> Optional[Dict[str, Any]]:
+    """
+    The login (as remember_tokens saw it) that was handed this bearer token; None for other tokens.
+    """
+    with _lock:
+        login = _logins.get(bearer)
+        if login is not None:
+            _logins.move_to_end(bearer)
+        return login
+
+
+def token_expires_at(access_token: str) -> Optional[float]:
+    """
+    When a token this process issued or refreshed expires; None for tokens it has not seen.
+    """
+    with _lock:
+        return _expiry_by_token.get(access_token)
+
+
+def _cached_token(key: str, user_session: Dict[str, Any], now: float) -> Optional[Tuple[str, float]]:
+    # Caller holds _lock. A still-fresh token from the cache, or from the session itself.
+    entry = _tokens.get(key)
+    if not _fresh(entry, now) and user_session.get("expires_at"):
+        session_entry = (user_session.get("access_token"), float(user_session["expires_at"]))
+        if session_entry[0] and _fresh(session_entry, now):
+            _store(key, *session_entry)
+            entry = session_entry
+    if not _fresh(entry, now):
+        return None
+    _tokens.move_to_end(key)
+    _stats["hits"] += 1
+    return entry
+
+
+def get_access_token(user_session: Dict[str, Any]) -> Tuple[str, float]:
+    """
+    (access_token, expires_at) for a session. A cached, still-fresh token is a dict lookup;
+    otherwise one refresh per user runs and concurrent callers share its result.
+    """
+    key = user_key(user_session)
+    if key is None:
+        raise ValueError("session has no token")
+    with _lock:
+        entry = _cached_token(key, user_session, time.time())
+        if entry is not None:
+            return entry
+
+        if not user_session.get("refresh_token"):
+            # Nothing to refresh with; hand back what the session has and let Google decide.
+            return user_session.get("access_token"), float(user_session.get("expires_at") or 0)
+
+        pending = _inflight.get(key)
+        leader = pending is None
+        if leader:
+            pending = Future()
+            _inflight[key] = pending
+        else:
+            _stats["coalesced"] += 1
+
+    if not leader:
+        return pending.result()
+
+    try:
+        result = _refresh(user_session["refresh_token"])
+        with _lock:
+            _store(key, *result)
+            _stats["refreshes"] += 1
+        pending.set_result(result)
+        return result
+    except Exception as e:
+        with _lock:
+            _stats["refresh_errors"] += 1
+        pending.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+
+async def get_access_token_async(user_session: Dict[str, Any]) -> Tuple[str, float]:
+    """
+    get_access_token for the event loop: cache hits stay on the loop, refreshes run in a worker thread.
+    """
+    key = user_key(user_session)
+    if key is None:
+        raise ValueError("session has no token")
+    with _lock:
+        entry = _cached_token(key, user_session, time.time())
+    if entry is not None:
+        return entry
+    return await asyncio.to_thread(get_access_token, user_session)
+
+
+def _refresh(refresh_token: str) -> Tuple[str, float]:
+    creds = Credentials(
+        token=None,
+        refresh_token=refresh_token,
+        token_uri=TOKEN_URI,
+        client_id=GOOGLE_CLIENT_ID,
+        client_secret=GOOGLE_CLIENT_SECRET,
+        scopes=SCOPES,
+    )
+    creds.refresh(GoogleAuthRequest())
+    # google-auth reports expiry as a naive UTC datetime.
+    expires_at = calendar.timegm(creds.expiry.utctimetuple()) if creds.expiry else expires_at_from(None)
+    return creds.token, float(expires_at)
+
+
+def token_cache_stats() -> Dict[str, Any]:
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+        out["users"] = len(_tokens)
+        out["logins"] = len(_logins)
+        out["refreshing"] = len(_inflight)
+    return out
@@ -0,0 +1,81 @@
+"""
+Bytes Gmail returns with and without the `fields` partial-response masks in gmail/service.py,
+per call type, plus the time spent decoding the JSON.
+
+Against the fake Gmail (uvicorn fakes.gmail:app --port 8001):
+    GMAIL_BASE=http://localhost:8001/gmail/v1/users/me python -m bench.gmail_fields --token fake
+
+Against Gmail itself, pass a real access token (read-only calls only):
+    python -m bench.gmail_fields --token ya29... --messages 20
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+# gmail.service pulls in the LLM client, which refuses to load without a key; no LLM call is made here.
+os.environ.setdefault("GROQ_API_KEY", "unused")
+
+from gmail.service import (  # noqa: E402
+    FULL_FIELDS,
+    GMAIL_BASE,
+    LIST_FIELDS,
+    METADATA_FIELDS,
+)
+
+METADATA = {"format": "metadata", "metadataHeaders": ["From", "To", "Subject", "Date"]}
+FULL = {"format": "full"}
+
+
+def fetch(client: httpx.Client, path: str, params: Dict[str, Any]) -> Tuple[int, float]:
+    r = client.get(f"{GMAIL_BASE}{path}", params=params)
+    r.raise_for_status()
+    started = time.perf_counter()
+    json.loads(r.content)
+    return len(r.content), time.perf_counter() - started
+
+
+def measure(client: httpx.Client, calls: List[Tuple[str, Dict[str, Any]]], fields: str) -> Dict[str, float]:
+    plain = [fetch(client, path, params) for path, params in calls]
+    lean = [fetch(client, path, {**params, "fields": fields}) for path, params in calls]
+    plain_bytes = sum(b for b, _ in plain)
+    lean_bytes = sum(b for b, _ in lean)
+    return {
+        "calls": len(calls),
+        "plain_bytes": plain_bytes,
+        "masked_bytes": lean_bytes,
+        "saved_pct": 100 * (1 - lean_bytes / plain_bytes) if plain_bytes else 0.0,
+        "plain_parse_ms": 1000 * sum(t for _, t in plain),
+        "masked_parse_ms": 1000 * sum(t for _, t in lean),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure Gmail bytes saved by field masks.")
+    parser.add_argument("--token", required=True, help="Gmail access token (any value works with the fake)")
+    parser.add_argument("--messages", type=int, default=10, help="inbox messages to fetch")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    with httpx.Client(headers=headers, timeout=30) as client:
+        listing = {"maxResults": args.messages, "labelIds": "INBOX"}
+        ids = [m["id"] for m in client.get(f"{GMAIL_BASE}/messages", params=listing).json().get("messages", [])]
+        results = {
+            "messages.list": measure(client, [("/messages", listing)], LIST_FIELDS),
+            "messages.get metadata": measure(client, [(f"/messages/{i}", METADATA) for i in ids], METADATA_FIELDS),
+            "messages.get full": measure(client, [(f"/messages/{i}", FULL) for i in ids], FULL_FIELDS),
+        }
+
+    print(f"{'call':<24}{'calls':>6}{'plain KB':>12}{'masked KB':>12}{'saved':>8}{'parse ms':>18}")
+    for name, r in results.items():
+        print(
+            f"{name:<24}{r['calls']:>6}{r['plain_bytes'] / 1024:>12.1f}{r['masked_bytes'] / 1024:>12.1f}"
+            f"{r['saved_pct']:>7.1f}%{r['plain_parse_ms']:>9.2f} -> {r['masked_parse_ms']:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Compares the old regex strip_html with gmail.html_text.html_to_text on generated HTML bodies
+shaped like real newsletters, receipts and reply threads, from 20 KB up to several MB.
+
+    python -m bench.html_to_text
+    python -m bench.html_to_text --sizes 50000,2000000 --repeat 5 --max-chars 50000
+"""
+import argparse
+import random
+import re
+import time
+from typing import Callable, Dict, List
+
+from gmail.html_text import html_to_text
+
+
+def legacy_strip_html(html: str) -> str:
+    # strip_html as it was before the single-pass converter.
+    if not html:
+        return ""
+    html = re.sub(r"(?is)<(script|style).*?>.*?</\1>", " ", html)
+    html = re.sub(r"(?is)<br\s*/?>", "\n", html)
+    html = re.sub(r"(?is)</p>", "\n", html)
+    html = re.sub(r"(?is)<.*?>", " ", html)
+    html = re.sub(r"[ \t]+", " ", html)
+    html = re.sub(r"\n\s+\n", "\n\n", html)
+    return html.strip()
+
+
+WORDS = ("offer sale new account update your order shipped invoice team meeting please review "
+         "thanks regards click here unsubscribe privacy policy schedule launch product").split()
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))).capitalize() + "."
+
+
+def newsletter(size: int, rng: random.Random) -> str:
+    # Table-heavy marketing layout: inline styles, CSS blocks, tracking pixels, tiny scripts.
+    head = "<html><head><style>" + "td{padding:0;margin:0}.btn{color:#fff}" * 40 + "</style></head><body>"
+    blocks = [head]
+    length = len(head)
+    while length < size:
+        block = (
+            '<table width="600" cellpadding="0" cellspacing="0" style="border-collapse:collapse;font-family:Arial">'
+            f'<tr><td style="padding:12px 24px;color:#333;font-size:14px"><h2>{_sentence(rng)}</h2>'
+            f'<p>{_sentence(rng)} <a href="https://example.com/t?u={rng.randint(1, 10**9)}">{_sentence(rng)}</a></p>'
+            f'<img src="https://example.com/p/{rng.randint(1, 10**9)}.gif" width="1" height="1"/></td>'
+            f'<td><span style="font-weight:bold">{_sentence(rng)}</span><br/>{_sentence(rng)}</td></tr></table>'
+            '<script type="text/javascript">window.dataLayer=window.dataLayer||[];</script>'
+        )
+        blocks.append(block)
+        length += len(block)
+    blocks.append("</body></html>")
+    return "".join(blocks)
+
+
+def reply_thread(size: int, rng: random.Random) -> str:
+    # Deeply quoted reply chain, the shape Outlook and Gmail produce.
+    parts = []
+    length = 0
+    depth = 0
+    while length < size:
+        part = f"<div dir=\"ltr\"><p>{_sentence(rng)}<br>{_sentence(rng)}</p><blockquote class=\"gmail_quote\">"
+        parts.append(part)
+        length += len(part)
+        depth += 1
+    return "".join(parts) + "</blockquote></div>" * depth
+
+
+def unclosed_styles(size: int, rng: random.Random) -> str:
+    # Many <style> openers with no closer: the worst case for the old backtracking regex.
+    unit = f"<style>{_sentence(rng)}<p>{_sentence(rng)}</p>"
+    return unit * max(1, size // len(unit))
+
+
+CORPUS: Dict[str, Callable[[int, random.Random], str]] = {
+    "newsletter": newsletter,
+    "reply_thread": reply_thread,
+    "unclosed_styles": unclosed_styles,
+}
+
+
+def _time(fn: Callable[[], str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark HTML-to-text conversion.")
+    parser.add_argument("--sizes", default="20000,200000,2000000,5000000", help="comma-separated HTML sizes in bytes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-chars", type=int, default=50000, help="text budget for the budgeted run")
+    parser.add_argument("--legacy-limit", type=int, default=20000,
+                        help="skip the regex version on unclosed_styles above this size (it is quadratic)")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    rows: List[List[str]] = [["corpus", "size", "regex ms", "single-pass ms", "budgeted ms", "speedup"]]
+    for name, build in CORPUS.items():
+        for size in (int(s) for s in args.sizes.split(",")):
+            html = build(size, rng)
+            full = _time(lambda: html_to_text(html), args.repeat)
+            budgeted = _time(lambda: html_to_text(html, max_chars=args.max_chars), args.repeat)
+            if name == "unclosed_styles" and len(html) > args.legacy_limit:
+                legacy, speedup = "skipped", "-"
+            else:
+                legacy_s = _time(lambda: legacy_strip_html(html), args.repeat)
+                legacy, speedup = f"{legacy_s * 1000:.1f}", f"{legacy_s / budgeted:.1f}x"
+            rows.append([name, f"{len(html) // 1000} KB", legacy, f"{full * 1000:.1f}", f"{budgeted * 1000:.1f}", speedup])
+
+    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print("  ".join(cell.ljust(w) for cell, w in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Load test for the /gmail/* routes of a running backend. Reports throughput and p50/p95/p99 per route
+and saves the run under bench/results/ (tagged with the git commit) for comparison with later runs.
+
+Offline setup (fake Gmail + fake Groq, see fakes/):
+    uvicorn fakes.gmail:app --port 8001
+    uvicorn fakes.groq:app --port 8002
+    GMAIL_BASE=http://localhost:8001/gmail/v1/users/me GMAIL_BATCH_URL=http://localhost:8001/batch/gmail/v1 \\
+    GROQ_BASE_URL=http://localhost:8002/openai/v1 GROQ_API_KEY=fake uvicorn main:app --port 8000
+
+Then:
+    python -m bench.load --mode real --token fake --concurrency 16 --requests 200
+    python -m bench.load --mode demo --routes last,search --compare latest
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+RESULTS_DIR = Path(os.getenv("BENCH_RESULTS_DIR", Path(__file__).resolve().parent / "results"))
+
+# name -> (method, path, query params, json body); {id} is filled from the mailbox.
+ROUTES: Dict[str, Any] = {
+    "profile": ("GET", "/gmail/profile", {}, None),
+    "messages": ("GET", "/gmail/messages", {"max_results": 10}, None),
+    "message": ("GET", "/gmail/message/{id}", {}, None),
+    "message_full": ("GET", "/gmail/message/{id}/full", {}, None),
+    "last": ("GET", "/gmail/last", {"n": 10}, None),
+    "search": ("GET", "/gmail/search", {"q": "invoice", "n": 20}, None),
+    "last_with_summaries": ("GET", "/gmail/last_with_summaries", {"n": 5}, None),
+    "last_with_replies": ("GET", "/gmail/last_with_replies", {"n": 5}, None),
+    "last_with_replies_stream": ("GET", "/gmail/last_with_replies", {"n": 5, "stream": "true"}, None),
+    "jobs_submit": ("POST", "/gmail/jobs", {}, {"kind": "last_with_replies", "n": 5}),
+}
+# Routes that change the mailbox; only run with --writes (against the fake Gmail).
+WRITE_ROUTES: Dict[str, Any] = {
+    "send": ("POST", "/gmail/send", {}, {"to": "load@example.com", "subject": "Load test", "body": "Hello"}),
+    "send_reply": (
+        "POST",
+        "/gmail/send_reply",
+        {},
+        {"to_email": "load@example.com", "subject": "Re: Load test", "body": "Hello", "confirm": True},
+    ),
+    "delete": ("DELETE", "/gmail/message/{id}", {}, None),
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"]).returncode != 0
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_route(
+    client: httpx.Client,
+    spec: Any,
+    ids: List[str],
+    mode: str,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    method, path, params, body = spec
+    id_cycle = itertools.cycle(ids or ["missing"])
+    id_lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def one(_: int) -> None:
+        with id_lock:
+            message_id = next(id_cycle)
+        url = path.replace("{id}", message_id)
+        started = time.perf_counter()
+        try:
+            # Reading the whole body keeps streaming routes honest (time to last byte).
+            response = client.request(method, url, params={**params, "mode": mode}, json=body)
+            response.read()
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    return {
+        "requests": requests,
+        "errors": errors,
+        "statuses": statuses,
+        "throughput_rps": round(requests / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def load_previous(compare: str) -> Optional[Dict[str, Any]]:
+    if compare == "latest":
+        runs = sorted(RESULTS_DIR.glob("*.json"))
+        return json.loads(runs[-1].read_text()) if runs else None
+    return json.loads(Path(compare).read_text())
+
+
+def _delta(now: float, before: Optional[float]) -> str:
+    if not before:
+        return ""
+    return f"{(now - before) / before * 100:+.0f}%"
+
+
+def print_report(run: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> None:
+    header = ["route", "reqs", "errors", "rps", "p50 ms", "p95 ms", "p99 ms"]
+    if previous:
+        header += [f"p50 vs {previous['commit']}", "p95", "p99", "rps"]
+    rows = [header]
+    for name, result in run["routes"].items():
+        row = [name, str(result["requests"]), str(result["errors"]), f"{result['throughput_rps']:.1f}",
+               f"{result['p50_ms']:.1f}", f"{result['p95_ms']:.1f}", f"{result['p99_ms']:.1f}"]
+        if previous:
+            old = previous["routes"].get(name, {})
+            row += [_delta(result[k], old.get(k)) for k in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")]
+        rows.append(row)
+    widths = [max(len(r[i]) for r in rows) for i in range(len(header))]
+    for row in rows:
+        print("  ".join(cell.ljust(w) for cell, w in zip(row, widths)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the /gmail/* routes.")
+    parser.add_argument("--base", default="http://localhost:8000")
+    parser.add_argument("--mode", default="demo", choices=["demo", "real"])
+    parser.add_argument("--token", default=None, help="bearer token for real mode (any value works with the fakes)")
+    parser.add_argument("--routes", default=",".join(ROUTES), help="comma-separated route names")
+    parser.add_argument("--writes", action="store_true", help=f"also run {', '.join(WRITE_ROUTES)}")
+    parser.add_argument("--requests", type=int, default=100, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--label", default="", help="free-form note stored with the results")
+    parser.add_argument("--compare", default=None, help="results file to compare with, or 'latest'")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    routes = {name: ROUTES[name] for name in args.routes.split(",") if name in ROUTES}
+    if args.writes:
+        routes.update(WRITE_ROUTES)
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    previous = load_previous(args.compare) if args.compare else None
+
+    with httpx.Client(base_url=args.base, headers=headers, timeout=args.timeout, limits=limits) as client:
+        listing = client.get("/gmail/messages", params={"max_results": 50, "mode": args.mode})
+        listing.raise_for_status()
+        ids = [m["id"] for m in listing.json().get("messages", [])]
+
+        run: Dict[str, Any] = {
+            "commit": git_commit(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "label": args.label,
+            "config": {k: getattr(args, k) for k in ("base", "mode", "requests", "concurrency")},
+            "routes": {},
+        }
+        for name, spec in routes.items():
+            print(f"{name}...", flush=True)
+            run["routes"][name] = run_route(client, spec, ids, args.mode, args.requests, args.concurrency)
+
+    print()
+    print_report(run, previous)
+    if not args.no_save:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = RESULTS_DIR / f"{run['started_at'].replace(':', '')}-{run['commit']}.json"
+        path.write_text(json.dumps(run, indent=2))
+        print(f"\nsaved {path}")
+
+
+if __name__ == "__main__":
+    main()
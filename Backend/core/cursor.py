@@ -0,0 +1,50 @@
+# core/cursor.py
+import base64
+import json
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+
+def _is_key(value: Any) -> bool:
+    # Keyset position: [epoch or internal date, message id].
+    return (
+        isinstance(value, list)
+        and len(value) == 2
+        and isinstance(value[0], int)
+        and not isinstance(value[0], bool)
+        and isinstance(value[1], str)
+    )
+
+
+# Fields a position may hold, with the shape each must have.
+_FIELDS: Dict[str, Callable[[Any], bool]] = {
+    "k": _is_key,
+    "p": lambda value: isinstance(value, str),
+    "q": lambda value: value is None or isinstance(value, str),
+    "x": lambda value: isinstance(value, list) and all(isinstance(v, str) for v in value),
+}
+
+
+def encode_cursor(mode: str, position: Dict[str, Any]) -> str:
+    raw = json.dumps({"m": mode, **position}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], mode: str) -> Dict[str, Any]:
+    """
+    Position stored in an opaque page cursor ({} for the first page).
+    Cursors are only valid for the mode that issued them; malformed ones are a 400.
+    """
+    if not cursor:
+        return {}
+    try:
+        raw = base64.urlsafe_b64decode((cursor + "=" * (-len(cursor) % 4)).encode("ascii"))
+        data = json.loads(raw)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(data, dict) or data.pop("m", None) != mode:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if any(name not in _FIELDS or not _FIELDS[name](value) for name, value in data.items()):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return data
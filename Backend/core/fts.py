@@ -0,0 +1,86 @@
+# core/fts.py
+import html
+import re
+import sqlite3
+from typing import Optional
+
+_TERM = re.compile(r'"[^"]*"|\S+')
+
+# Control characters FTS5 wraps matches in; only marked_html turns them into markup.
+_OPEN = "\x02"
+_CLOSE = "\x03"
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Turns free text into a safe FTS5 MATCH expression: every term is quoted (so FTS operators
+    in user input are literal), a trailing * makes a term a prefix search, and "quoted phrases"
+    stay phrases. Terms are ANDed. Returns None when nothing searchable is left.
+    """
+    parts = []
+    for raw in _TERM.findall(text or ""):
+        prefix = raw.endswith("*") and not raw.startswith('"')
+        term = raw.strip('"').rstrip("*").replace('"', "").strip()
+        if not term:
+            continue
+        parts.append(f'"{term}"*' if prefix else f'"{term}"')
+    return " ".join(parts) or None
+
+
+def hit_columns(table: str) -> str:
+    """
+    SELECT columns for a search hit in an FTS5 table indexing (subject, from_email, snippet, body):
+    subject_hl, match_snippet and score. Pass the first two through marked_html.
+    """
+    return (
+        f"highlight({table}, 0, char(2), char(3)) AS subject_hl, "
+        f"snippet({table}, -1, char(2), char(3), '…', 16) AS match_snippet, "
+        f"bm25({table}, 5.0, 3.0, 1.0, 1.0) AS score"
+    )
+
+
+def marked_html(text: Optional[str]) -> Optional[str]:
+    """
+    highlight()/snippet() output as safe HTML: the email text is escaped and the only
+    markup left is <mark> around matches.
+    """
+    if text is None:
+        return None
+    return html.escape(text).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def init_search_index(conn: sqlite3.Connection, table: str) -> None:
+    """
+    Creates {table}_fts, an external-content FTS5 index over the table's (subject, from_email,
+    snippet, body) columns, with triggers that keep it current. A new index is built from the
+    rows already there.
+    """
+    fts = f"{table}_fts"
+    new_row = "new.rowid, new.subject, new.from_email, new.snippet, new.body"
+    old_row = "old.rowid, old.subject, old.from_email, old.snippet, old.body"
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts,)).fetchone()
+    conn.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            subject, from_email, snippet, body,
+            content='{table}', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """
+    )
+    conn.executescript(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, subject, from_email, snippet, body) VALUES ({new_row});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, subject, from_email, snippet, body) VALUES ('delete', {old_row});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, subject, from_email, snippet, body) VALUES ('delete', {old_row});
+            INSERT INTO {fts} (rowid, subject, from_email, snippet, body) VALUES ({new_row});
+        END;
+        """
+    )
+    if not exists:
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
@@ -0,0 +1,167 @@
+# core/http.py
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+from google.auth import exceptions as google_exceptions
+from google.auth import transport as google_transport
+
+# Connection pool shared by every Gmail and OAuth call in the process.
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "50"))
+HTTP_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "20"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+
+_client: Optional[httpx.Client] = None
+_transport: Optional[httpx.HTTPTransport] = None
+# Async twin used by the async request path; same limits, its own pool.
+_async_client: Optional[httpx.AsyncClient] = None
+_async_transport: Optional[httpx.AsyncHTTPTransport] = None
+_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_requests_sent = 0
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _count_request(request: httpx.Request) -> None:
+    global _requests_sent
+    with _stats_lock:
+        _requests_sent += 1
+
+
+async def _count_request_async(request: httpx.Request) -> None:
+    _count_request(request)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_POOL_SIZE,
+        max_keepalive_connections=HTTP_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _build_client() -> httpx.Client:
+    global _transport
+    # HTTP/2 needs the optional "h2" package; fall back to HTTP/1.1 keep-alive without it.
+    http2 = HTTP2_ENABLED and _http2_available()
+    _transport = httpx.HTTPTransport(http2=http2, limits=_limits())
+    return httpx.Client(
+        transport=_transport,
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        event_hooks={"request": [_count_request]},
+    )
+
+
+def _build_async_client() -> httpx.AsyncClient:
+    global _async_transport
+    _async_transport = httpx.AsyncHTTPTransport(http2=HTTP2_ENABLED and _http2_available(), limits=_limits())
+    return httpx.AsyncClient(
+        transport=_async_transport,
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        event_hooks={"request": [_count_request_async]},
+    )
+
+
+def get_http_client() -> httpx.Client:
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = _build_client()
+    return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    # Only touched from the event loop thread, so no lock is needed.
+    global _async_client
+    if _async_client is None:
+        _async_client = _build_async_client()
+    return _async_client
+
+
+def init_http_client() -> None:
+    get_http_client()
+
+
+def close_http_client() -> None:
+    global _client, _transport
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _transport = None
+
+
+async def close_async_http_client() -> None:
+    global _async_client, _async_transport
+    if _async_client is not None:
+        await _async_client.aclose()
+    _async_client = None
+    _async_transport = None
+
+
+def _pool_connections(transport: Any) -> Dict[str, int]:
+    pool = getattr(transport, "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    idle = sum(1 for c in connections if c.is_idle())
+    return {"connections": len(connections), "idle_connections": idle, "active_connections": len(connections) - idle}
+
+
+def http_pool_stats() -> Dict[str, Any]:
+    sync_pool = _pool_connections(_transport)
+    return {
+        "open": _client is not None,
+        "http2": HTTP2_ENABLED and _http2_available(),
+        "max_connections": HTTP_POOL_SIZE,
+        "max_keepalive_connections": HTTP_KEEPALIVE_CONNECTIONS,
+        **sync_pool,
+        "async": {"open": _async_client is not None, **_pool_connections(_async_transport)},
+        "requests_sent": _requests_sent,
+    }
+
+
+class _GoogleAuthResponse(google_transport.Response):
+    def __init__(self, response: httpx.Response):
+        self._response = response
+
+    @property
+    def status(self) -> int:
+        return self._response.status_code
+
+    @property
+    def headers(self):
+        return self._response.headers
+
+    @property
+    def data(self) -> bytes:
+        return self._response.content
+
+
+class GoogleAuthRequest(google_transport.Request):
+    """
+    google-auth transport that sends token requests through the shared pool.
+    """
+
+    def __call__(self, url, method="GET", body=None, headers=None, timeout=None, **kwargs):
+        try:
+            response = get_http_client().request(
+                method,
+                url,
+                content=body,
+                headers=headers,
+                timeout=timeout or HTTP_TIMEOUT,
+            )
+        except httpx.HTTPError as e:
+            raise google_exceptions.TransportError(e) from e
+        return _GoogleAuthResponse(response)
@@ -0,0 +1,25 @@
+# core/loop.py
+import asyncio
+from typing import Awaitable, Optional, TypeVar
+
+_T = TypeVar("_T")
+
+# The app's event loop, set for the lifetime of the server. Job and precompute threads run their
+# coroutines on it, so they share the async HTTP client, the LLM slots and the rate limiter.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def bind_app_loop(loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    global _loop
+    _loop = loop
+
+
+def run_on_app_loop(coro: Awaitable[_T]) -> _T:
+    """
+    Runs a coroutine from a worker thread and waits for its result. Without a bound loop
+    (scripts, tests) it runs on a fresh one.
+    """
+    loop = _loop
+    if loop is None or loop.is_closed():
+        return asyncio.run(coro)
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
@@ -0,0 +1,152 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Adds a Server-Timing header (per-kind time summed over the request's spans) to every response.
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """
+    Prometheus-style cumulative histogram with a fixed label set.
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        # label values -> [count per bucket (non-cumulative) ..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values: str) -> None:
+        slot = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0.0] * (len(BUCKETS) + 2)
+            series[slot] += 1
+            series[-1] += seconds
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+        for label_values, series in sorted(snapshot.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            prefix = base + "," if base else ""
+            running = 0.0
+            for bound, count in zip(BUCKETS, series):
+                running += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {running:.0f}')
+            running += series[len(BUCKETS)]
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {running:.0f}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {running:.0f}")
+        return lines
+
+
+class Counter:
+    """
+    Prometheus-style counter with a fixed label set.
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for label_values, value in sorted(snapshot.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{base}}} {value:.0f}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUESTS = Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route", "status"))
+# Span kind -> histogram of its operations.
+SPANS = {
+    "gmail": Histogram("gmail_call_duration_seconds", "Gmail API call latency.", ("op",)),
+    "llm": Histogram("llm_call_duration_seconds", "LLM completion latency.", ("op",)),
+    "llm_first_token": Histogram(
+        "llm_time_to_first_token_seconds", "Time from sending a streamed LLM call to its first text.", ("op",)
+    ),
+    "llm_wait": Histogram("llm_rate_limit_wait_seconds", "Time LLM calls waited on the rate limiter.", ("op",)),
+    "sqlite": Histogram("sqlite_query_duration_seconds", "SQLite query latency.", ("op",)),
+}
+
+GMAIL_RESPONSE_BYTES = Counter("gmail_response_bytes_total", "Decoded Gmail response body bytes.", ("op",))
+SUMMARY_ROUTES = Counter(
+    "summary_route_total", "Emails summarized per route: heuristic, template, cached or duplicate (no LLM call), small or large model.", ("route",)
+)
+
+# Per-request span totals: kind -> [seconds, calls]. Worker threads see it through copied contexts.
+_request_timings: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("request_timings", default=None)
+_timings_lock = threading.Lock()
+
+
+@contextmanager
+def span(kind: str, op: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SPANS[kind].observe(elapsed, op)
+        timings = _request_timings.get()
+        if timings is not None:
+            with _timings_lock:
+                total = timings.setdefault(kind, [0.0, 0])
+                total[0] += elapsed
+                total[1] += 1
+
+
+def begin_request() -> Token:
+    return _request_timings.set({})
+
+
+def end_request(token: Token) -> Dict[str, List[float]]:
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return timings
+
+
+def server_timing_header(timings: Dict[str, List[float]], total_seconds: float) -> str:
+    # Span times are summed, so concurrent calls can add up to more than the total.
+    parts = [
+        f'{kind};dur={seconds * 1000:.1f};desc="{calls:.0f} calls"'
+        for kind, (seconds, calls) in sorted(timings.items())
+    ]
+    parts.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in (REQUESTS, *SPANS.values(), GMAIL_RESPONSE_BYTES, SUMMARY_ROUTES):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -1,6 +1,9 @@
 # core/session.py
-from fastapi import HTTPException
-from typing import Optional
+from fastapi import HTTPException, Request
+from google.auth import exceptions as google_exceptions
+from typing import Any, Dict, Optional
+
+from auth.tokens import get_access_token_async, login_for_bearer
 
 def require_auth_header(authorization: Optional[str]):
     if not authorization:
@@ -14,3 +17,29 @@ def require_auth_header(authorization: Optional[str]):
         raise HTTPException(status_code=401, detail="Empty token")
 
     return {"access_token": token}
+
+
+async def require_user(request: Request, authorization: Optional[str]) -> Dict[str, Any]:
+    """
+    Access token to call Gmail with. When the bearer token was handed out at a login (found through
+    this browser's session cookie, or server-side for cross-origin calls that send only the bearer),
+    the login's token comes from the token cache instead, refreshed (once per user, however many
+    requests are waiting) shortly before it expires. Other bearer tokens are used as sent.
+    """
+    user = require_auth_header(authorization)
+    session = request.session.get("user") if "session" in request.scope else None
+    if session and user["access_token"] in (session.get("bearer_token"), session.get("access_token")):
+        login = session
+    else:
+        login = login_for_bearer(user["access_token"])
+        if login is None:
+            return user
+
+    try:
+        token, expires_at = await get_access_token_async(login)
+    except google_exceptions.GoogleAuthError:
+        raise HTTPException(status_code=401, detail="Session expired, log in again")
+    if login is session and token != session.get("access_token"):
+        # Reassigned, not mutated, so the session cookie is re-issued with the new token.
+        request.session["user"] = {**session, "access_token": token, "expires_at": expires_at}
+    return {"access_token": token}
@@ -0,0 +1,44 @@
+# core/sqlite.py
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+# database path -> (idle connections, [connections opened so far])
+_pools: Dict[str, Tuple["queue.Queue[sqlite3.Connection]", List[int]]] = {}
+_lock = threading.Lock()
+
+
+def open_db(path: Union[str, Path], timeout: float = 5.0) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # WAL lets readers proceed while another thread writes.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+@contextmanager
+def pooled(path: Union[str, Path], size: int, timeout: float = 5.0) -> Iterator[sqlite3.Connection]:
+    """
+    Borrows a connection from the pool for `path` (at most `size` are opened); commits on
+    success (a no-op after plain reads), rolls back on error.
+    """
+    key = str(path)
+    with _lock:
+        idle, created = _pools.setdefault(key, (queue.Queue(), [0]))
+    try:
+        conn = idle.get_nowait()
+    except queue.Empty:
+        with _lock:
+            grow = created[0] < size
+            if grow:
+                created[0] += 1
+        conn = open_db(path, timeout) if grow else idle.get()
+    try:
+        with conn:
+            yield conn
+    finally:
+        idle.put(conn)
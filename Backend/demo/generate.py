@@ -0,0 +1,110 @@
+"""
+Seeds the demo store with synthetic emails for load testing.
+
+    python -m demo.generate --count 1000000
+    DEMO_DB_PATH=/tmp/load.sqlite3 python -m demo.generate --count 5000000 --batch 20000
+"""
+import argparse
+import random
+import time
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List
+
+from demo.store import INSERT_SQL, _conn, _init_search_index, init_demo_store
+
+FIRST_NAMES = ["Sarah", "Ravi", "Priya", "Marco", "Lena", "Omar", "Yuki", "Nina", "Tom", "Aisha", "Diego", "Mei"]
+LAST_NAMES = ["Kim", "Patel", "Menon", "Rossi", "Novak", "Haddad", "Tanaka", "Berg", "Hughes", "Okafor", "Silva", "Chen"]
+COMPANIES = ["northwindlabs.com", "acme-payments.com", "talentbridge.io", "cloudmesh.io", "helpnest.com", "trustgrid.net"]
+TEAMS = ["Billing Desk", "Security Desk", "Support Queue", "Partnerships", "DevRel", "Recruiting"]
+TOPICS = ["onboarding rollout", "Q3 roadmap", "invoice INV-{n}", "access review", "webinar proposal", "sync failures",
+          "contract renewal", "candidate profile", "release notes", "budget approval", "incident postmortem"]
+SUBJECTS = ["Quick sync on {t}", "Re: {t}", "Reminder: {t}", "Action needed: {t}", "Update on {t}", "Question about {t}"]
+OPENERS = ["Hi team,", "Hello,", "Hi,", "Good morning,", "Hey there,"]
+SENTENCES = [
+    "Can we align on the timeline for {t} before Friday?",
+    "I have attached the latest numbers for {t}.",
+    "Please confirm the owner mapping for {t}.",
+    "Let us know if you need a revised copy of the {t} document.",
+    "We noticed a delay on {t} and would like to discuss next steps.",
+    "Could you review the draft for {t} and share feedback?",
+    "The deadline for {t} moved to next week.",
+    "Happy to schedule a call to walk through {t}.",
+]
+
+
+def synthetic_emails(count: int, start: float, prefix: str, seed: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    ts = start
+    for i in range(count):
+        ts -= rng.expovariate(1 / 60)
+        topic = rng.choice(TOPICS).format(n=rng.randint(1000, 9999))
+        if rng.random() < 0.3:
+            sender = f"{rng.choice(TEAMS)} <{rng.choice(['billing', 'security', 'support', 'team'])}@{rng.choice(COMPANIES)}>"
+            signoff = sender.split(" <")[0]
+        else:
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            sender = f"{first} {last} <{first.lower()}@{rng.choice(COMPANIES)}>"
+            signoff = first
+        sentences = [rng.choice(SENTENCES).format(t=topic) for _ in range(rng.randint(2, 6))]
+        body = f"{rng.choice(OPENERS)}\n\n{' '.join(sentences)}\n\nThanks,\n{signoff}"
+        yield {
+            "id": f"{prefix}-{i}",
+            "thread_id": f"{prefix}-t-{i // rng.randint(1, 4)}",
+            "from_email": sender,
+            "to_email": "you@demo.local",
+            "subject": rng.choice(SUBJECTS).format(t=topic),
+            "date": format_datetime(datetime.fromtimestamp(ts, tz=timezone.utc)),
+            "date_epoch": int(ts),
+            "snippet": sentences[0][:120],
+            "body": body,
+        }
+
+
+def generate(count: int, batch: int = 10000, prefix: str = "syn", seed: int = 7) -> int:
+    init_demo_store()
+    # Synthetic mail is older than everything already stored, so the seed emails stay on top.
+    with _conn() as conn:
+        oldest = conn.execute("SELECT MIN(date_epoch) AS m FROM demo_emails").fetchone()["m"]
+    start = (oldest or time.time()) - 60
+    # Indexing row by row through the FTS trigger is the slow part; rebuild the index once at the end instead.
+    with _conn() as conn:
+        conn.execute("DROP TRIGGER IF EXISTS demo_emails_fts_ai")
+    sql = INSERT_SQL.replace("INSERT INTO", "INSERT OR IGNORE INTO")
+    rows: List[Dict[str, Any]] = []
+    written = 0
+    for email in synthetic_emails(count, start, prefix, seed):
+        rows.append(email)
+        if len(rows) >= batch:
+            with _conn() as conn:
+                conn.executemany(sql, rows)
+            written += len(rows)
+            rows = []
+            print(f"{written}/{count}", flush=True)
+    if rows:
+        with _conn() as conn:
+            conn.executemany(sql, rows)
+        written += len(rows)
+
+    print("rebuilding search index", flush=True)
+    with _conn() as conn:
+        conn.execute("INSERT INTO demo_emails_fts (demo_emails_fts) VALUES ('rebuild')")
+        _init_search_index(conn)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed the demo store with synthetic emails.")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=10000)
+    parser.add_argument("--prefix", default="syn", help="id prefix; reruns with the same prefix are no-ops")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    started = time.time()
+    written = generate(args.count, batch=args.batch, prefix=args.prefix, seed=args.seed)
+    print(f"wrote {written} emails in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
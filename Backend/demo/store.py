@@ -1,9 +1,17 @@
+import os
 import sqlite3
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from core.fts import fts_query, hit_columns, init_search_index, marked_html
+from core.metrics import span
+from core.sqlite import pooled
 
-DB_PATH = Path(__file__).resolve().parent / "demo_emails.sqlite3"
+
+DB_PATH = Path(os.getenv("DEMO_DB_PATH", Path(__file__).resolve().parent / "demo_emails.sqlite3"))
+DEMO_DB_POOL_SIZE = max(1, int(os.getenv("DEMO_DB_POOL_SIZE", "8")))
 
 SEED_EMAILS = [
     {
@@ -39,10 +47,25 @@ SEED_EMAILS = [
 ]
 
 
-def _conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+@contextmanager
+def _conn() -> Iterator[sqlite3.Connection]:
+    with pooled(DB_PATH, DEMO_DB_POOL_SIZE) as conn:
+        yield conn
+
+
+def date_to_epoch(value: Optional[str]) -> int:
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError):
+        return 0
+
+
+INSERT_SQL = """
+    INSERT INTO demo_emails
+    (id, thread_id, from_email, to_email, subject, date, date_epoch, snippet, body)
+    VALUES
+    (:id, :thread_id, :from_email, :to_email, :subject, :date, :date_epoch, :snippet, :body)
+"""
 
 
 def init_demo_store() -> None:
@@ -56,24 +79,32 @@ def init_demo_store() -> None:
                 to_email TEXT,
                 subject TEXT,
                 date TEXT,
+                date_epoch INTEGER,
                 snippet TEXT,
                 body TEXT
             )
             """
         )
+        _migrate_date_epoch(conn)
+        conn.execute("CREATE INDEX IF NOT EXISTS demo_emails_recent ON demo_emails (date_epoch DESC, id DESC)")
+
+        init_search_index(conn, "demo_emails")
 
         count = conn.execute("SELECT COUNT(*) AS c FROM demo_emails").fetchone()["c"]
         if count == 0:
-            conn.executemany(
-                """
-                INSERT INTO demo_emails
-                (id, thread_id, from_email, to_email, subject, date, snippet, body)
-                VALUES
-                (:id, :thread_id, :from_email, :to_email, :subject, :date, :snippet, :body)
-                """,
-                SEED_EMAILS,
-            )
-        conn.commit()
+            conn.executemany(INSERT_SQL, [{**e, "date_epoch": date_to_epoch(e["date"])} for e in SEED_EMAILS])
+
+
+def _migrate_date_epoch(conn: sqlite3.Connection) -> None:
+    # Older stores only had the RFC 2822 date string, which does not sort chronologically.
+    columns = {r["name"] for r in conn.execute("PRAGMA table_info(demo_emails)")}
+    if "date_epoch" not in columns:
+        conn.execute("ALTER TABLE demo_emails ADD COLUMN date_epoch INTEGER")
+    rows = conn.execute("SELECT id, date FROM demo_emails WHERE date_epoch IS NULL").fetchall()
+    conn.executemany(
+        "UPDATE demo_emails SET date_epoch = ? WHERE id = ?",
+        [(date_to_epoch(r["date"]), r["id"]) for r in rows],
+    )
 
 
 def _as_summary(row: sqlite3.Row) -> Dict[str, Any]:
@@ -88,27 +119,65 @@ def _as_summary(row: sqlite3.Row) -> Dict[str, Any]:
     }
 
 
-def list_demo_messages(max_results: int = 5) -> Dict[str, Any]:
-    with _conn() as conn:
+def _page(columns: str, max_results: int, after: Optional[List[Any]]) -> Tuple[List[sqlite3.Row], Optional[List[Any]]]:
+    # Keyset pagination on (date_epoch, id): every page is one index range scan, however deep.
+    where = "WHERE (date_epoch, id) < (?, ?)" if after else ""
+    params: Tuple[Any, ...] = (after[0], after[1], max_results + 1) if after else (max_results + 1,)
+    with _conn() as conn, span("sqlite", "demo.page"):
         rows = conn.execute(
-            """
-            SELECT id FROM demo_emails
-            ORDER BY date DESC
+            f"""
+            SELECT {columns}, date_epoch FROM demo_emails
+            {where}
+            ORDER BY date_epoch DESC, id DESC
             LIMIT ?
             """,
-            (max_results,),
+            params,
         ).fetchall()
-    return {"resultSizeEstimate": len(rows), "messages": [{"id": r["id"]} for r in rows]}
+    if len(rows) <= max_results:
+        return rows, None
+    rows = rows[:max_results]
+    return rows, [rows[-1]["date_epoch"], rows[-1]["id"]]
+
+
+def list_demo_messages(max_results: int = 5, after: Optional[List[Any]] = None) -> Dict[str, Any]:
+    """
+    Page of message ids, newest first. next_key is the keyset position of the next page (None at the end).
+    """
+    rows, next_key = _page("id", max_results, after)
+    return {
+        "resultSizeEstimate": len(rows),
+        "messages": [{"id": r["id"]} for r in rows],
+        "next_key": next_key,
+    }
+
+
+def list_demo_summaries(max_results: int = 5, with_body: bool = False) -> List[Dict[str, Any]]:
+    """
+    Newest messages with their metadata (and optionally body) in one indexed query.
+    """
+    return list_demo_page(max_results, with_body=with_body)["emails"]
+
+
+def list_demo_page(max_results: int = 5, after: Optional[List[Any]] = None, with_body: bool = False) -> Dict[str, Any]:
+    columns = "*" if with_body else "id, thread_id, from_email, to_email, subject, date, snippet"
+    rows, next_key = _page(columns, max_results, after)
+    out = []
+    for row in rows:
+        summary = _as_summary(row)
+        if with_body:
+            summary["body"] = row["body"]
+        out.append(summary)
+    return {"emails": out, "next_key": next_key}
 
 
 def get_demo_message_metadata(message_id: str) -> Optional[Dict[str, Any]]:
-    with _conn() as conn:
+    with _conn() as conn, span("sqlite", "demo.get"):
         row = conn.execute("SELECT * FROM demo_emails WHERE id = ?", (message_id,)).fetchone()
     return _as_summary(row) if row else None
 
 
 def read_demo_message_with_body(message_id: str) -> Optional[Dict[str, Any]]:
-    with _conn() as conn:
+    with _conn() as conn, span("sqlite", "demo.get"):
         row = conn.execute("SELECT * FROM demo_emails WHERE id = ?", (message_id,)).fetchone()
     if not row:
         return None
@@ -116,3 +185,29 @@ def read_demo_message_with_body(message_id: str) -> Optional[Dict[str, Any]]:
     out["body"] = row["body"]
     return out
 
+
+def search_demo_messages(query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    match = fts_query(query)
+    if not match:
+        return []
+    with _conn() as conn, span("sqlite", "demo.search"):
+        rows = conn.execute(
+            f"""
+            SELECT e.*, {hit_columns("demo_emails_fts")}
+            FROM demo_emails_fts
+            JOIN demo_emails e ON e.rowid = demo_emails_fts.rowid
+            WHERE demo_emails_fts MATCH ?
+            ORDER BY score
+            LIMIT ?
+            """,
+            (match, limit),
+        ).fetchall()
+    return [_as_search_hit(r) for r in rows]
+
+
+def _as_search_hit(row: sqlite3.Row) -> Dict[str, Any]:
+    out = _as_summary(row)
+    out["subject_highlighted"] = marked_html(row["subject_hl"])
+    out["match_snippet"] = marked_html(row["match_snippet"])
+    out["score"] = round(-row["score"], 4)
+    return out
@@ -0,0 +1,48 @@
+"""
+Latency and error injection shared by the fake servers. Each fake reads its own prefix:
+
+    FAKE_GMAIL_LATENCY_MS=80 FAKE_GMAIL_JITTER_MS=40 FAKE_GMAIL_ERROR_RATE=0.02 uvicorn fakes.gmail:app --port 8001
+    FAKE_GROQ_LATENCY_MS=400 FAKE_GROQ_ERROR_RATE=0.05 uvicorn fakes.groq:app --port 8002
+"""
+import asyncio
+import os
+import random
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class Faults:
+    def __init__(self, prefix: str):
+        self.latency_ms = float(os.getenv(f"{prefix}_LATENCY_MS", "0"))
+        self.jitter_ms = float(os.getenv(f"{prefix}_JITTER_MS", "0"))
+        # Share of requests answered with an error instead of a result; half 429s, half 503s.
+        self.error_rate = float(os.getenv(f"{prefix}_ERROR_RATE", "0"))
+        self.rng = random.Random(os.getenv(f"{prefix}_SEED"))
+
+    def delay(self) -> float:
+        return max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def error_status(self) -> int:
+        if self.error_rate <= 0 or self.rng.random() >= self.error_rate:
+            return 0
+        return 429 if self.rng.random() < 0.5 else 503
+
+
+def error_body(status: int) -> Dict[str, Any]:
+    message = "Rate limit exceeded" if status == 429 else "Backend unavailable"
+    return {"error": {"code": status, "message": message, "status": "RESOURCE_EXHAUSTED" if status == 429 else "UNAVAILABLE"}}
+
+
+def install_faults(app: FastAPI, faults: Faults) -> None:
+    @app.middleware("http")
+    async def inject(request: Request, call_next):
+        delay = faults.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        status = faults.error_status()
+        if status:
+            headers = {"retry-after": "1"} if status == 429 else {}
+            return JSONResponse(error_body(status), status_code=status, headers=headers)
+        return await call_next(request)
@@ -0,0 +1,268 @@
+"""
+Local stand-in for the Gmail REST endpoints used by gmail/service.py, backed by the demo store.
+
+Run:
+    uvicorn fakes.gmail:app --port 8001
+
+Knobs (see fakes/faults.py for latency/errors):
+    FAKE_GMAIL_BODY_BYTES=200000   pad every message body to at least this size
+    FAKE_GMAIL_ERROR_RATE=0.05     also fails this share of the parts inside a batch response
+
+Responses follow Gmail's shape (transport headers, multipart/alternative bodies) and honour the
+`fields` partial-response parameter, so masked and unmasked calls can be compared.
+
+Then point the backend at it:
+    GMAIL_BASE=http://localhost:8001/gmail/v1/users/me
+    GMAIL_BATCH_URL=http://localhost:8001/batch/gmail/v1
+"""
+import base64
+import html
+from email.parser import BytesParser
+from email.utils import parsedate_to_datetime
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import uuid
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+
+from demo.store import _conn, init_demo_store, read_demo_message_with_body
+from fakes.faults import Faults, error_body, install_faults
+
+FAKE_GMAIL_BODY_BYTES = int(os.getenv("FAKE_GMAIL_BODY_BYTES", "0"))
+FILLER = (
+    "This paragraph pads the message to a realistic size for load tests. "
+    "It repeats the same sentences so compression and caching behave like long newsletters do. "
+)
+
+app = FastAPI()
+faults = Faults("FAKE_GMAIL")
+install_faults(app, faults)
+init_demo_store()
+
+# The demo store never changes, so the mailbox sits at one history id forever.
+HISTORY_ID = "1000"
+
+# Headers a delivered message typically carries besides From/To/Subject/Date.
+TRANSPORT_HEADERS = [
+    {"name": "Delivered-To", "value": "demo@constructure.ai"},
+    {"name": "Received", "value": "by 2002:a05:6a10:8e0f:b0:5a1:1c2e:7d44 with SMTP id z15csp2312591pxm; Mon, 1 Apr 2026 03:14:07 -0700 (PDT)"},
+    {"name": "X-Received", "value": "by 2002:a17:907:7da9:b0:a51:d2a4:8c01 with SMTP id oz41-20020a1709077da900b00a51d2a48c01mr10843118ejc.7.1711966447123; Mon, 01 Apr 2026 03:14:07 -0700 (PDT)"},
+    {"name": "ARC-Seal", "value": "i=1; a=rsa-sha256; t=1711966447; cv=none; d=google.com; s=arc-20160816; b=" + "Qm9vdHN0cmFwQVJDU2VhbA" * 16},
+    {"name": "ARC-Message-Signature", "value": "i=1; a=rsa-sha256; c=relaxed/relaxed; d=google.com; s=arc-20160816; h=to:subject:message-id:date:from:mime-version; bh=" + "QVJDTWVzc2FnZVNpZw" * 16},
+    {"name": "Return-Path", "value": "<bounce@mail.example.com>"},
+    {"name": "Received-SPF", "value": "pass (google.com: domain of bounce@mail.example.com designates 209.85.220.41 as permitted sender) client-ip=209.85.220.41;"},
+    {"name": "Authentication-Results", "value": "mx.google.com; dkim=pass header.i=@example.com header.s=s1 header.b=Abc123; spf=pass; dmarc=pass (p=NONE sp=NONE dis=NONE) header.from=example.com"},
+    {"name": "DKIM-Signature", "value": "v=1; a=rsa-sha256; c=relaxed/relaxed; d=example.com; s=s1; h=from:to:subject:date:message-id; bh=" + "REtJTUJvZHlIYXNo" * 20},
+    {"name": "MIME-Version", "value": "1.0"},
+    {"name": "Message-ID", "value": "<CAF=demo+message@mail.example.com>"},
+    {"name": "Content-Type", "value": 'multipart/alternative; boundary="000000000000a1b2c3d4e5f6"'},
+]
+
+
+def _b64url(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def gmail_resource(message_id: str, fmt: str = "full", metadata_headers: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    msg = read_demo_message_with_body(message_id)
+    if not msg:
+        return None
+
+    headers = TRANSPORT_HEADERS + [
+        {"name": "From", "value": msg["from"]},
+        {"name": "To", "value": msg["to"]},
+        {"name": "Subject", "value": msg["subject"]},
+        {"name": "Date", "value": msg["date"]},
+    ]
+    if fmt == "metadata" and metadata_headers:
+        headers = [h for h in headers if h["name"] in metadata_headers]
+
+    payload: Dict[str, Any] = {"partId": "", "mimeType": "multipart/alternative", "filename": "", "headers": headers}
+    if fmt == "full":
+        body = msg.get("body") or ""
+        if len(body) < FAKE_GMAIL_BODY_BYTES:
+            body += "\n\n" + FILLER * ((FAKE_GMAIL_BODY_BYTES - len(body)) // len(FILLER) + 1)
+        markup = "<div dir=\"ltr\">" + "<br>".join(html.escape(line) for line in body.split("\n")) + "</div>"
+        payload["body"] = {"size": 0}
+        payload["parts"] = [_text_part("0", "text/plain", body), _text_part("1", "text/html", markup)]
+
+    try:
+        internal_date = int(parsedate_to_datetime(msg["date"]).timestamp() * 1000)
+    except (TypeError, ValueError):
+        internal_date = 0
+
+    return {
+        "id": msg["id"],
+        "threadId": msg["threadId"],
+        "labelIds": ["INBOX", "UNREAD", "CATEGORY_UPDATES", "IMPORTANT"],
+        "snippet": msg["snippet"],
+        "payload": payload,
+        "sizeEstimate": 4096 + sum((p["body"]["size"] for p in payload.get("parts", [])), 0),
+        "historyId": HISTORY_ID,
+        "internalDate": str(internal_date),
+    }
+
+
+def _text_part(part_id: str, mime_type: str, text: str) -> Dict[str, Any]:
+    return {
+        "partId": part_id,
+        "mimeType": mime_type,
+        "filename": "",
+        "headers": [
+            {"name": "Content-Type", "value": f'{mime_type}; charset="UTF-8"'},
+            {"name": "Content-Transfer-Encoding", "value": "quoted-printable"},
+        ],
+        "body": {"size": len(text.encode("utf-8")), "data": _b64url(text)},
+    }
+
+
+def _parse_fields(spec: str, pos: int = 0) -> Tuple[Dict[str, Any], int]:
+    # "a,b/c,d(e,f)" -> {"a": {}, "b": {"c": {}}, "d": {"e": {}, "f": {}}}; {} keeps the whole value.
+    tree: Dict[str, Any] = {}
+    while pos < len(spec) and spec[pos] != ")":
+        start = pos
+        while pos < len(spec) and spec[pos] not in ",()":
+            pos += 1
+        node = tree
+        for name in spec[start:pos].strip().split("/"):
+            node = node.setdefault(name, {})
+        if pos < len(spec) and spec[pos] == "(":
+            selection, pos = _parse_fields(spec, pos + 1)
+            node.update(selection)
+            pos += 1
+        if pos < len(spec) and spec[pos] == ",":
+            pos += 1
+    return tree, pos
+
+
+def _select(data: Any, tree: Dict[str, Any]) -> Any:
+    if not tree:
+        return data
+    if isinstance(data, list):
+        return [_select(item, tree) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {name: _select(data[name], sub) for name, sub in tree.items() if name in data}
+
+
+def masked(data: Dict[str, Any], fields: Optional[str]) -> Dict[str, Any]:
+    """
+    Applies a Gmail `fields` partial-response mask; no mask returns the whole resource.
+    """
+    return _select(data, _parse_fields(fields)[0]) if fields else data
+
+
+def _not_found() -> Dict[str, Any]:
+    return {"error": {"code": 404, "message": "Requested entity was not found.", "status": "NOT_FOUND"}}
+
+
+@app.get("/gmail/v1/users/me/profile")
+def profile(fields: Optional[str] = None):
+    return masked({"emailAddress": "demo@constructure.ai", "messagesTotal": 0, "threadsTotal": 0, "historyId": HISTORY_ID}, fields)
+
+
+@app.get("/gmail/v1/users/me/history")
+def history(startHistoryId: str, fields: Optional[str] = None):
+    if int(startHistoryId) < int(HISTORY_ID):
+        return JSONResponse(_not_found(), status_code=404)
+    return masked({"historyId": HISTORY_ID}, fields)
+
+
+@app.get("/gmail/v1/users/me/messages")
+def messages_list(
+    maxResults: int = 100,
+    pageToken: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    # Page tokens are plain offsets; only the before:<epoch> search operator is understood.
+    offset = int(pageToken or 0)
+    before = int(q.split("before:", 1)[1].split()[0]) if q and "before:" in q else None
+    where, params = ("WHERE date_epoch < ?", [before]) if before is not None else ("", [])
+    with _conn() as conn:
+        rows = conn.execute(
+            f"SELECT id, thread_id FROM demo_emails {where} ORDER BY date_epoch DESC, id DESC LIMIT ? OFFSET ?",
+            (*params, maxResults + 1, offset),
+        ).fetchall()
+    out: Dict[str, Any] = {
+        "messages": [{"id": r["id"], "threadId": r["thread_id"]} for r in rows[:maxResults]],
+        "resultSizeEstimate": len(rows[:maxResults]),
+    }
+    if len(rows) > maxResults:
+        out["nextPageToken"] = str(offset + maxResults)
+    return masked(out, fields)
+
+
+@app.get("/gmail/v1/users/me/messages/{message_id}")
+def messages_get(
+    message_id: str,
+    format: str = "full",
+    metadataHeaders: List[str] = Query(None),
+    fields: Optional[str] = None,
+):
+    msg = gmail_resource(message_id, format, metadataHeaders)
+    if not msg:
+        return JSONResponse(_not_found(), status_code=404)
+    return masked(msg, fields)
+
+
+@app.delete("/gmail/v1/users/me/messages/{message_id}")
+def messages_delete(message_id: str):
+    # Nothing is removed: the demo store stays intact between load-test runs.
+    return Response(status_code=204)
+
+
+@app.post("/gmail/v1/users/me/messages/send")
+def messages_send():
+    return {"id": uuid.uuid4().hex[:16], "threadId": uuid.uuid4().hex[:16], "labelIds": ["SENT"]}
+
+
+def _answer_part(request_text: str) -> str:
+    request_line = request_text.replace("\r\n", "\n").split("\n", 1)[0].split()
+    status, data = 400, {"error": {"code": 400, "message": "Bad batch part"}}
+    part_error = faults.error_status()
+    if part_error:
+        status, data = part_error, error_body(part_error)
+    elif len(request_line) >= 2 and request_line[0] == "GET":
+        url = urlsplit(request_line[1])
+        query = parse_qs(url.query)
+        message_id = url.path.rstrip("/").rsplit("/", 1)[-1]
+        fmt = (query.get("format") or ["full"])[0]
+        msg = gmail_resource(message_id, fmt, query.get("metadataHeaders"))
+        status, data = (200, masked(msg, (query.get("fields") or [None])[0])) if msg else (404, _not_found())
+
+    body = json.dumps(data)
+    reasons = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 503: "Service Unavailable"}
+    reason = reasons.get(status, "Bad Request")
+    return (
+        f"HTTP/1.1 {status} {reason}\r\n"
+        "Content-Type: application/json; charset=UTF-8\r\n"
+        f"Content-Length: {len(body.encode('utf-8'))}\r\n\r\n"
+        f"{body}\r\n"
+    )
+
+
+@app.post("/batch/gmail/v1")
+async def batch(request: Request):
+    content_type = request.headers.get("content-type", "")
+    envelope = f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + await request.body()
+    parsed = BytesParser().parsebytes(envelope)
+    if not parsed.is_multipart():
+        raise HTTPException(status_code=400, detail="Expected multipart/mixed body")
+
+    boundary = f"batch_{uuid.uuid4().hex}"
+    chunks = []
+    for part in parsed.get_payload():
+        content_id = (part.get("Content-ID") or "").strip("<> ")
+        inner = (part.get_payload(decode=True) or b"").decode("utf-8", errors="replace")
+        chunks.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <response-{content_id}>\r\n\r\n"
+            f"{_answer_part(inner)}"
+        )
+    chunks.append(f"--{boundary}--\r\n")
+    return Response("".join(chunks), media_type=f"multipart/mixed; boundary={boundary}")
@@ -0,0 +1,109 @@
+"""
+Local stand-in for the OpenAI-compatible Groq chat endpoint used by ai/service.py.
+
+Run:
+    uvicorn fakes.groq:app --port 8002
+
+Then point the backend at it:
+    GROQ_BASE_URL=http://localhost:8002/openai/v1 GROQ_API_KEY=fake
+
+Knobs (see fakes/faults.py for latency/errors):
+    FAKE_GROQ_COMPLETION_WORDS=60   words per completion
+    FAKE_GROQ_TOKENS_PER_SECOND=0   if set, latency grows with completion length (and paces streams)
+"""
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from fakes.faults import Faults, install_faults
+
+FAKE_GROQ_COMPLETION_WORDS = max(1, int(os.getenv("FAKE_GROQ_COMPLETION_WORDS", "60")))
+FAKE_GROQ_TOKENS_PER_SECOND = float(os.getenv("FAKE_GROQ_TOKENS_PER_SECOND", "0"))
+WORDS = (
+    "the sender asks for a quick review of the attached update and a reply before friday "
+    "with any questions about timeline owners budget and next steps for the rollout"
+).split()
+
+app = FastAPI()
+install_faults(app, Faults("FAKE_GROQ"))
+
+
+def _text(max_tokens: int) -> str:
+    count = min(FAKE_GROQ_COMPLETION_WORDS, max(1, max_tokens))
+    return " ".join(WORDS[i % len(WORDS)] for i in range(count)).capitalize() + "."
+
+
+def _content(messages: List[Dict[str, Any]], max_tokens: int, json_output: bool) -> str:
+    if not json_output:
+        return _text(max_tokens)
+    # Answers the multi-email summary prompt: one entry per <email id="..."> section.
+    prompt = messages[-1].get("content") or ""
+    ids = re.findall(r'<email id="([^"]+)">', prompt)
+    per_email = max(8, max_tokens // max(1, len(ids)) - 10)
+    return json.dumps({"summaries": [{"id": i, "summary": _text(per_email)} for i in ids]})
+
+
+def _usage(messages: List[Dict[str, Any]], content: str) -> Dict[str, int]:
+    prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    messages = payload.get("messages") or []
+    max_tokens = int(payload.get("max_tokens") or 256)
+    json_output = (payload.get("response_format") or {}).get("type") == "json_object"
+    content = _content(messages, max_tokens, json_output)
+    usage = _usage(messages, content)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    model = payload.get("model") or "fake"
+
+    if payload.get("stream"):
+        return StreamingResponse(_stream(completion_id, created, model, content, usage), media_type="text/event-stream")
+
+    if FAKE_GROQ_TOKENS_PER_SECOND > 0:
+        await asyncio.sleep(usage["completion_tokens"] / FAKE_GROQ_TOKENS_PER_SECOND)
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": usage,
+    }
+
+
+async def _stream(completion_id: str, created: int, model: str, content: str, usage: Dict[str, int]):
+    def chunk(delta: Dict[str, Any], finish_reason=None, **extra: Any) -> str:
+        data = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            **extra,
+        }
+        return f"data: {json.dumps(data)}\n\n"
+
+    yield chunk({"role": "assistant", "content": ""})
+    for i, word in enumerate(content.split(" ")):
+        if FAKE_GROQ_TOKENS_PER_SECOND > 0:
+            await asyncio.sleep(1 / FAKE_GROQ_TOKENS_PER_SECOND)
+        yield chunk({"content": word if i == 0 else " " + word})
+    # Groq reports usage on the last chunk under x_groq.
+    yield chunk({}, "stop", x_groq={"id": completion_id, "usage": usage})
+    yield "data: [DONE]\n\n"
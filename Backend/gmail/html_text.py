@@ -0,0 +1,132 @@
+import re
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional
+
+# Tags that start a new line (or paragraph) in the text output.
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "center", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tbody", "thead", "tfoot",
+    "tr", "ul",
+}
+PARAGRAPH_TAGS = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "table", "ul", "ol", "pre"}
+CELL_TAGS = {"td", "th"}
+SKIP_TAGS = {"script", "style", "noscript", "template", "title"}
+
+# How much HTML is handed to the parser at a time; lets a char budget stop parsing early.
+FEED_CHUNK = 64 * 1024
+
+_WS = re.compile(r"\s+")
+
+
+class _BudgetReached(Exception):
+    pass
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self, max_chars: Optional[int]):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts: List[str] = []
+        self.length = 0
+        self.skip_depth = 0
+        self.pre_depth = 0
+        # Trailing newlines already emitted (0, 1 or 2); -1 before any text.
+        self.trailing_newlines = -1
+        self.pending_space = False
+
+    def _emit(self, text: str) -> None:
+        if self.max_chars is not None and self.length + len(text) >= self.max_chars:
+            text = text[: self.max_chars - self.length]
+            self.parts.append(text)
+            self.length += len(text)
+            raise _BudgetReached()
+        self.parts.append(text)
+        self.length += len(text)
+
+    def _break(self, newlines: int) -> None:
+        if self.trailing_newlines < 0:
+            return
+        self.pending_space = False
+        if newlines > self.trailing_newlines:
+            self._emit("\n" * (newlines - self.trailing_newlines))
+            self.trailing_newlines = newlines
+
+    def _line_break(self) -> None:
+        # Unlike block boundaries, consecutive <br>s add up (to one blank line at most).
+        if self.trailing_newlines < 0 or self.trailing_newlines >= 2:
+            return
+        self.pending_space = False
+        self._emit("\n")
+        self.trailing_newlines += 1
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag == "br":
+            self._line_break()
+        elif tag in PARAGRAPH_TAGS:
+            self._break(2)
+        elif tag in BLOCK_TAGS:
+            self._break(1)
+        elif tag in CELL_TAGS:
+            self.pending_space = True
+        if tag == "pre":
+            self.pre_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            if self.skip_depth:
+                self.skip_depth -= 1
+        elif tag in PARAGRAPH_TAGS:
+            self._break(2)
+        elif tag in BLOCK_TAGS:
+            self._break(1)
+        if tag == "pre" and self.pre_depth:
+            self.pre_depth -= 1
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.pre_depth:
+            if data:
+                self._emit(data)
+                self.trailing_newlines = min(2, len(data) - len(data.rstrip("\n")))
+            return
+
+        starts_with_space = data[:1].isspace()
+        text = _WS.sub(" ", data).strip()
+        if not text:
+            if data and self.trailing_newlines == 0:
+                self.pending_space = True
+            return
+        if self.trailing_newlines == 0 and (self.pending_space or starts_with_space):
+            text = " " + text
+        self.pending_space = data[-1:].isspace()
+        self._emit(text)
+        self.trailing_newlines = 0
+
+
+def html_to_text(html: str, max_chars: Optional[int] = None) -> str:
+    """
+    Single-pass HTML-to-text conversion on the stdlib parser.
+    Keeps paragraph and line breaks, drops script/style content, collapses whitespace,
+    and stops parsing once max_chars characters of text have been produced.
+    """
+    if not html:
+        return ""
+    return html_chunks_to_text((html[start:start + FEED_CHUNK] for start in range(0, len(html), FEED_CHUNK)), max_chars)
+
+
+def html_chunks_to_text(chunks: Iterable[str], max_chars: Optional[int] = None) -> str:
+    """
+    html_to_text over HTML arriving in pieces; chunks after the budget is reached are never pulled.
+    """
+    parser = _TextExtractor(max_chars)
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.close()
+    except _BudgetReached:
+        pass
+    return "".join(parser.parts).strip()
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Normalized message responses kept in memory, bounded by their encoded size.
+MESSAGE_CACHE_MAX_BYTES = int(os.getenv("MESSAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# How long browsers may reuse a message response without revalidating.
+MESSAGE_CACHE_MAX_AGE = int(os.getenv("MESSAGE_CACHE_MAX_AGE", "3600"))
+
+# (user, message id, kind) -> (encoded JSON, etag); kind is "meta" or "full".
+_entries: "OrderedDict[Tuple[str, str, str], Tuple[bytes, str]]" = OrderedDict()
+_lock = threading.Lock()
+_bytes = 0
+_stats = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0}
+
+
+def encode_message(msg: Dict[str, Any]) -> Tuple[bytes, str]:
+    """
+    JSON body and strong ETag for a message response; the ETag is a hash of the body.
+    """
+    content = json.dumps(msg, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return content, '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+
+
+def message_cache_get(user: str, message_id: str, kind: str) -> Optional[Tuple[bytes, str]]:
+    key = (user, message_id, kind)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        _entries.move_to_end(key)
+        _stats["hits"] += 1
+        return entry
+
+
+def message_cache_put(user: str, message_id: str, kind: str, msg: Dict[str, Any]) -> Tuple[bytes, str]:
+    global _bytes
+    entry = encode_message(msg)
+    size = len(entry[0])
+    if size > MESSAGE_CACHE_MAX_BYTES:
+        return entry
+    key = (user, message_id, kind)
+    with _lock:
+        old = _entries.pop(key, None)
+        if old is not None:
+            _bytes -= len(old[0])
+        _entries[key] = entry
+        _bytes += size
+        while _bytes > MESSAGE_CACHE_MAX_BYTES:
+            _, (content, _) = _entries.popitem(last=False)
+            _bytes -= len(content)
+            _stats["evictions"] += 1
+    return entry
+
+
+def message_cache_forget(user: str, message_id: str) -> None:
+    global _bytes
+    with _lock:
+        for kind in ("meta", "full"):
+            old = _entries.pop((user, message_id, kind), None)
+            if old is not None:
+                _bytes -= len(old[0])
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # Weak comparison, as If-None-Match requires; "*" matches any current representation.
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    matched = "*" in candidates or etag in [c[2:] if c.startswith("W/") else c for c in candidates]
+    if matched:
+        with _lock:
+            _stats["not_modified"] += 1
+    return matched
+
+
+def message_cache_stats() -> Dict[str, Any]:
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "items": len(_entries),
+            "bytes": _bytes,
+            "max_bytes": MESSAGE_CACHE_MAX_BYTES,
+            "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,494 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from auth.tokens import token_expires_at
+from core.fts import fts_query, hit_columns, init_search_index, marked_html
+from core.sqlite import pooled
+from gmail.service import (
+    batch_get_message_metadata_async,
+    extract_message_body,
+    fetch_gmail_profile_async,
+    get_message_full_async,
+    get_message_metadata_async,
+    list_history_async,
+    list_messages_async,
+    normalize_message_summary,
+)
+
+
+DB_PATH = Path(os.getenv("MAIL_MIRROR_PATH", Path(__file__).resolve().parent.parent / "demo" / "mail_mirror.sqlite3"))
+MIRROR_DB_POOL_SIZE = max(1, int(os.getenv("MIRROR_DB_POOL_SIZE", "8")))
+
+# Newest inbox messages kept per user, and how long a sync stays fresh.
+MIRROR_MAX_MESSAGES = int(os.getenv("MIRROR_MAX_MESSAGES", "500"))
+MIRROR_FRESH_SECONDS = float(os.getenv("MIRROR_FRESH_SECONDS", "30"))
+# How long a token's mailbox is trusted before Google is asked again (never past the token's expiry).
+MIRROR_USER_TTL_SECONDS = float(os.getenv("MIRROR_USER_TTL_SECONDS", "300"))
+MIRROR_USER_MAX_TOKENS = 10000
+
+# Gmail calls run on the event loop; SQLite work runs in worker threads on pooled connections.
+# access token -> (mailbox address, trusted until)
+_users_by_token: Dict[str, Tuple[str, float]] = {}
+# One sync per mailbox at a time; only touched from the event loop.
+_sync_locks: Dict[str, asyncio.Lock] = {}
+_lock = threading.Lock()
+_initialized = False
+
+
+@contextmanager
+def _pooled() -> Iterator[sqlite3.Connection]:
+    with pooled(DB_PATH, MIRROR_DB_POOL_SIZE) as conn:
+        yield conn
+
+
+@contextmanager
+def _conn() -> Iterator[sqlite3.Connection]:
+    if not _initialized:
+        init_mirror()
+    with _pooled() as conn:
+        yield conn
+
+
+def init_mirror() -> None:
+    global _initialized
+    with _pooled() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS mirror_messages (
+                user TEXT,
+                id TEXT,
+                thread_id TEXT,
+                from_email TEXT,
+                to_email TEXT,
+                subject TEXT,
+                date TEXT,
+                snippet TEXT,
+                body TEXT,
+                internal_date INTEGER,
+                in_inbox INTEGER,
+                PRIMARY KEY (user, id)
+            )
+            """
+        )
+        conn.execute("DROP INDEX IF EXISTS mirror_messages_recent")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS mirror_messages_page ON mirror_messages (user, in_inbox, internal_date DESC, id DESC)"
+        )
+        # One index over every user's mirrored mail; searches join back to filter by user.
+        init_search_index(conn, "mirror_messages")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS mirror_state (
+                user TEXT PRIMARY KEY,
+                history_id TEXT,
+                synced_at REAL
+            )
+            """
+        )
+    _initialized = True
+
+
+def _as_summary(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "threadId": row["thread_id"],
+        "from": row["from_email"],
+        "to": row["to_email"],
+        "subject": row["subject"],
+        "date": row["date"],
+        "snippet": row["snippet"],
+    }
+
+
+def _as_row(user: str, msg: Dict[str, Any], body: Optional[str] = None) -> Dict[str, Any]:
+    summary = normalize_message_summary(msg)
+    return {
+        "user": user,
+        "id": summary["id"],
+        "thread_id": summary["threadId"],
+        "from_email": summary["from"],
+        "to_email": summary["to"],
+        "subject": summary["subject"],
+        "date": summary["date"],
+        "snippet": summary["snippet"],
+        "body": body,
+        "internal_date": int(msg.get("internalDate") or 0),
+        "in_inbox": 1 if "INBOX" in (msg.get("labelIds") or []) else 0,
+    }
+
+
+def _store(conn: sqlite3.Connection, rows: List[Dict[str, Any]]) -> None:
+    # Metadata refreshes never drop a body fetched earlier.
+    conn.executemany(
+        """
+        INSERT INTO mirror_messages
+        (user, id, thread_id, from_email, to_email, subject, date, snippet, body, internal_date, in_inbox)
+        VALUES
+        (:user, :id, :thread_id, :from_email, :to_email, :subject, :date, :snippet, :body, :internal_date, :in_inbox)
+        ON CONFLICT (user, id) DO UPDATE SET
+            thread_id = excluded.thread_id,
+            from_email = excluded.from_email,
+            to_email = excluded.to_email,
+            subject = excluded.subject,
+            date = excluded.date,
+            snippet = excluded.snippet,
+            body = COALESCE(excluded.body, mirror_messages.body),
+            internal_date = excluded.internal_date,
+            in_inbox = excluded.in_inbox
+        """,
+        rows,
+    )
+
+
+def _trim(conn: sqlite3.Connection, user: str) -> None:
+    for in_inbox in (0, 1):
+        conn.execute(
+            """
+            DELETE FROM mirror_messages WHERE user = ? AND in_inbox = ? AND id IN (
+                SELECT id FROM mirror_messages WHERE user = ? AND in_inbox = ?
+                ORDER BY internal_date DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (user, in_inbox, user, in_inbox, MIRROR_MAX_MESSAGES),
+        )
+
+
+def _save_state(conn: sqlite3.Connection, user: str, history_id: str) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO mirror_state (user, history_id, synced_at) VALUES (?, ?, ?)",
+        (user, history_id, time.time()),
+    )
+
+
+async def mirror_user(access_token: str) -> Optional[str]:
+    """
+    Mailbox address behind an access token, or None if Google rejects the token.
+    Mirrored mail is served without asking Google, so the answer is only trusted for
+    MIRROR_USER_TTL_SECONDS (and never past the token's expiry); then the token is checked again.
+    """
+    now = time.time()
+    with _lock:
+        entry = _users_by_token.get(access_token)
+        if entry and entry[1] > now:
+            return entry[0]
+        _users_by_token.pop(access_token, None)
+
+    profile = await fetch_gmail_profile_async(access_token)
+    user = profile.get("emailAddress")
+    if not user:
+        return None
+    trusted_until = now + MIRROR_USER_TTL_SECONDS
+    expires_at = token_expires_at(access_token)
+    if expires_at is not None:
+        trusted_until = min(trusted_until, expires_at)
+    with _lock:
+        if len(_users_by_token) >= MIRROR_USER_MAX_TOKENS:
+            for token in [t for t, (_, until) in _users_by_token.items() if until <= now]:
+                del _users_by_token[token]
+            if len(_users_by_token) >= MIRROR_USER_MAX_TOKENS:
+                _users_by_token.clear()
+        _users_by_token[access_token] = (user, trusted_until)
+    return user
+
+
+def forget_mirror_user(access_token: str) -> None:
+    """
+    Stops serving mirrored mail to this token (on logout) until Google vouches for it again.
+    """
+    with _lock:
+        _users_by_token.pop(access_token, None)
+
+
+def _sync_lock(user: str) -> asyncio.Lock:
+    return _sync_locks.setdefault(user, asyncio.Lock())
+
+
+def _read_state(user: str) -> Optional[sqlite3.Row]:
+    with _conn() as conn:
+        return conn.execute("SELECT history_id, synced_at FROM mirror_state WHERE user = ?", (user,)).fetchone()
+
+
+def _replace_inbox(user: str, messages: List[Dict[str, Any]], history_id: str) -> None:
+    with _conn() as conn:
+        conn.execute("UPDATE mirror_messages SET in_inbox = 0 WHERE user = ?", (user,))
+        _store(conn, [_as_row(user, m) for m in messages])
+        _trim(conn, user)
+        _save_state(conn, user, history_id)
+
+
+def _apply_history(
+    user: str,
+    messages: List[Dict[str, Any]],
+    unlabeled: Set[str],
+    deleted: Set[str],
+    history_id: str,
+) -> None:
+    with _conn() as conn:
+        _store(conn, [_as_row(user, m) for m in messages])
+        conn.executemany("UPDATE mirror_messages SET in_inbox = 0 WHERE user = ? AND id = ?", [(user, mid) for mid in unlabeled])
+        conn.executemany("DELETE FROM mirror_messages WHERE user = ? AND id = ?", [(user, mid) for mid in deleted])
+        _trim(conn, user)
+        _save_state(conn, user, history_id)
+
+
+async def _full_sync(access_token: str, user: str) -> bool:
+    # Take the history id before listing so nothing that arrives meanwhile is missed.
+    history_id = (await fetch_gmail_profile_async(access_token)).get("historyId")
+    if not history_id:
+        return False
+
+    ids: List[str] = []
+    page_token = None
+    while len(ids) < MIRROR_MAX_MESSAGES:
+        data = await list_messages_async(
+            access_token, max_results=min(500, MIRROR_MAX_MESSAGES - len(ids)), page_token=page_token
+        )
+        if "error" in data:
+            return False
+        ids.extend(m["id"] for m in data.get("messages", []))
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            break
+
+    messages = [m for m in await batch_get_message_metadata_async(access_token, ids) if "error" not in m]
+    await asyncio.to_thread(_replace_inbox, user, messages, str(history_id))
+    return True
+
+
+async def _incremental_sync(access_token: str, user: str, start_history_id: str) -> Optional[bool]:
+    """
+    Applies inbox history since start_history_id. Returns None when the id has expired.
+    """
+    added: Set[str] = set()
+    deleted: Set[str] = set()
+    unlabeled: Set[str] = set()
+    history_id = start_history_id
+    page_token = None
+
+    while True:
+        data = await list_history_async(access_token, start_history_id, page_token=page_token)
+        if data.get("status_code") == 404:
+            return None
+        if "error" in data:
+            return False
+
+        for record in data.get("history", []) or []:
+            for item in record.get("messagesAdded", []) or []:
+                msg = item.get("message") or {}
+                if "INBOX" in (msg.get("labelIds") or []):
+                    added.add(msg["id"])
+                    deleted.discard(msg["id"])
+                    unlabeled.discard(msg["id"])
+            for item in record.get("labelsAdded", []) or []:
+                if "INBOX" in (item.get("labelIds") or []):
+                    mid = item["message"]["id"]
+                    added.add(mid)
+                    unlabeled.discard(mid)
+            for item in record.get("labelsRemoved", []) or []:
+                if "INBOX" in (item.get("labelIds") or []):
+                    mid = item["message"]["id"]
+                    unlabeled.add(mid)
+                    added.discard(mid)
+            for item in record.get("messagesDeleted", []) or []:
+                mid = item["message"]["id"]
+                deleted.add(mid)
+                added.discard(mid)
+                unlabeled.discard(mid)
+
+        history_id = data.get("historyId") or history_id
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            break
+
+    messages = [m for m in await batch_get_message_metadata_async(access_token, sorted(added)) if "error" not in m]
+    await asyncio.to_thread(_apply_history, user, messages, unlabeled, deleted, str(history_id))
+    return True
+
+
+async def sync_mailbox(access_token: str, force: bool = False) -> Optional[str]:
+    """
+    Brings the user's mirror up to date and returns the mailbox address, or None if Gmail failed.
+    Fresh mirrors are left alone; stale ones replay history.list; a full resync runs only
+    when there is no mirror yet or its history id has expired.
+    """
+    user = await mirror_user(access_token)
+    if not user:
+        return None
+
+    async with _sync_lock(user):
+        state = await asyncio.to_thread(_read_state, user)
+        if state and not force and time.time() - state["synced_at"] < MIRROR_FRESH_SECONDS:
+            return user
+
+        ok = None
+        if state and state["history_id"]:
+            ok = await _incremental_sync(access_token, user, state["history_id"])
+        if ok is None:
+            ok = await _full_sync(access_token, user)
+    return user if ok else None
+
+
+async def mirror_page(access_token: str, n: int, after: Optional[List[Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Page of inbox summaries from the mirror, newest first, after the (internal_date, id) key.
+
+    Returns {"emails", "next_key", "older_query"} or None when the mirror cannot answer.
+    next_key continues inside the mirror. When the mirror is exhausted but capped at
+    MIRROR_MAX_MESSAGES, older_query ({"q", "exclude"}) continues in Gmail instead.
+    """
+    if n > MIRROR_MAX_MESSAGES:
+        return None
+    user = await sync_mailbox(access_token)
+    if not user:
+        return None
+    return await asyncio.to_thread(_read_page, user, n, after)
+
+
+def _read_page(user: str, n: int, after: Optional[List[Any]]) -> Dict[str, Any]:
+    where = "AND (internal_date, id) < (?, ?)" if after else ""
+    params: tuple = (user, after[0], after[1], n + 1) if after else (user, n + 1)
+    with _conn() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT * FROM mirror_messages
+            WHERE user = ? AND in_inbox = 1 {where}
+            ORDER BY internal_date DESC, id DESC
+            LIMIT ?
+            """,
+            params,
+        ).fetchall()
+        if len(rows) > n:
+            rows = rows[:n]
+            return {
+                "emails": [_as_summary(r) for r in rows],
+                "next_key": [rows[-1]["internal_date"], rows[-1]["id"]],
+                "older_query": None,
+            }
+
+        total = conn.execute(
+            "SELECT COUNT(*) AS c FROM mirror_messages WHERE user = ? AND in_inbox = 1", (user,)
+        ).fetchone()["c"]
+        older_query = None
+        last_date = rows[-1]["internal_date"] if rows else (after[0] if after else None)
+        if total >= MIRROR_MAX_MESSAGES and last_date:
+            # Gmail's before: filter has one-second resolution; skip what the mirror already served.
+            second = last_date // 1000
+            same_second = conn.execute(
+                "SELECT id FROM mirror_messages WHERE user = ? AND internal_date >= ? AND internal_date < ?",
+                (user, second * 1000, (second + 1) * 1000),
+            ).fetchall()
+            older_query = {"q": f"before:{second + 1}", "exclude": [r["id"] for r in same_second]}
+
+    return {"emails": [_as_summary(r) for r in rows], "next_key": None, "older_query": older_query}
+
+
+def _read_message(user: str, message_id: str, with_body: bool) -> Optional[Dict[str, Any]]:
+    body_filter = " AND body IS NOT NULL" if with_body else ""
+    with _conn() as conn:
+        row = conn.execute(
+            f"SELECT * FROM mirror_messages WHERE user = ? AND id = ?{body_filter}", (user, message_id)
+        ).fetchone()
+    if not row:
+        return None
+    out = _as_summary(row)
+    if with_body:
+        out["body"] = row["body"]
+    return out
+
+
+def _store_message(user: str, msg: Dict[str, Any], body: Optional[str] = None) -> None:
+    with _conn() as conn:
+        _store(conn, [_as_row(user, msg, body)])
+
+
+async def mirror_message(access_token: str, message_id: str) -> Dict[str, Any]:
+    """
+    Message summary from the mirror, fetched and stored on a miss. Gmail errors are returned as-is.
+    """
+    user = await mirror_user(access_token)
+    if user:
+        row = await asyncio.to_thread(_read_message, user, message_id, False)
+        if row:
+            return row
+
+    msg = await get_message_metadata_async(access_token, message_id)
+    if "error" in msg:
+        return msg
+    if user:
+        await asyncio.to_thread(_store_message, user, msg)
+    return normalize_message_summary(msg)
+
+
+async def mirror_message_with_body(access_token: str, message_id: str) -> Dict[str, Any]:
+    """
+    Message summary plus body from the mirror, fetched and stored on a miss.
+    """
+    user = await mirror_user(access_token)
+    if user:
+        row = await asyncio.to_thread(_read_message, user, message_id, True)
+        if row:
+            return row
+
+    full_msg = await get_message_full_async(access_token, message_id)
+    if "error" in full_msg:
+        return full_msg
+    out = normalize_message_summary(full_msg)
+    out["body"] = extract_message_body(full_msg)
+    if user:
+        await asyncio.to_thread(_store_message, user, full_msg, out["body"])
+    return out
+
+
+async def search_mirror(access_token: str, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Ranked full-text search over the user's mirror, brought up to date first (a stale mirror is
+    searched as-is if Gmail fails). Covers the newest MIRROR_MAX_MESSAGES inbox messages by subject,
+    sender and snippet; bodies are indexed only for messages already opened.
+    """
+    match = fts_query(query)
+    if not match:
+        return []
+    user = await sync_mailbox(access_token) or await mirror_user(access_token)
+    if not user:
+        return []
+    return await asyncio.to_thread(_search, user, match, limit)
+
+
+def _search(user: str, match: str, limit: int) -> List[Dict[str, Any]]:
+    with _conn() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT m.*, {hit_columns("mirror_messages_fts")}
+            FROM mirror_messages_fts
+            JOIN mirror_messages m ON m.rowid = mirror_messages_fts.rowid
+            WHERE mirror_messages_fts MATCH ? AND m.user = ?
+            ORDER BY score
+            LIMIT ?
+            """,
+            (match, user, limit),
+        ).fetchall()
+    out = []
+    for row in rows:
+        hit = _as_summary(row)
+        hit["subject_highlighted"] = marked_html(row["subject_hl"])
+        hit["match_snippet"] = marked_html(row["match_snippet"])
+        hit["score"] = round(-row["score"], 4)
+        out.append(hit)
+    return out
+
+
+def _delete_message(user: str, message_id: str) -> None:
+    with _conn() as conn:
+        conn.execute("DELETE FROM mirror_messages WHERE user = ? AND id = ?", (user, message_id))
+
+
+async def mirror_forget(access_token: str, message_id: str) -> None:
+    user = await mirror_user(access_token)
+    if user:
+        await asyncio.to_thread(_delete_message, user, message_id)
@@ -1,24 +1,63 @@
+import json
 import re
-from fastapi import APIRouter, HTTPException, Header, Query
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
 
-from core.session import require_auth_header
-from ai.service import draft_reply, summarize_email
-from demo.store import list_demo_messages, get_demo_message_metadata, read_demo_message_with_body
+from core.cursor import decode_cursor, encode_cursor
+from core.loop import run_on_app_loop
+from core.session import require_auth_header, require_user
+from ai.service import (
+    iter_summaries_and_drafts_async,
+    stream_draft_reply,
+    summarize_and_draft_many_async,
+    summarize_many_async,
+)
+from demo.store import (
+    list_demo_messages,
+    list_demo_page,
+    list_demo_summaries,
+    get_demo_message_metadata,
+    read_demo_message_with_body,
+    search_demo_messages,
+)
 from gmail.service import (
-    fetch_gmail_profile,
-    list_messages,
-    get_message_metadata,
-    delete_message,
-    send_email,
-    normalize_message_summary,
-    fetch_last_email_summaries,
-    read_message_with_body,
-    fetch_last_with_ai_summaries,
+    fetch_gmail_profile_async,
+    list_messages_async,
+    delete_message_async,
+    send_email_async,
+    fetch_email_summaries_page_async,
+    fetch_last_with_ai_summaries_async,
+    batch_read_messages_with_body_async,
+)
+from gmail.message_cache import (
+    MESSAGE_CACHE_MAX_AGE,
+    encode_message,
+    etag_matches,
+    message_cache_forget,
+    message_cache_get,
+    message_cache_put,
 )
+from gmail.mirror import (
+    MIRROR_MAX_MESSAGES,
+    mirror_forget,
+    mirror_message,
+    mirror_message_with_body,
+    mirror_page,
+    mirror_user,
+    search_mirror,
+)
+from jobs.store import add_job_result, get_job, token_owner, update_job
+from jobs.worker import JobQueueFull, submit_job
 
 router = APIRouter(prefix="/gmail")
 VALID_MODES = {"demo", "real"}
+STREAM_FORMATS = {"ndjson", "sse"}
+# Job kind -> whether reply drafts are produced too.
+JOB_KINDS = {"last_with_summaries": False, "last_with_replies": True}
+JOB_MAX_EMAILS = 50
 
 
 def _resolve_mode(mode: str) -> str:
@@ -28,6 +67,13 @@ def _resolve_mode(mode: str) -> str:
     return value
 
 
+def _reply_subject(subject: str) -> str:
+    subject = subject or ""
+    if subject and not subject.lower().startswith("re:"):
+        subject = "Re: " + subject
+    return subject
+
+
 def _extract_to_email(value: str) -> str:
     if not value:
         return ""
@@ -35,22 +81,17 @@ def _extract_to_email(value: str) -> str:
     return m.group(1) if m else value.strip()
 
 
-def _demo_last(n: int):
-    data = list_demo_messages(max_results=n)
-    out = []
-    for item in data.get("messages", []):
-        msg = get_demo_message_metadata(item["id"])
-        if msg:
-            out.append(msg)
-    return out
-
-
 class SendEmailBody(BaseModel):
     to: EmailStr
     subject: str
     body: str
 
 
+class JobBody(BaseModel):
+    kind: str
+    n: int = 5
+
+
 class SendReplyBody(BaseModel):
     to_email: EmailStr
     subject: str
@@ -59,69 +100,116 @@ class SendReplyBody(BaseModel):
 
 
 @router.get("/profile")
-def gmail_profile(mode: str = Query("real"), authorization: str = Header(None)):
+async def gmail_profile(request: Request, mode: str = Query("real"), authorization: str = Header(None)):
     resolved_mode = _resolve_mode(mode)
     if resolved_mode == "demo":
         return {"emailAddress": "demo@constructure.ai", "source": "demo"}
-    user = require_auth_header(authorization)
-    return fetch_gmail_profile(user["access_token"])
+    user = await require_user(request, authorization)
+    return await fetch_gmail_profile_async(user["access_token"])
+
+
+def _next_cursor(mode: str, position: dict):
+    return encode_cursor(mode, position) if position else None
 
 
 @router.get("/messages")
-def gmail_messages(max_results: int = 5, mode: str = Query("real"), authorization: str = Header(None)):
+async def gmail_messages(
+    request: Request,
+    max_results: int = 5,
+    cursor: str = Query(None),
+    mode: str = Query("real"),
+    authorization: str = Header(None),
+):
     resolved_mode = _resolve_mode(mode)
+    position = decode_cursor(cursor, resolved_mode)
     if resolved_mode == "demo":
-        data = list_demo_messages(max_results=max_results)
+        data = await run_in_threadpool(list_demo_messages, max_results=max_results, after=position.get("k"))
+        next_position = {"k": data["next_key"]} if data["next_key"] else None
     else:
-        user = require_auth_header(authorization)
-        data = list_messages(user["access_token"], max_results=max_results)
+        user = await require_user(request, authorization)
+        data = await list_messages_async(user["access_token"], max_results=max_results, page_token=position.get("p"))
+        next_position = {"p": data["nextPageToken"]} if data.get("nextPageToken") else None
     return {
         "resultSizeEstimate": data.get("resultSizeEstimate", 0),
         "messages": data.get("messages", []),
+        "next_cursor": _next_cursor(resolved_mode, next_position),
     }
 
 
-@router.get("/message/{message_id}")
-def gmail_message(message_id: str, mode: str = Query("real"), authorization: str = Header(None)):
-    resolved_mode = _resolve_mode(mode)
-    if resolved_mode == "demo":
-        msg = get_demo_message_metadata(message_id)
-        if not msg:
-            raise HTTPException(status_code=404, detail="Demo message not found")
-        return msg
+async def _message_owner(mode: str, request: Request, authorization: str):
+    """
+    (cache owner, access_token); real-mode messages are cached per mailbox, not per token.
+    """
+    if mode == "demo":
+        return "demo", None
+    token = (await require_user(request, authorization))["access_token"]
+    return await mirror_user(token), token
 
-    user = require_auth_header(authorization)
-    msg = get_message_metadata(user["access_token"], message_id)
 
-    if "error" in msg:
-        raise HTTPException(status_code=400, detail=msg)
+def _message_response(entry, if_none_match: str) -> Response:
+    content, etag = entry
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={MESSAGE_CACHE_MAX_AGE}"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type="application/json", headers=headers)
 
-    return normalize_message_summary(msg)
+
+@router.get("/message/{message_id}")
+async def gmail_message(
+    request: Request,
+    message_id: str,
+    mode: str = Query("real"),
+    authorization: str = Header(None),
+    if_none_match: str = Header(None),
+):
+    resolved_mode = _resolve_mode(mode)
+    owner, token = await _message_owner(resolved_mode, request, authorization)
+    entry = message_cache_get(owner, message_id, "meta") if owner else None
+    if entry is None:
+        if resolved_mode == "demo":
+            msg = await run_in_threadpool(get_demo_message_metadata, message_id)
+            if not msg:
+                raise HTTPException(status_code=404, detail="Demo message not found")
+        else:
+            msg = await mirror_message(token, message_id)
+            if "error" in msg:
+                raise HTTPException(status_code=400, detail=msg)
+        entry = message_cache_put(owner, message_id, "meta", msg) if owner else encode_message(msg)
+
+    return _message_response(entry, if_none_match)
 
 
 @router.delete("/message/{message_id}")
-def gmail_delete(message_id: str, mode: str = Query("real"), authorization: str = Header(None)):
+async def gmail_delete(request: Request, message_id: str, mode: str = Query("real"), authorization: str = Header(None)):
     resolved_mode = _resolve_mode(mode)
     if resolved_mode == "demo":
         return {"status": "disabled_in_demo_mode", "id": message_id}
 
-    user = require_auth_header(authorization)
-    result = delete_message(user["access_token"], message_id)
+    user = await require_user(request, authorization)
+    result = await delete_message_async(user["access_token"], message_id)
 
     if result.get("error"):
         raise HTTPException(status_code=400, detail=result)
 
+    await _forget_message(user["access_token"], message_id)
     return result
 
 
+async def _forget_message(access_token: str, message_id: str) -> None:
+    await mirror_forget(access_token, message_id)
+    owner = await mirror_user(access_token)
+    if owner:
+        message_cache_forget(owner, message_id)
+
+
 @router.post("/send")
-def gmail_send(payload: SendEmailBody, mode: str = Query("real"), authorization: str = Header(None)):
+async def gmail_send(request: Request, payload: SendEmailBody, mode: str = Query("real"), authorization: str = Header(None)):
     resolved_mode = _resolve_mode(mode)
     if resolved_mode == "demo":
         return {"status": "disabled_in_demo_mode"}
 
-    user = require_auth_header(authorization)
-    result = send_email(
+    user = await require_user(request, authorization)
+    result = await send_email_async(
         user["access_token"],
         to=payload.to,
         subject=payload.subject,
@@ -139,116 +227,331 @@ def gmail_send(payload: SendEmailBody, mode: str = Query("real"), authorization:
     }
 
 
+async def _real_last_page(access_token: str, n: int, position: dict):
+    """
+    Mirror keyset pages first ({"k"}), then Gmail pages ({"p", "q"}) once the mirror runs out.
+    The first page falls back to Gmail when the mirror cannot answer; later mirror pages do not,
+    since Gmail's first page would repeat what the client has already seen.
+    """
+    if "p" not in position and "q" not in position:
+        after = position.get("k")
+        page = await mirror_page(access_token, min(n, MIRROR_MAX_MESSAGES) if after else n, after=after)
+        if page is not None:
+            if page["next_key"]:
+                return page["emails"], {"k": page["next_key"]}
+            older = page["older_query"]
+            return page["emails"], {"q": older["q"], "x": older["exclude"]} if older else None
+        if after:
+            raise HTTPException(
+                status_code=503,
+                detail="Mailbox mirror unavailable, retry with the same cursor",
+                headers={"Retry-After": "5"},
+            )
+
+    data = await fetch_email_summaries_page_async(
+        access_token,
+        max_results=n,
+        page_token=position.get("p"),
+        query=position.get("q"),
+    )
+    exclude = set(position.get("x") or [])
+    emails = [e for e in data["emails"] if e["id"] not in exclude]
+    if not data["nextPageToken"]:
+        return emails, None
+    return emails, {"p": data["nextPageToken"], "q": position.get("q")}
+
+
 @router.get("/last")
-def gmail_last(n: int = 5, mode: str = Query("real"), authorization: str = Header(None)):
+async def gmail_last(request: Request, n: int = 5, cursor: str = Query(None), mode: str = Query("real"), authorization: str = Header(None)):
     resolved_mode = _resolve_mode(mode)
+    position = decode_cursor(cursor, resolved_mode)
     if resolved_mode == "demo":
-        return {"emails": _demo_last(n)}
-    user = require_auth_header(authorization)
-    return {"emails": fetch_last_email_summaries(user["access_token"], max_results=n)}
+        page = await run_in_threadpool(list_demo_page, max_results=n, after=position.get("k"))
+        next_position = {"k": page["next_key"]} if page["next_key"] else None
+        return {"emails": page["emails"], "next_cursor": _next_cursor(resolved_mode, next_position)}
+
+    user = await require_user(request, authorization)
+    emails, next_position = await _real_last_page(user["access_token"], n, position)
+    return {"emails": emails, "next_cursor": _next_cursor(resolved_mode, next_position)}
+
+
+@router.get("/search")
+async def gmail_search(request: Request, q: str, n: int = 20, mode: str = Query("real"), authorization: str = Header(None)):
+    resolved_mode = _resolve_mode(mode)
+    limit = max(1, min(n, 100))
+    if resolved_mode == "demo":
+        return {"query": q, "emails": await run_in_threadpool(search_demo_messages, q, limit=limit)}
+    user = await require_user(request, authorization)
+    return {"query": q, "emails": await search_mirror(user["access_token"], q, limit=limit)}
 
 
 @router.get("/message/{message_id}/full")
-def gmail_message_full(message_id: str, mode: str = Query("real"), authorization: str = Header(None)):
+async def gmail_message_full(
+    request: Request,
+    message_id: str,
+    mode: str = Query("real"),
+    authorization: str = Header(None),
+    if_none_match: str = Header(None),
+):
+    resolved_mode = _resolve_mode(mode)
+    owner, token = await _message_owner(resolved_mode, request, authorization)
+    entry = message_cache_get(owner, message_id, "full") if owner else None
+    if entry is None:
+        if resolved_mode == "demo":
+            msg = await run_in_threadpool(read_demo_message_with_body, message_id)
+            if not msg:
+                raise HTTPException(status_code=404, detail="Demo message not found")
+        else:
+            msg = await mirror_message_with_body(token, message_id)
+            if "error" in msg:
+                raise HTTPException(status_code=400, detail=msg)
+        entry = message_cache_put(owner, message_id, "full", msg) if owner else encode_message(msg)
+
+    return _message_response(entry, if_none_match)
+
+
+@router.get("/message/{message_id}/reply_draft")
+async def gmail_reply_draft(request: Request, message_id: str, mode: str = Query("real"), authorization: str = Header(None)):
+    """
+    Streams a reply draft over SSE: "token" events ({"text"}) as the model writes, then a "done" event
+    holding {"to_email", "subject", "body"} ready for POST /gmail/send_reply, or an "error" event.
+    """
     resolved_mode = _resolve_mode(mode)
     if resolved_mode == "demo":
-        msg = read_demo_message_with_body(message_id)
+        msg = await run_in_threadpool(read_demo_message_with_body, message_id)
         if not msg:
             raise HTTPException(status_code=404, detail="Demo message not found")
-        return msg
+    else:
+        user = await require_user(request, authorization)
+        msg = await mirror_message_with_body(user["access_token"], message_id)
+        if "error" in msg:
+            raise HTTPException(status_code=400, detail=msg)
+
+    async def events():
+        pieces = []
+        stream = stream_draft_reply(msg.get("from") or "", msg.get("subject") or "", msg.get("body") or "")
+        try:
+            async for piece in stream:
+                pieces.append(piece)
+                yield f"event: token\ndata: {json.dumps({'text': piece})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': 'llm_failed', 'detail': str(e)})}\n\n"
+            return
+        finally:
+            # A client that disconnects mid-draft must not keep holding an LLM slot.
+            await stream.aclose()
+        draft = {
+            "to_email": _extract_to_email(msg.get("from") or ""),
+            "subject": _reply_subject(msg.get("subject") or ""),
+            "body": "".join(pieces).strip(),
+        }
+        yield f"event: done\ndata: {json.dumps(draft)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
-    user = require_auth_header(authorization)
-    msg = read_message_with_body(user["access_token"], message_id)
+def _demo_bodies(n: int):
+    return list(enumerate(list_demo_summaries(max_results=n, with_body=True), start=1))
 
-    if "error" in msg:
-        raise HTTPException(status_code=400, detail=msg)
 
-    return msg
+async def _real_bodies_async(access_token: str, n: int):
+    base = await list_messages_async(access_token, max_results=n)
+    ids = [m["id"] for m in base.get("messages", [])]
+    return _indexed(await batch_read_messages_with_body_async(access_token, ids))
+
+
+def _indexed(messages):
+    return [(idx, msg) for idx, msg in enumerate(messages, start=1) if "error" not in msg]
+
+
+def _email_record(idx: int, msg: dict, with_replies: bool) -> dict:
+    record = {
+        "index": idx,
+        "id": msg["id"],
+        "from": msg.get("from"),
+        "subject": msg.get("subject"),
+    }
+    if with_replies:
+        record["to_email"] = _extract_to_email(msg.get("from") or "")
+    return record
+
+
+def _resolve_stream_format(value: str) -> str:
+    value = (value or "ndjson").strip().lower()
+    if value not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be ndjson or sse")
+    return value
+
+
+async def _summary_owner(access_token: Optional[str]) -> Optional[str]:
+    # Near-duplicate summaries are only reused within one mailbox; demo mail is the same for everyone.
+    return "demo" if access_token is None else await mirror_user(access_token)
+
+
+def _stream_emails(indexed, owner: Optional[str], with_replies: bool, stream_format: str) -> StreamingResponse:
+    """
+    Streams one record per email as soon as its summary (and draft) are ready, in completion order.
+    """
+
+    async def records():
+        messages = [msg for _, msg in indexed]
+        async for pos, fields in iter_summaries_and_drafts_async(messages, owner, with_replies=with_replies):
+            idx, msg = indexed[pos]
+            record = {**_email_record(idx, msg, with_replies), **fields}
+            if stream_format == "sse":
+                yield f"event: email\ndata: {json.dumps(record)}\n\n"
+            else:
+                yield json.dumps(record) + "\n"
+        if stream_format == "sse":
+            yield "event: done\ndata: {}\n\n"
+
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        records(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/last_with_summaries")
-def gmail_last_with_summaries(n: int = 5, mode: str = Query("real"), authorization: str = Header(None)):
+async def gmail_last_with_summaries(
+    request: Request,
+    n: int = 5,
+    mode: str = Query("real"),
+    stream: bool = False,
+    stream_format: str = Query("ndjson", alias="format"),
+    authorization: str = Header(None),
+):
     resolved_mode = _resolve_mode(mode)
+    if stream:
+        stream_format = _resolve_stream_format(stream_format)
+        if resolved_mode == "demo":
+            return _stream_emails(await run_in_threadpool(_demo_bodies, n), "demo", False, stream_format)
+        token = (await require_user(request, authorization))["access_token"]
+        indexed = await _real_bodies_async(token, n)
+        return _stream_emails(indexed, await _summary_owner(token), False, stream_format)
+
     if resolved_mode == "demo":
+        indexed = await run_in_threadpool(_demo_bodies, n)
+        summaries = await summarize_many_async([full_msg.get("body", "") for _, full_msg in indexed], "demo")
         results = []
-        for idx, msg in enumerate(_demo_last(n), start=1):
-            full_msg = read_demo_message_with_body(msg["id"])
-            if not full_msg:
-                continue
-            results.append(
-                {
-                    "index": idx,
-                    "id": full_msg["id"],
-                    "from": full_msg.get("from"),
-                    "subject": full_msg.get("subject"),
-                    "ai_summary": summarize_email(full_msg.get("body", "")),
-                }
-            )
+        for (idx, full_msg), summary in zip(indexed, summaries):
+            results.append({**_email_record(idx, full_msg, False), "ai_summary": summary})
         return {"emails": results}
 
-    user = require_auth_header(authorization)
-    return {"emails": fetch_last_with_ai_summaries(user["access_token"], max_results=n)}
+    token = (await require_user(request, authorization))["access_token"]
+    return {"emails": await fetch_last_with_ai_summaries_async(token, await _summary_owner(token), max_results=n)}
 
 
 @router.get("/last_with_replies")
-def gmail_last_with_replies(n: int = 5, mode: str = Query("real"), authorization: str = Header(None)):
+async def gmail_last_with_replies(
+    request: Request,
+    n: int = 5,
+    mode: str = Query("real"),
+    stream: bool = False,
+    stream_format: str = Query("ndjson", alias="format"),
+    authorization: str = Header(None),
+):
     resolved_mode = _resolve_mode(mode)
-    results = []
+    token = None if resolved_mode == "demo" else (await require_user(request, authorization))["access_token"]
+    if token is None:
+        indexed = await run_in_threadpool(_demo_bodies, n)
+    else:
+        indexed = await _real_bodies_async(token, n)
+    owner = await _summary_owner(token)
 
-    if resolved_mode == "demo":
-        messages = _demo_last(n)
-        for idx, msg in enumerate(messages, start=1):
-            full_msg = read_demo_message_with_body(msg["id"])
-            if not full_msg:
-                continue
-            body = full_msg.get("body") or ""
-            summary = summarize_email(body)
-            reply = draft_reply(full_msg.get("from") or "", full_msg.get("subject") or "", body)
-            results.append(
-                {
-                    "index": idx,
-                    "id": full_msg["id"],
-                    "from": full_msg.get("from"),
-                    "to_email": _extract_to_email(full_msg.get("from") or ""),
-                    "subject": full_msg.get("subject"),
-                    "ai_summary": summary,
-                    "ai_reply_draft": reply,
-                }
-            )
-        return {"emails": results}
+    if stream:
+        return _stream_emails(indexed, owner, True, _resolve_stream_format(stream_format))
 
-    user = require_auth_header(authorization)
-    base = list_messages(user["access_token"], max_results=n)
-    ids = [m["id"] for m in base.get("messages", [])]
+    drafts = await summarize_and_draft_many_async([msg for _, msg in indexed], owner)
+    results = []
+    for (idx, msg), (summary, reply) in zip(indexed, drafts):
+        results.append({**_email_record(idx, msg, True), "ai_summary": summary, "ai_reply_draft": reply})
 
-    for idx, mid in enumerate(ids, start=1):
-        msg = read_message_with_body(user["access_token"], mid)
-        if "error" in msg:
-            continue
+    return {"emails": results}
 
-        summary = summarize_email(msg["body"])
-        reply = draft_reply(msg.get("from") or "", msg.get("subject") or "", msg["body"])
 
-        results.append({
-            "index": idx,
-            "id": msg["id"],
-            "from": msg.get("from"),
-            "to_email": _extract_to_email(msg.get("from") or ""),
-            "subject": msg.get("subject"),
-            "ai_summary": summary,
-            "ai_reply_draft": reply
-        })
+def _job_owner(mode: str, authorization: str) -> str:
+    """
+    Owner of a job; real-mode jobs belong to a hash of the bearer token, which stays the same
+    when the session's access token is refreshed.
+    """
+    if mode == "demo":
+        return "demo"
+    return token_owner(require_auth_header(authorization)["access_token"])
 
-    return {"emails": results}
+
+async def _run_email_job(job_id: str, access_token: str, n: int, with_replies: bool) -> None:
+    # Runs on the app loop (submitted from a job worker thread); the job store stays off it.
+    if access_token is None:
+        indexed = await run_in_threadpool(_demo_bodies, n)
+    else:
+        indexed = await _real_bodies_async(access_token, n)
+    await run_in_threadpool(update_job, job_id, total=len(indexed))
+    messages = [msg for _, msg in indexed]
+    owner = await _summary_owner(access_token)
+    async for pos, fields in iter_summaries_and_drafts_async(messages, owner, with_replies=with_replies):
+        idx, msg = indexed[pos]
+        await run_in_threadpool(add_job_result, job_id, idx, {**_email_record(idx, msg, with_replies), **fields})
+
+
+@router.post("/jobs", status_code=202)
+async def gmail_submit_job(request: Request, payload: JobBody, mode: str = Query("real"), authorization: str = Header(None)):
+    """
+    Queues a last_with_summaries / last_with_replies run and returns its id; poll GET /gmail/jobs/{id}.
+    """
+    resolved_mode = _resolve_mode(mode)
+    if payload.kind not in JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(JOB_KINDS)}")
+    owner = _job_owner(resolved_mode, authorization)
+    token = None if resolved_mode == "demo" else (await require_user(request, authorization))["access_token"]
+    n = max(1, min(payload.n, JOB_MAX_EMAILS))
+    with_replies = JOB_KINDS[payload.kind]
+
+    try:
+        job_id = await run_in_threadpool(
+            submit_job,
+            payload.kind,
+            owner,
+            {"n": n, "mode": resolved_mode},
+            lambda job_id: run_on_app_loop(_run_email_job(job_id, token, n, with_replies)),
+        )
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Job queue is full, retry later")
+
+    return {"job_id": job_id, "status": "queued", "status_url": f"/gmail/jobs/{job_id}?mode={resolved_mode}"}
+
+
+@router.get("/jobs/{job_id}")
+async def gmail_job(job_id: str, mode: str = Query("real"), authorization: str = Header(None)):
+    owner = _job_owner(_resolve_mode(mode), authorization)
+    job = await run_in_threadpool(get_job, job_id)
+    if not job or job["owner"] != owner:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "total": job["total"],
+        "completed": job["completed"],
+        "error": job["error"],
+        "emails": job["results"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
 
 
 @router.post("/send_reply")
-def gmail_send_reply(payload: SendReplyBody, mode: str = Query("real"), authorization: str = Header(None)):
+async def gmail_send_reply(request: Request, payload: SendReplyBody, mode: str = Query("real"), authorization: str = Header(None)):
     resolved_mode = _resolve_mode(mode)
     if resolved_mode == "demo":
         return {"status": "disabled_in_demo_mode"}
 
-    user = require_auth_header(authorization)
+    user = await require_user(request, authorization)
 
     if not payload.confirm:
         return {
@@ -258,11 +561,9 @@ def gmail_send_reply(payload: SendReplyBody, mode: str = Query("real"), authoriz
             "subject": payload.subject,
         }
 
-    subject = payload.subject or ""
-    if subject and not subject.lower().startswith("re:"):
-        subject = "Re: " + subject
+    subject = _reply_subject(payload.subject)
 
-    result = send_email(
+    result = await send_email_async(
         user["access_token"],
         to=payload.to_email,
         subject=subject,
@@ -1,50 +1,121 @@
+import asyncio
 import base64
+import codecs
 from email.mime.text import MIMEText
-import re
-from typing import Any, Dict, List, Optional, Tuple
-from ai.service import summarize_email
+from email.parser import BytesParser
+import json
+import os
+import uuid
+import weakref
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+from ai.service import summarize_many_async
 
 
-import requests
+import httpx
 
+from core.http import get_async_http_client
+from core.metrics import GMAIL_RESPONSE_BYTES, span
+from gmail.html_text import html_chunks_to_text, html_to_text
 
-GMAIL_BASE = "https://www.googleapis.com/gmail/v1/users/me"
 
+GMAIL_BASE = os.getenv("GMAIL_BASE", "https://www.googleapis.com/gmail/v1/users/me")
+GMAIL_BATCH_URL = os.getenv("GMAIL_BATCH_URL", "https://gmail.googleapis.com/batch/gmail/v1")
 
-def _headers(access_token: str) -> Dict[str, str]:
-    return {"Authorization": f"Bearer {access_token}"}
+# Gmail accepts up to 100 calls per batch but recommends 50 to avoid rate limiting.
+GMAIL_BATCH_SIZE = min(100, max(1, int(os.getenv("GMAIL_BATCH_SIZE", "50"))))
 
+# Partial-response masks: each call asks Gmail only for the fields its callers read.
+GMAIL_FIELD_MASKS = os.getenv("GMAIL_FIELD_MASKS", "true").lower() in ("1", "true", "yes")
+# MIME nesting covered by the full-message mask; deeper parts are not returned.
+GMAIL_MIME_DEPTH = max(1, int(os.getenv("GMAIL_MIME_DEPTH", "6")))
 
-def fetch_gmail_profile(access_token: str) -> Dict[str, Any]:
-    r = requests.get(f"{GMAIL_BASE}/profile", headers=_headers(access_token))
-    return r.json()
 
+def _parts_fields(depth: int) -> str:
+    # Body extraction only walks mimeType, filename, body data and sub-parts.
+    nested = f",parts({_parts_fields(depth - 1)})" if depth > 1 else ""
+    return f"mimeType,filename,body(data,attachmentId){nested}"
 
-def list_messages(access_token: str, max_results: int = 10) -> Dict[str, Any]:
-    # labelIds=INBOX ensures inbox only. q can be added later.
-    params = {"maxResults": max_results, "labelIds": "INBOX"}
-    r = requests.get(f"{GMAIL_BASE}/messages", headers=_headers(access_token), params=params)
-    return r.json()
 
+LIST_FIELDS = "messages(id,threadId),nextPageToken,resultSizeEstimate"
+HISTORY_FIELDS = (
+    "history(messagesAdded/message(id,labelIds),messagesDeleted/message/id,"
+    "labelsAdded(message/id,labelIds),labelsRemoved(message/id,labelIds)),historyId,nextPageToken"
+)
+MESSAGE_FIELDS = "id,threadId,labelIds,snippet,internalDate"
+METADATA_FIELDS = f"{MESSAGE_FIELDS},payload/headers"
+FULL_FIELDS = f"{MESSAGE_FIELDS},payload(headers,{_parts_fields(GMAIL_MIME_DEPTH)})"
 
-def get_message_metadata(access_token: str, message_id: str) -> Dict[str, Any]:
-    params = {
+
+def _masked(params: Dict[str, Any], fields: str) -> Dict[str, Any]:
+    return {**params, "fields": fields} if GMAIL_FIELD_MASKS else params
+
+
+METADATA_PARAMS = _masked(
+    {
         "format": "metadata",
         "metadataHeaders": ["From", "To", "Subject", "Date"],
+    },
+    METADATA_FIELDS,
+)
+FULL_PARAMS = _masked({"format": "full"}, FULL_FIELDS)
+
+# Text kept from an HTML-only body; conversion stops parsing once it is reached.
+HTML_TEXT_MAX_CHARS = int(os.getenv("HTML_TEXT_MAX_CHARS", "50000"))
+# Text kept from a text/plain body; decoding stops once it is reached.
+PLAIN_TEXT_MAX_CHARS = int(os.getenv("PLAIN_TEXT_MAX_CHARS", "200000"))
+# Base64 characters decoded at a time (a multiple of 4), so a body is never decoded whole.
+B64_DECODE_CHUNK = 64 * 1024
+
+# Max Gmail requests a single user may have in flight at once (across requests).
+GMAIL_FETCH_CONCURRENCY = max(1, int(os.getenv("GMAIL_FETCH_CONCURRENCY", "10")))
+
+# One semaphore per access token; entries disappear once no fetch holds them.
+_user_async_slots: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+
+
+def _headers(access_token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+async def _gmail_async(op: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+    # Every Gmail call goes through here so each one is timed under its operation name.
+    with span("gmail", op):
+        r = await get_async_http_client().request(method, url, **kwargs)
+    GMAIL_RESPONSE_BYTES.inc(len(r.content), op)
+    return r
+
+
+def _list_params(max_results: int, page_token: Optional[str], query: Optional[str]) -> Dict[str, Any]:
+    # labelIds=INBOX ensures inbox only.
+    params: Dict[str, Any] = {"maxResults": max_results, "labelIds": "INBOX"}
+    if page_token:
+        params["pageToken"] = page_token
+    if query:
+        params["q"] = query
+    return _masked(params, LIST_FIELDS)
+
+
+def _history_params(start_history_id: str, page_token: Optional[str]) -> Dict[str, Any]:
+    params: Dict[str, Any] = {
+        "startHistoryId": start_history_id,
+        "labelId": "INBOX",
+        "historyTypes": ["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"],
+        "maxResults": 500,
     }
-    r = requests.get(
-        f"{GMAIL_BASE}/messages/{message_id}",
-        headers=_headers(access_token),
-        params=params,
-    )
-    return r.json()
+    if page_token:
+        params["pageToken"] = page_token
+    return _masked(params, HISTORY_FIELDS)
 
 
-def delete_message(access_token: str, message_id: str) -> Dict[str, Any]:
-    r = requests.delete(
-        f"{GMAIL_BASE}/messages/{message_id}",
-        headers=_headers(access_token),
-    )
+def _history_result(r: httpx.Response) -> Dict[str, Any]:
+    data = r.json()
+    if r.status_code != 200:
+        return {"error": data.get("error", data), "status_code": r.status_code}
+    return data
+
+
+def _delete_result(r: httpx.Response, message_id: str) -> Dict[str, Any]:
     # Gmail delete returns empty body on success
     if r.status_code in (200, 204):
         return {"status": "deleted", "id": message_id}
@@ -54,20 +125,13 @@ def delete_message(access_token: str, message_id: str) -> Dict[str, Any]:
         return {"error": "delete_failed", "status_code": r.status_code, "text": r.text}
 
 
-def send_email(access_token: str, to: str, subject: str, body: str) -> Dict[str, Any]:
+def _send_payload(to: str, subject: str, body: str) -> Dict[str, Any]:
     msg = MIMEText(body)
     msg["to"] = to
     msg["subject"] = subject
 
     raw = base64.urlsafe_b64encode(msg.as_bytes()).decode("utf-8")
-
-    payload = {"raw": raw}
-    r = requests.post(
-        f"{GMAIL_BASE}/messages/send",
-        headers={**_headers(access_token), "Content-Type": "application/json"},
-        json=payload,
-    )
-    return r.json()
+    return {"raw": raw}
 
 
 def extract_headers(msg: Dict[str, Any]) -> Dict[str, str]:
@@ -94,120 +158,174 @@ def normalize_message_summary(msg: Dict[str, Any]) -> Dict[str, Any]:
         "snippet": msg.get("snippet"),
     }
 
-def fetch_last_email_summaries(access_token: str, max_results: int = 5):
-    data = list_messages(access_token, max_results=max_results)
-    ids = [m["id"] for m in data.get("messages", [])]
-
-    summaries = []
-    for mid in ids:
-        msg = get_message_metadata(access_token, mid)
-        if "error" in msg:
-            continue
-        summaries.append(normalize_message_summary(msg))
+def _summaries_page(listing: Dict[str, Any], metadata: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summaries = [normalize_message_summary(msg) for msg in metadata if "error" not in msg]
+    return {"emails": summaries, "nextPageToken": listing.get("nextPageToken")}
 
-    return summaries
 
-def _b64url_decode(data: str) -> str:
-    # Gmail uses base64url without padding
-    if not data:
-        return ""
-    padding = "=" * (-len(data) % 4)
-    decoded = base64.urlsafe_b64decode((data + padding).encode("utf-8"))
-    return decoded.decode("utf-8", errors="replace")
+def _iter_b64url_text(data: str) -> Iterator[str]:
+    # Gmail uses base64url without padding; decodes (as UTF-8) a chunk at a time.
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for start in range(0, len(data), B64_DECODE_CHUNK):
+        piece = data[start:start + B64_DECODE_CHUNK]
+        piece += "=" * (-len(piece) % 4)
+        yield decoder.decode(base64.urlsafe_b64decode(piece.encode("ascii")))
+    yield decoder.decode(b"", final=True)
 
 
-def get_message_full(access_token: str, message_id: str) -> Dict[str, Any]:
-    params = {"format": "full"}
-    r = requests.get(
-        f"{GMAIL_BASE}/messages/{message_id}",
-        headers=_headers(access_token),
-        params=params,
-    )
-    return r.json()
+def _decode_text(data: str, max_chars: int) -> str:
+    parts: List[str] = []
+    length = 0
+    for text in _iter_b64url_text(data):
+        parts.append(text)
+        length += len(text)
+        if length >= max_chars:
+            break
+    return "".join(parts)[:max_chars]
 
 
-def _walk_parts(payload: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+def _text_parts(payload: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
     """
-    Returns (text_plain, text_html) from a Gmail payload by walking MIME parts.
+    Encoded body data of the first inline text/plain and text/html parts, walking the MIME tree
+    in order without decoding anything. Attachments (named parts, or bodies Gmail serves
+    separately) are skipped.
     """
-    mime_type = payload.get("mimeType")
-    body = (payload.get("body") or {}).get("data")
-
     text_plain = None
     text_html = None
-
-    if mime_type == "text/plain" and body:
-        text_plain = _b64url_decode(body)
-        return text_plain, None
-
-    if mime_type == "text/html" and body:
-        text_html = _b64url_decode(body)
-        return None, text_html
-
-    # multipart/*
-    for part in payload.get("parts", []) or []:
-        p_plain, p_html = _walk_parts(part)
-
-        if p_plain and not text_plain:
-            text_plain = p_plain
-        if p_html and not text_html:
-            text_html = p_html
-
-        if text_plain and text_html:
-            break
+    stack = [payload]
+    while stack and not (text_plain and text_html):
+        part = stack.pop()
+        body = part.get("body") or {}
+        if part.get("filename") or body.get("attachmentId"):
+            continue
+        mime_type = part.get("mimeType")
+        if mime_type == "text/plain" and body.get("data") and not text_plain:
+            text_plain = body["data"]
+        elif mime_type == "text/html" and body.get("data") and not text_html:
+            text_html = body["data"]
+        stack.extend(reversed(part.get("parts") or []))
 
     return text_plain, text_html
 
 
-def strip_html(html: str) -> str:
-    # Very basic HTML-to-text (good enough for MVP). We'll improve later if needed.
-    if not html:
-        return ""
-    html = re.sub(r"(?is)<(script|style).*?>.*?</\1>", " ", html)
-    html = re.sub(r"(?is)<br\s*/?>", "\n", html)
-    html = re.sub(r"(?is)</p>", "\n", html)
-    html = re.sub(r"(?is)<.*?>", " ", html)
-    html = re.sub(r"[ \t]+", " ", html)
-    html = re.sub(r"\n\s+\n", "\n\n", html)
-    return html.strip()
+def strip_html(html: str, max_chars: Optional[int] = HTML_TEXT_MAX_CHARS) -> str:
+    return html_to_text(html, max_chars=max_chars)
 
 
 def extract_message_body(full_message: Dict[str, Any]) -> str:
+    """
+    Body text of a Gmail message: the first text/plain part, else the first text/html part as text.
+    Only the chosen part is decoded, incrementally and up to its character budget.
+    """
     payload = full_message.get("payload") or {}
-    text_plain, text_html = _walk_parts(payload)
+    text_plain, text_html = _text_parts(payload)
 
-    if text_plain and text_plain.strip():
-        return text_plain.strip()
+    if text_plain:
+        text = _decode_text(text_plain, PLAIN_TEXT_MAX_CHARS).strip()
+        if text:
+            return text
 
-    if text_html and text_html.strip():
-        return strip_html(text_html)
+    if text_html:
+        text = html_chunks_to_text(_iter_b64url_text(text_html), HTML_TEXT_MAX_CHARS)
+        if text:
+            return text
 
     # fallback: sometimes body isn't in payload, but snippet exists
     return (full_message.get("snippet") or "").strip()
 
 
-def read_message_with_body(access_token: str, message_id: str) -> Dict[str, Any]:
-    full_msg = get_message_full(access_token, message_id)
-    if "error" in full_msg:
-        return full_msg
+def _batch_part(index: int, message_id: str, params: Dict[str, Any]) -> str:
+    path = urlsplit(GMAIL_BASE).path
+    return (
+        "Content-Type: application/http\r\n"
+        f"Content-ID: <item-{index}>\r\n\r\n"
+        f"GET {path}/messages/{message_id}?{urlencode(params, doseq=True)}\r\n"
+        "Accept: application/json\r\n\r\n"
+    )
 
-    summary = normalize_message_summary(full_msg)
-    summary["body"] = extract_message_body(full_msg)
-    return summary
 
-def fetch_last_with_ai_summaries(access_token: str, max_results: int = 5):
-    data = list_messages(access_token, max_results=max_results)
-    ids = [m["id"] for m in data.get("messages", [])]
+def build_batch_body(message_ids: List[str], params: Dict[str, Any], boundary: str) -> str:
+    parts = [f"--{boundary}\r\n{_batch_part(i, mid, params)}" for i, mid in enumerate(message_ids)]
+    return "".join(parts) + f"--{boundary}--\r\n"
 
-    output = []
 
-    for mid in ids:
-        msg = read_message_with_body(access_token, mid)
-        if "error" in msg:
+def _parse_http_part(text: str) -> Tuple[int, Dict[str, Any]]:
+    # A batch part is a full HTTP response: status line, headers, blank line, JSON body.
+    text = text.replace("\r\n", "\n")
+    head, _, body = text.partition("\n\n")
+    status_line = head.split("\n", 1)[0].split()
+    status = int(status_line[1]) if len(status_line) > 1 and status_line[1].isdigit() else 0
+    try:
+        data = json.loads(body) if body.strip() else {}
+    except ValueError:
+        data = {"error": "invalid_batch_part", "text": body[:200]}
+    if status != 200 and "error" not in data:
+        data = {"error": data or "batch_part_failed", "status_code": status}
+    return status, data
+
+
+def parse_batch_response(content_type: str, content: bytes) -> Dict[int, Tuple[int, Dict[str, Any]]]:
+    """
+    Splits a multipart/mixed batch reply into {item index: (status, json body)}.
+    """
+    envelope = f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + content
+    parsed = BytesParser().parsebytes(envelope)
+    out: Dict[int, Tuple[int, Dict[str, Any]]] = {}
+    if not parsed.is_multipart():
+        return out
+
+    for part in parsed.get_payload():
+        content_id = (part.get("Content-ID") or "").strip("<> ")
+        _, _, index = content_id.rpartition("item-")
+        if not index.isdigit():
             continue
+        payload = part.get_payload(decode=True) or b""
+        out[int(index)] = _parse_http_part(payload.decode("utf-8", errors="replace"))
+    return out
+
+
+def _batch_request(access_token: str, message_ids: List[str], params: Dict[str, Any]) -> Dict[str, Any]:
+    boundary = f"batch_{uuid.uuid4().hex}"
+    return {
+        "headers": {**_headers(access_token), "Content-Type": f"multipart/mixed; boundary={boundary}"},
+        "content": build_batch_body(message_ids, params, boundary).encode("utf-8"),
+    }
+
+
+def _batch_outcome(r: httpx.Response, message_ids: List[str]) -> List[Tuple[int, Dict[str, Any]]]:
+    # (status, body) per message, in order.
+    if r.status_code != 200:
+        try:
+            err = r.json()
+        except ValueError:
+            err = {"error": "batch_failed", "status_code": r.status_code, "text": r.text}
+        return [(0, err) for _ in message_ids]
+
+    parts = parse_batch_response(r.headers.get("Content-Type", ""), r.content)
+    return [parts.get(i, (0, {"error": "missing_batch_part", "id": mid})) for i, mid in enumerate(message_ids)]
+
+
+def _should_retry(status: int) -> bool:
+    # Throttled or failed parts are retried once as plain requests.
+    return status == 429 or status >= 500
+
+
+def _with_bodies(full_messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    out = []
+    for full_msg in full_messages:
+        if "error" in full_msg:
+            out.append(full_msg)
+            continue
+        summary = normalize_message_summary(full_msg)
+        summary["body"] = extract_message_body(full_msg)
+        out.append(summary)
+    return out
+
 
-        summary = summarize_email(msg["body"])
+def _summary_records(messages: List[Dict[str, Any]], summaries: List[str]) -> List[Dict[str, Any]]:
+    output = []
 
+    for msg, summary in zip(messages, summaries):
         output.append({
             "id": msg["id"],
             "from": msg["from"],
@@ -217,28 +335,157 @@ def fetch_last_with_ai_summaries(access_token: str, max_results: int = 5):
 
     return output
 
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request as GoogleRequest
-from core.config import GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, SCOPES
 
-def refresh_access_token_if_needed(user_session: dict) -> str:
+def _async_slots_for(access_token: str) -> asyncio.Semaphore:
+    # Event-loop only, so no lock; caps one user's in-flight Gmail calls.
+    slots = _user_async_slots.get(access_token)
+    if slots is None:
+        slots = asyncio.Semaphore(GMAIL_FETCH_CONCURRENCY)
+        _user_async_slots[access_token] = slots
+    return slots
+
+
+async def fetch_gmail_profile_async(access_token: str) -> Dict[str, Any]:
+    r = await _gmail_async("profile", "GET", f"{GMAIL_BASE}/profile", headers=_headers(access_token))
+    return r.json()
+
+
+async def list_history_async(
+    access_token: str,
+    start_history_id: str,
+    page_token: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Refreshes access token using refresh_token if expired.
-    Updates user_session in-place.
-    Returns a valid access token.
+    Inbox changes since start_history_id. Gmail answers 404 once that id has expired;
+    that comes back as {"error": ..., "status_code": 404}.
     """
-    creds = Credentials(
-        token=user_session.get("access_token"),
-        refresh_token=user_session.get("refresh_token"),
-        token_uri="https://oauth2.googleapis.com/token",
-        client_id=GOOGLE_CLIENT_ID,
-        client_secret=GOOGLE_CLIENT_SECRET,
-        scopes=SCOPES,
+    r = await _gmail_async(
+        "history.list",
+        "GET",
+        f"{GMAIL_BASE}/history",
+        headers=_headers(access_token),
+        params=_history_params(start_history_id, page_token),
+    )
+    return _history_result(r)
+
+
+async def list_messages_async(
+    access_token: str,
+    max_results: int = 10,
+    page_token: Optional[str] = None,
+    query: Optional[str] = None,
+) -> Dict[str, Any]:
+    params = _list_params(max_results, page_token, query)
+    r = await _gmail_async("messages.list", "GET", f"{GMAIL_BASE}/messages", headers=_headers(access_token), params=params)
+    return r.json()
+
+
+async def delete_message_async(access_token: str, message_id: str) -> Dict[str, Any]:
+    r = await _gmail_async(
+        "messages.delete",
+        "DELETE",
+        f"{GMAIL_BASE}/messages/{message_id}",
+        headers=_headers(access_token),
     )
+    return _delete_result(r, message_id)
 
-    # If Google marks it expired, refresh it
-    if creds.expired and creds.refresh_token:
-        creds.refresh(GoogleRequest())
-        user_session["access_token"] = creds.token
 
-    return user_session.get("access_token")
+async def send_email_async(access_token: str, to: str, subject: str, body: str) -> Dict[str, Any]:
+    r = await _gmail_async(
+        "messages.send",
+        "POST",
+        f"{GMAIL_BASE}/messages/send",
+        headers={**_headers(access_token), "Content-Type": "application/json"},
+        json=_send_payload(to, subject, body),
+    )
+    return r.json()
+
+
+async def _get_message_async(access_token: str, message_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        r = await _gmail_async(
+            "messages.get",
+            "GET",
+            f"{GMAIL_BASE}/messages/{message_id}",
+            headers=_headers(access_token),
+            params=params,
+        )
+        return r.json()
+    except (httpx.HTTPError, ValueError) as e:
+        return {"error": "fetch_failed", "id": message_id, "detail": str(e)}
+
+
+async def _batch_chunk_async(access_token: str, message_ids: List[str], params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    slots = _async_slots_for(access_token)
+    try:
+        async with slots:
+            r = await _gmail_async("batch", "POST", GMAIL_BATCH_URL, **_batch_request(access_token, message_ids, params))
+    except httpx.HTTPError as e:
+        return [{"error": "fetch_failed", "id": mid, "detail": str(e)} for mid in message_ids]
+
+    async def settle(mid: str, status: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        if not _should_retry(status):
+            return data
+        async with slots:
+            return await _get_message_async(access_token, mid, params)
+
+    outcome = _batch_outcome(r, message_ids)
+    return list(await asyncio.gather(*(settle(mid, st, data) for mid, (st, data) in zip(message_ids, outcome))))
+
+
+async def batch_get_messages_async(
+    access_token: str,
+    message_ids: List[str],
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    """
+    Fetches many messages.get resources through Gmail's batch endpoint.
+    Chunks of GMAIL_BATCH_SIZE run concurrently; results keep the order of message_ids.
+    """
+    chunks = [message_ids[i:i + GMAIL_BATCH_SIZE] for i in range(0, len(message_ids), GMAIL_BATCH_SIZE)]
+    results = await asyncio.gather(*(_batch_chunk_async(access_token, chunk, params) for chunk in chunks))
+    return [msg for chunk in results for msg in chunk]
+
+
+async def get_message_metadata_async(access_token: str, message_id: str) -> Dict[str, Any]:
+    async with _async_slots_for(access_token):
+        return await _get_message_async(access_token, message_id, METADATA_PARAMS)
+
+
+async def get_message_full_async(access_token: str, message_id: str) -> Dict[str, Any]:
+    async with _async_slots_for(access_token):
+        return await _get_message_async(access_token, message_id, FULL_PARAMS)
+
+
+async def batch_get_message_metadata_async(access_token: str, message_ids: List[str]) -> List[Dict[str, Any]]:
+    return await batch_get_messages_async(access_token, message_ids, METADATA_PARAMS)
+
+
+async def batch_read_messages_with_body_async(access_token: str, message_ids: List[str]) -> List[Dict[str, Any]]:
+    return _with_bodies(await batch_get_messages_async(access_token, message_ids, FULL_PARAMS))
+
+
+async def fetch_email_summaries_page_async(
+    access_token: str,
+    max_results: int = 5,
+    page_token: Optional[str] = None,
+    query: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    One page of inbox summaries plus Gmail's nextPageToken (None on the last page).
+    """
+    data = await list_messages_async(access_token, max_results=max_results, page_token=page_token, query=query)
+    ids = [m["id"] for m in data.get("messages", [])]
+    return _summaries_page(data, await batch_get_message_metadata_async(access_token, ids))
+
+
+async def fetch_last_with_ai_summaries_async(
+    access_token: str,
+    owner: Optional[str],
+    max_results: int = 5,
+) -> List[Dict[str, Any]]:
+    data = await list_messages_async(access_token, max_results=max_results)
+    ids = [m["id"] for m in data.get("messages", [])]
+    messages = [msg for msg in await batch_read_messages_with_body_async(access_token, ids) if "error" not in msg]
+    summaries = await summarize_many_async([msg["body"] for msg in messages], owner)
+    return _summary_records(messages, summaries)
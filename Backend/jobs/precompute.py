@@ -0,0 +1,103 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from ai.service import background_priority, draft_reply_async, summarize_email_async
+from core.loop import run_on_app_loop
+from gmail.mirror import mirror_user
+from gmail.service import batch_read_messages_with_body_async, list_messages_async
+from jobs.store import token_owner
+
+
+# Warm-up after login: newest N inbox emails get their summary and reply draft cached ahead of the dashboard.
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "true").lower() in ("1", "true", "yes")
+PRECOMPUTE_EMAILS = max(0, int(os.getenv("PRECOMPUTE_EMAILS", "10")))
+PRECOMPUTE_WORKERS = max(1, int(os.getenv("PRECOMPUTE_WORKERS", "1")))
+
+_pool = ThreadPoolExecutor(max_workers=PRECOMPUTE_WORKERS, thread_name_prefix="precompute")
+# owner -> cancel flag of that user's current pass; at most one pass per user.
+_active: Dict[str, threading.Event] = {}
+_lock = threading.Lock()
+_stats = {"started": 0, "finished": 0, "cancelled": 0, "failed": 0, "emails_warmed": 0}
+
+
+def _bump(name: str, amount: int = 1) -> None:
+    with _lock:
+        _stats[name] += amount
+
+
+def start_precompute(access_token: str) -> bool:
+    """
+    Queues a low-priority warm-up pass for this user, replacing any pass still running.
+    """
+    if not PRECOMPUTE_ENABLED or PRECOMPUTE_EMAILS == 0 or not access_token:
+        return False
+    owner = token_owner(access_token)
+    cancel = threading.Event()
+    with _lock:
+        previous = _active.get(owner)
+        if previous is not None:
+            previous.set()
+        _active[owner] = cancel
+        _stats["started"] += 1
+    _pool.submit(_precompute, owner, access_token, cancel)
+    return True
+
+
+def cancel_precompute(access_token: str) -> bool:
+    with _lock:
+        cancel = _active.pop(token_owner(access_token), None)
+    if cancel is None:
+        return False
+    cancel.set()
+    return True
+
+
+def _precompute(owner: str, access_token: str, cancel: threading.Event) -> None:
+    try:
+        if cancel.is_set():
+            return
+        run_on_app_loop(_warm(access_token, cancel))
+        _bump("cancelled" if cancel.is_set() else "finished")
+    except Exception:
+        _bump("failed")
+    finally:
+        with _lock:
+            if _active.get(owner) is cancel:
+                del _active[owner]
+
+
+async def _warm(access_token: str, cancel: threading.Event) -> None:
+    # Same fetch and call inputs as /gmail/last_with_replies, so its cache keys match.
+    data = await list_messages_async(access_token, max_results=PRECOMPUTE_EMAILS)
+    ids = [m["id"] for m in data.get("messages", [])]
+    # Same owner the request path uses, so warmed summaries count as this mailbox's history.
+    mailbox = await mirror_user(access_token)
+    with background_priority():
+        for msg in await batch_read_messages_with_body_async(access_token, ids):
+            if cancel.is_set():
+                break
+            if "error" in msg:
+                continue
+            body = msg.get("body") or ""
+            await summarize_email_async(body, mailbox)
+            if cancel.is_set():
+                break
+            await draft_reply_async(msg.get("from") or "", msg.get("subject") or "", body)
+            _bump("emails_warmed")
+
+
+def precompute_stats() -> Dict[str, Any]:
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+        out["active"] = len(_active)
+    return out
+
+
+def shutdown_precompute() -> None:
+    with _lock:
+        for cancel in _active.values():
+            cancel.set()
+        _active.clear()
+    _pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from core.sqlite import pooled
+
+
+DB_PATH = Path(os.getenv("JOBS_DB_PATH", Path(__file__).resolve().parent.parent / "demo" / "jobs.sqlite3"))
+JOBS_DB_POOL_SIZE = max(1, int(os.getenv("JOBS_DB_POOL_SIZE", "4")))
+
+# Finished jobs (and their results) are kept this long for polling.
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+ACTIVE_STATUSES = ("queued", "running")
+
+_initialized = False
+
+
+@contextmanager
+def _pooled() -> Iterator[sqlite3.Connection]:
+    with pooled(DB_PATH, JOBS_DB_POOL_SIZE, timeout=10) as conn:
+        yield conn
+
+
+@contextmanager
+def _conn() -> Iterator[sqlite3.Connection]:
+    if not _initialized:
+        init_jobs_store()
+    with _pooled() as conn:
+        yield conn
+
+
+def init_jobs_store() -> None:
+    global _initialized
+    with _pooled() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT,
+                owner TEXT,
+                params TEXT,
+                status TEXT,
+                total INTEGER,
+                completed INTEGER DEFAULT 0,
+                error TEXT,
+                created_at REAL,
+                updated_at REAL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT,
+                position INTEGER,
+                record TEXT,
+                PRIMARY KEY (job_id, position)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_updated ON jobs (updated_at)")
+        # Work from a previous process is gone; report it instead of leaving it "running" forever.
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'interrupted', updated_at = ? WHERE status IN (?, ?)",
+            (time.time(), *ACTIVE_STATUSES),
+        )
+    _initialized = True
+
+
+def token_owner(access_token: str) -> str:
+    # Stable owner id for a bearer token, so the token itself is never stored.
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+
+def create_job(kind: str, owner: str, params: Dict[str, Any]) -> str:
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with _conn() as conn:
+        _purge(conn, now)
+        conn.execute(
+            """
+            INSERT INTO jobs (id, kind, owner, params, status, created_at, updated_at)
+            VALUES (?, ?, ?, ?, 'queued', ?, ?)
+            """,
+            (job_id, kind, owner, json.dumps(params), now, now),
+        )
+    return job_id
+
+
+def _purge(conn: sqlite3.Connection, now: float) -> None:
+    cutoff = now - JOB_TTL_SECONDS
+    conn.execute(
+        "DELETE FROM job_results WHERE job_id IN (SELECT id FROM jobs WHERE updated_at < ? AND status NOT IN (?, ?))",
+        (cutoff, *ACTIVE_STATUSES),
+    )
+    conn.execute("DELETE FROM jobs WHERE updated_at < ? AND status NOT IN (?, ?)", (cutoff, *ACTIVE_STATUSES))
+
+
+def update_job(job_id: str, **fields: Any) -> None:
+    # fields: status, total, error
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    with _conn() as conn:
+        conn.execute(
+            f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ?",
+            (*fields.values(), time.time(), job_id),
+        )
+
+
+def add_job_result(job_id: str, position: int, record: Dict[str, Any]) -> None:
+    with _conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO job_results (job_id, position, record) VALUES (?, ?, ?)",
+            (job_id, position, json.dumps(record, ensure_ascii=False)),
+        )
+        conn.execute(
+            "UPDATE jobs SET completed = (SELECT COUNT(*) FROM job_results WHERE job_id = ?), updated_at = ? WHERE id = ?",
+            (job_id, time.time(), job_id),
+        )
+
+
+def get_job(job_id: str, with_results: bool = True) -> Optional[Dict[str, Any]]:
+    with _conn() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"] or "{}")
+        if with_results:
+            results = conn.execute(
+                "SELECT record FROM job_results WHERE job_id = ? ORDER BY position", (job_id,)
+            ).fetchall()
+            job["results"] = [json.loads(r["record"]) for r in results]
+    return job
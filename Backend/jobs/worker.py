@@ -0,0 +1,49 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from jobs.store import create_job, update_job
+
+
+# Jobs running at once, and jobs allowed to wait (queued + running) before submits are refused.
+JOB_WORKERS = max(1, int(os.getenv("JOB_WORKERS", "2")))
+JOB_QUEUE_LIMIT = max(1, int(os.getenv("JOB_QUEUE_LIMIT", "100")))
+
+_pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_slots = threading.BoundedSemaphore(JOB_QUEUE_LIMIT)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def submit_job(kind: str, owner: str, params: Dict[str, Any], run: Callable[[str], None]) -> str:
+    """
+    Records a queued job and hands run(job_id) to the worker pool; returns the job id immediately.
+    run reports progress through jobs.store (update_job / add_job_result).
+    """
+    if not _slots.acquire(blocking=False):
+        raise JobQueueFull()
+    try:
+        job_id = create_job(kind, owner, params)
+        _pool.submit(_run, job_id, run)
+    except Exception:
+        _slots.release()
+        raise
+    return job_id
+
+
+def _run(job_id: str, run: Callable[[str], None]) -> None:
+    try:
+        update_job(job_id, status="running")
+        run(job_id)
+        update_job(job_id, status="done")
+    except Exception as e:
+        update_job(job_id, status="failed", error=str(e))
+    finally:
+        _slots.release()
+
+
+def shutdown_job_workers() -> None:
+    _pool.shutdown(wait=False, cancel_futures=True)
@@ -1,13 +1,48 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import asyncio
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from starlette.middleware.sessions import SessionMiddleware
 import os
 from fastapi.middleware.cors import CORSMiddleware
 
 from auth.routes import router as auth_router
+from auth.tokens import token_cache_stats
+from gmail.message_cache import message_cache_stats
 from gmail.routes import router as gmail_router
 from demo.store import init_demo_store
+from ai.cache import cache_stats, init_ai_cache
+from ai.dedupe import dedupe_stats
+from ai.service import summary_route_stats
+from core.http import close_async_http_client, close_http_client, http_pool_stats, init_http_client
+from core.loop import bind_app_loop
+from core.metrics import (
+    REQUESTS,
+    SERVER_TIMING_ENABLED,
+    begin_request,
+    end_request,
+    render_metrics,
+    server_timing_header,
+)
+from jobs.precompute import precompute_stats, shutdown_precompute
+from jobs.store import init_jobs_store
+from jobs.worker import shutdown_job_workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_http_client()
+    bind_app_loop(asyncio.get_running_loop())
+    yield
+    shutdown_precompute()
+    shutdown_job_workers()
+    bind_app_loop(None)
+    close_http_client()
+    await close_async_http_client()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 IS_PROD = FRONTEND_URL.startswith("https://")
@@ -27,15 +62,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def request_timing(request: Request, call_next):
+    token = begin_request()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - started
+        timings = end_request(token)
+        # Route template, not the raw path, so ids do not explode the label set.
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        REQUESTS.observe(elapsed, request.method, route, str(status))
+    if SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
+
 app.include_router(auth_router)
 app.include_router(gmail_router)
 
 init_demo_store()
+init_ai_cache()
+init_jobs_store()
 
 @app.get("/")
 def health():
     return {"status": "ok"}
 
+@app.get("/stats")
+def stats():
+    return {
+        "http": http_pool_stats(),
+        "ai_cache": cache_stats(),
+        "precompute": precompute_stats(),
+        "tokens": token_cache_stats(),
+        "message_cache": message_cache_stats(),
+        "summary_routes": summary_route_stats(),
+        "dedupe": dedupe_stats(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/dashboard")
 def dashboard():
     return {
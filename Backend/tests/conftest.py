@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# Modules read these at import time: keep test runs off the real cache and mirror files,
+# and let the LLM client load without a key (tests never reach Groq).
+_tmp = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("AI_CACHE_PATH", os.path.join(_tmp, "ai_cache.sqlite3"))
+os.environ.setdefault("MAIL_MIRROR_PATH", os.path.join(_tmp, "mail_mirror.sqlite3"))
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(_tmp, "jobs.sqlite3"))
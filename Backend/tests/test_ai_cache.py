@@ -0,0 +1,57 @@
+import sqlite3
+import threading
+
+import pytest
+
+from ai import cache
+from core import sqlite as pool
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Counts the sqlite3 connections the cache opens."""
+    count = []
+    real_open = pool.open_db
+
+    def counting_open(path, timeout):
+        if str(path) == str(cache.DB_PATH):
+            count.append(1)
+        return real_open(path, timeout)
+
+    monkeypatch.setattr(pool, "open_db", counting_open)
+    return count
+
+
+def test_lookups_and_writes_reuse_pooled_connections(opened):
+    def work(i):
+        for j in range(20):
+            key = f"pool-{i}-{j}"
+            cache.cache_put(key, "value")
+            with cache._lock:
+                cache._memory.pop(key, None)
+            assert cache.cache_get(key) == "value"
+            assert cache.cache_get(key + "-miss") is None
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(opened) <= cache.AI_CACHE_DB_POOL_SIZE
+
+
+def test_miss_leaves_no_open_transaction():
+    cache.cache_get("never-stored")
+    with cache._pooled() as conn:
+        assert not conn.in_transaction
+
+
+def test_failed_write_rolls_back_and_returns_connection():
+    with pytest.raises(sqlite3.OperationalError):
+        with cache._conn() as conn:
+            conn.execute("INSERT INTO ai_cache (key, value, created_at, accessed_at) VALUES ('x', 'y', 0, 0)")
+            conn.execute("SELECT * FROM missing_table")
+
+    with cache._conn() as conn:
+        assert conn.execute("SELECT 1 FROM ai_cache WHERE key = 'x'").fetchone() is None
@@ -0,0 +1,56 @@
+import pytest
+
+from ai import service
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    monkeypatch.setattr(service, "LLM_BATCH_TOKENS", 100)
+    monkeypatch.setattr(service, "LLM_BATCH_ITEM_TOKENS", 60)
+    monkeypatch.setattr(service, "LLM_BATCH_MAX_EMAILS", 3)
+
+
+def _body(tokens):
+    # _pack_batches estimates len // CHARS_PER_TOKEN + 1 tokens per trimmed body.
+    return "x" * ((tokens - 1) * service.CHARS_PER_TOKEN)
+
+
+def test_batches_stay_within_token_budget(budget):
+    bodies = {0: _body(40), 1: _body(40), 2: _body(30), 3: _body(20)}
+
+    batches, singles = service._pack_batches(bodies)
+
+    assert batches == [[0, 1], [2, 3]]
+    assert singles == []
+
+
+def test_budget_may_be_filled_exactly(budget):
+    batches, _ = service._pack_batches({0: _body(50), 1: _body(50), 2: _body(1)})
+    assert batches == [[0, 1], [2]]
+
+
+def test_batches_capped_by_email_count(budget):
+    bodies = {pos: _body(5) for pos in range(7)}
+
+    batches, _ = service._pack_batches(bodies)
+
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_long_bodies_get_calls_of_their_own(budget):
+    bodies = {0: _body(10), 1: _body(61), 2: _body(60), 3: _body(10)}
+
+    batches, singles = service._pack_batches(bodies)
+
+    assert singles == [1]
+    assert batches == [[0, 2, 3]]
+
+
+def test_estimate_uses_trimmed_body(budget):
+    quoted = "\n".join("> " + "y" * 78 for _ in range(20))
+    batches, singles = service._pack_batches({0: "Sounds good.\n\n" + quoted})
+    assert (batches, singles) == ([[0]], [])
+
+
+def test_empty_input():
+    assert service._pack_batches({}) == ([], [])
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from core.cursor import decode_cursor, encode_cursor
+from gmail import routes
+
+
+def test_round_trip():
+    position = {"q": "before:1700000000", "x": ["a", "b"]}
+    assert decode_cursor(encode_cursor("real", position), "real") == position
+    assert decode_cursor(encode_cursor("demo", {"k": [1700000000, "demo-9"]}), "demo") == {"k": [1700000000, "demo-9"]}
+
+
+@pytest.mark.parametrize(
+    "position",
+    [
+        {"k": [1700000000]},
+        {"k": ["1700000000", "id"]},
+        {"k": [1700000000, 7]},
+        {"k": [True, "id"]},
+        {"k": "1700000000"},
+        {"p": 3},
+        {"x": "id"},
+        {"z": 1},
+    ],
+)
+def test_malformed_position_is_a_400(position):
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(encode_cursor("demo", position), "demo")
+    assert e.value.status_code == 400
+
+
+def test_cursor_from_other_mode_is_a_400():
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor("demo", {"k": [1, "a"]}), "real")
+
+
+def test_mirror_cursor_does_not_restart_from_gmail_page_one(monkeypatch):
+    async def unavailable(access_token, n, after=None):
+        return None
+
+    async def gmail_page(*args, **kwargs):
+        raise AssertionError("fell back to Gmail's first page")
+
+    monkeypatch.setattr(routes, "mirror_page", unavailable)
+    monkeypatch.setattr(routes, "fetch_email_summaries_page_async", gmail_page)
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(routes._real_last_page("tok", 5, {"k": [1700000000000, "m1"]}))
+    assert e.value.status_code == 503
@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+from ai import dedupe
+
+NEWSLETTER = (
+    "Hi {name}, this week the product team shipped the new billing dashboard, moved the reports "
+    "service to the new cluster and fixed the export timeout customers kept running into. Next week "
+    "we start the quarterly roadmap review with design and sales. Read more at {url} or write to {email}."
+)
+UNRELATED = (
+    "Legal still needs to sign the vendor contract before the end of the month, and finance asked "
+    "for an updated forecast covering the new hires planned for the support team this quarter."
+)
+
+
+def _distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _flip(fp, bits):
+    for bit in bits:
+        fp ^= 1 << bit
+    return fp
+
+
+def test_fingerprint_ignores_links_and_addresses():
+    a = dedupe.fingerprint(NEWSLETTER.format(name="Ann", url="https://t.example/a?u=1", email="ann@example.com"))
+    b = dedupe.fingerprint(NEWSLETTER.format(name="Bob", url="https://t.example/b?u=2", email="bob@example.org"))
+    assert _distance(a, b) <= dedupe.SIMHASH_MAX_DISTANCE
+
+
+def test_unrelated_texts_are_far_apart():
+    a = dedupe.fingerprint(NEWSLETTER.format(name="Ann", url="", email=""))
+    b = dedupe.fingerprint(UNRELATED)
+    assert _distance(a, b) > 3 * dedupe.SIMHASH_MAX_DISTANCE
+
+
+def test_short_text_has_no_fingerprint():
+    assert dedupe.fingerprint("Thanks, see you then.") is None
+
+
+@pytest.mark.parametrize("max_distance", [1, 6, 15])
+def test_bands_partition_all_bits(max_distance):
+    bands = dedupe._bands(max_distance)
+    assert len(bands) == max_distance + 1
+    assert bands[0][0] == 0 and bands[-1][1] == dedupe.BITS
+    assert all(hi == lo for (_, hi), (lo, _) in zip(bands, bands[1:]))
+
+
+def test_find_within_distance_and_prefers_closest():
+    index = dedupe.SimHashIndex(6)
+    base = 0x0123456789ABCDEF
+    index.add(_flip(base, [0, 9, 18, 27, 36, 45]), "far")
+    index.add(_flip(base, [5, 50]), "near")
+
+    assert index.find(base) == (_flip(base, [5, 50]), "near")
+    assert index.find(_flip(base, [1, 2, 3, 4, 6, 7, 8])) is None
+
+
+def test_find_matches_linear_scan():
+    rng = random.Random(7)
+    index = dedupe.SimHashIndex(4)
+    stored = [rng.getrandbits(64) for _ in range(200)]
+    for fp in stored:
+        index.add(fp, fp)
+
+    for _ in range(300):
+        probe = _flip(rng.choice(stored), rng.sample(range(64), rng.randint(0, 6)))
+        best = min(_distance(probe, fp) for fp in stored)
+        match = index.find(probe)
+        if best <= 4:
+            assert match is not None and _distance(probe, match[0]) == best
+        else:
+            assert match is None
+
+
+def test_remove_and_max_items():
+    a, b, c = 0, 0xFFFFFFFF00000000, 0x00000000FFFFFFFF
+    index = dedupe.SimHashIndex(3, max_items=2)
+    index.add(a, "a")
+    index.add(b, "b")
+    index.add(c, "c")
+
+    assert len(index) == 2
+    assert index.find(a) is None
+    assert index.find(_flip(b, [0])) == (b, "b")
+
+    index.remove(b)
+    assert index.find(b) is None
+    assert len(index) == 1
+    assert index._buckets.keys() == set(index._keys(c))
+
+
+def test_scopes_do_not_see_each_other():
+    index = dedupe.SimHashIndex(6, max_items=2)
+    index.add(0xABCD, "ann's", "ann@example.com")
+
+    assert index.find(0xABCD, "bob@example.com") is None
+    assert index.find(_flip(0xABCD, [1]), "ann@example.com") == (0xABCD, "ann's")
+
+    index.add(0xABCD, "bob's", "bob@example.com")
+    index.add(0xFFFF << 48, "bob's other", "bob@example.com")
+    assert index.find(0xABCD, "ann@example.com") is None
+    assert index.find(0xABCD, "bob@example.com") == (0xABCD, "bob's")
+
+
+def test_cluster_maps_members_to_first_occurrence(monkeypatch):
+    monkeypatch.setattr(dedupe, "SIMHASH_MAX_DISTANCE", 6)
+    a = 0xFFFF0000FFFF0000
+    b = 0x00FF00FF00FF00FF
+
+    reps = dedupe.cluster([a, _flip(a, [3, 40]), b, None, _flip(a, [61]), None])
+
+    assert reps == [0, 0, 2, 3, 0, 5]
@@ -0,0 +1,159 @@
+import base64
+
+from gmail import service
+
+
+def _b64(text):
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _split(spec):
+    # Top-level comma split that leaves parenthesized selections whole.
+    items, depth, start = [], 0, 0
+    for i, ch in enumerate(spec):
+        depth += ch == "("
+        depth -= ch == ")"
+        if ch == "," and depth == 0:
+            items.append(spec[start:i])
+            start = i + 1
+    return items + [spec[start:]]
+
+
+def _merge(into, tree):
+    for key, sub in tree.items():
+        if key in into and into[key] is not None and sub is not None:
+            _merge(into[key], sub)
+        else:
+            into[key] = None if key in into and into[key] is None else sub
+    return into
+
+
+def _parse(spec):
+    """Gmail partial-response `fields` syntax as a tree: name -> sub-tree, None for the whole value."""
+    tree = {}
+    for item in _split(spec):
+        path, _, inner = item.partition("(")
+        sub = _parse(inner[:-1]) if inner else None
+        for name in reversed(path.split("/")[1:]):
+            sub = {name: sub}
+        _merge(tree, {path.split("/")[0]: sub})
+    return tree
+
+
+def _apply(value, tree):
+    # What Gmail returns for `value` under the mask.
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_apply(v, tree) for v in value]
+    return {k: _apply(value[k], sub) for k, sub in tree.items() if isinstance(value, dict) and k in value}
+
+
+FULL_MESSAGE = {
+    "id": "m1",
+    "threadId": "t1",
+    "labelIds": ["INBOX", "UNREAD"],
+    "snippet": "Quarterly numbers",
+    "internalDate": "1700000000000",
+    "historyId": "991",
+    "sizeEstimate": 48213,
+    "payload": {
+        "partId": "",
+        "mimeType": "multipart/mixed",
+        "filename": "",
+        "headers": [
+            {"name": "From", "value": "ana@example.com"},
+            {"name": "To", "value": "me@example.com"},
+            {"name": "Subject", "value": "Numbers"},
+            {"name": "Date", "value": "Mon, 01 Apr 2026 10:14:00 +0000"},
+        ],
+        "body": {"size": 0},
+        "parts": [
+            {
+                "partId": "0",
+                "mimeType": "multipart/alternative",
+                "filename": "",
+                "headers": [{"name": "Content-Type", "value": "multipart/alternative"}],
+                "body": {"size": 0},
+                "parts": [
+                    {"partId": "0.0", "mimeType": "text/plain", "filename": "", "body": {"size": 22, "data": _b64("Numbers are attached.")}},
+                    {"partId": "0.1", "mimeType": "text/html", "filename": "", "body": {"size": 30, "data": _b64("<p>Numbers are attached.</p>")}},
+                ],
+            },
+            {"partId": "1", "mimeType": "application/pdf", "filename": "q3.pdf", "body": {"size": 40000, "attachmentId": "att-1"}},
+        ],
+    },
+}
+
+
+def test_parts_mask_nests_to_the_configured_depth():
+    assert service._parts_fields(1) == "mimeType,filename,body(data,attachmentId)"
+    assert service._parts_fields(2) == "mimeType,filename,body(data,attachmentId),parts(mimeType,filename,body(data,attachmentId))"
+    deep = service._parts_fields(6)
+    assert deep.count("parts(") == 5
+    assert deep.count("(") == deep.count(")")
+
+
+def test_message_masks():
+    assert service.METADATA_FIELDS == "id,threadId,labelIds,snippet,internalDate,payload/headers"
+    assert service.FULL_FIELDS.startswith("id,threadId,labelIds,snippet,internalDate,payload(headers,mimeType,")
+    assert service.METADATA_PARAMS["fields"] == service.METADATA_FIELDS
+    assert service.FULL_PARAMS == {"format": "full", "fields": service.FULL_FIELDS}
+
+
+def test_full_mask_keeps_everything_the_readers_use():
+    masked = _apply(FULL_MESSAGE, _parse(service.FULL_FIELDS))
+
+    assert "historyId" not in masked and "sizeEstimate" not in masked
+    assert "partId" not in masked["payload"]["parts"][0]
+    assert masked["payload"]["parts"][1]["body"] == {"attachmentId": "att-1"}
+    assert service.extract_message_body(masked) == service.extract_message_body(FULL_MESSAGE) == "Numbers are attached."
+    assert service.normalize_message_summary(masked) == service.normalize_message_summary(FULL_MESSAGE)
+
+
+def test_metadata_mask_keeps_the_summary_fields():
+    masked = _apply(FULL_MESSAGE, _parse(service.METADATA_FIELDS))
+
+    assert set(masked) == {"id", "threadId", "labelIds", "snippet", "internalDate", "payload"}
+    assert set(masked["payload"]) == {"headers"}
+    assert service.normalize_message_summary(masked) == service.normalize_message_summary(FULL_MESSAGE)
+
+
+def test_list_and_history_masks():
+    listing = {"messages": [{"id": "m1", "threadId": "t1", "extra": 1}], "nextPageToken": "p2", "resultSizeEstimate": 7, "etag": "x"}
+    assert _apply(listing, _parse(service.LIST_FIELDS)) == {
+        "messages": [{"id": "m1", "threadId": "t1"}],
+        "nextPageToken": "p2",
+        "resultSizeEstimate": 7,
+    }
+
+    history = {
+        "history": [{
+            "id": "h1",
+            "messages": [{"id": "m1"}],
+            "messagesAdded": [{"message": {"id": "m1", "threadId": "t1", "labelIds": ["INBOX"]}}],
+            "labelsRemoved": [{"message": {"id": "m2", "threadId": "t2", "labelIds": []}, "labelIds": ["INBOX"]}],
+            "messagesDeleted": [{"message": {"id": "m3", "threadId": "t3"}}],
+        }],
+        "historyId": "992",
+    }
+    # The mirror reads the added message's labels, and the label change's own labelIds.
+    assert _apply(history, _parse(service.HISTORY_FIELDS)) == {
+        "history": [{
+            "messagesAdded": [{"message": {"id": "m1", "labelIds": ["INBOX"]}}],
+            "labelsRemoved": [{"message": {"id": "m2"}, "labelIds": ["INBOX"]}],
+            "messagesDeleted": [{"message": {"id": "m3"}}],
+        }],
+        "historyId": "992",
+    }
+
+
+def test_request_params_carry_the_masks(monkeypatch):
+    assert service._list_params(10, "p2", "from:ana") == {
+        "maxResults": 10, "labelIds": "INBOX", "pageToken": "p2", "q": "from:ana", "fields": service.LIST_FIELDS,
+    }
+    assert service._history_params("991", None)["fields"] == service.HISTORY_FIELDS
+
+    monkeypatch.setattr(service, "GMAIL_FIELD_MASKS", False)
+    assert "fields" not in service._list_params(10, None, None)
+    assert "fields" not in service._history_params("991", "p2")
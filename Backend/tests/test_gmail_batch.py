@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import httpx
+
+from gmail import service
+
+BOUNDARY = "batch_reply"
+
+
+def _part(index, status, reason, body):
+    return (
+        f"--{BOUNDARY}\r\n"
+        "Content-Type: application/http\r\n"
+        f"Content-ID: <response-item-{index}>\r\n\r\n"
+        f"HTTP/1.1 {status} {reason}\r\n"
+        "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+        f"{json.dumps(body)}\r\n"
+    )
+
+
+def _reply(*parts):
+    return ("".join(parts) + f"--{BOUNDARY}--\r\n").encode("utf-8")
+
+
+CONTENT_TYPE = f"multipart/mixed; boundary={BOUNDARY}"
+
+
+def test_parses_parts_by_content_id_with_status():
+    content = _reply(
+        _part(1, 429, "Too Many Requests", {"error": {"code": 429, "message": "Rate limit"}}),
+        _part(0, 200, "OK", {"id": "m0", "snippet": "héllo"}),
+        _part(2, 503, "Service Unavailable", {"error": {"code": 503}}),
+    )
+
+    parts = service.parse_batch_response(CONTENT_TYPE, content)
+
+    assert parts[0] == (200, {"id": "m0", "snippet": "héllo"})
+    assert parts[1][0] == 429 and "error" in parts[1][1]
+    assert parts[2][0] == 503 and "error" in parts[2][1]
+
+
+def test_failed_part_without_error_body_is_marked_failed():
+    parts = service.parse_batch_response(CONTENT_TYPE, _reply(_part(0, 500, "Internal Server Error", {})))
+    assert parts[0] == (500, {"error": "batch_part_failed", "status_code": 500})
+
+
+def test_non_multipart_reply_yields_no_parts():
+    assert service.parse_batch_response("application/json", b'{"error": "nope"}') == {}
+
+
+def test_should_retry_only_throttled_and_server_errors():
+    assert service._should_retry(429)
+    assert service._should_retry(500)
+    assert service._should_retry(503)
+    assert not service._should_retry(200)
+    assert not service._should_retry(404)
+    assert not service._should_retry(0)
+
+
+def test_batch_chunk_retries_429_and_5xx_parts_individually(monkeypatch):
+    content = _reply(
+        _part(0, 200, "OK", {"id": "a"}),
+        _part(1, 429, "Too Many Requests", {"error": {"code": 429}}),
+        _part(2, 502, "Bad Gateway", {"error": {"code": 502}}),
+        _part(3, 404, "Not Found", {"error": {"code": 404}}),
+    )
+    retried = []
+
+    async def gmail(op, method, url, **kwargs):
+        if op == "batch":
+            return httpx.Response(200, headers={"Content-Type": CONTENT_TYPE}, content=content)
+        mid = url.rsplit("/", 1)[1]
+        retried.append(mid)
+        return httpx.Response(200, json={"id": mid, "retried": True})
+
+    monkeypatch.setattr(service, "_gmail_async", gmail)
+
+    out = asyncio.run(service._batch_chunk_async("token", ["a", "b", "c", "d"], service.METADATA_PARAMS))
+
+    assert retried == ["b", "c"]
+    assert out[0] == {"id": "a"}
+    assert out[1] == {"id": "b", "retried": True}
+    assert out[2] == {"id": "c", "retried": True}
+    assert out[3]["error"] == {"code": 404}
+
+
+def test_batch_chunk_reports_missing_parts(monkeypatch):
+    content = _reply(_part(0, 200, "OK", {"id": "a"}))
+
+    async def gmail(op, method, url, **kwargs):
+        return httpx.Response(200, headers={"Content-Type": CONTENT_TYPE}, content=content)
+
+    monkeypatch.setattr(service, "_gmail_async", gmail)
+
+    out = asyncio.run(service._batch_chunk_async("token", ["a", "b"], service.METADATA_PARAMS))
+
+    assert out == [{"id": "a"}, {"error": "missing_batch_part", "id": "b"}]
@@ -0,0 +1,80 @@
+import base64
+
+import pytest
+
+from gmail import service
+
+
+def _b64(text):
+    # Gmail's encoding: base64url with the padding stripped.
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _part(mime_type, text, **extra):
+    return {"mimeType": mime_type, "body": {"data": _b64(text)}, **extra}
+
+
+def test_text_parts_skips_named_and_external_attachments():
+    payload = {
+        "mimeType": "multipart/mixed",
+        "parts": [
+            _part("text/plain", "notes.txt contents", filename="notes.txt"),
+            {"mimeType": "text/html", "filename": "", "body": {"attachmentId": "att-1", "size": 90000}},
+            {
+                "mimeType": "multipart/alternative",
+                "parts": [_part("text/plain", "inline plain"), _part("text/html", "<p>inline html</p>")],
+            },
+        ],
+    }
+
+    plain, html = service._text_parts(payload)
+
+    assert plain == _b64("inline plain")
+    assert html == _b64("<p>inline html</p>")
+
+
+def test_text_parts_keeps_first_part_in_mime_order():
+    payload = {
+        "mimeType": "multipart/mixed",
+        "parts": [
+            {"mimeType": "multipart/alternative", "parts": [_part("text/plain", "first")]},
+            _part("text/plain", "second"),
+        ],
+    }
+    assert service._text_parts(payload) == (_b64("first"), None)
+
+
+def test_extract_body_ignores_attachment_only_text():
+    message = {
+        "snippet": "the snippet",
+        "payload": {"mimeType": "multipart/mixed", "parts": [_part("text/plain", "log", filename="build.log")]},
+    }
+    assert service.extract_message_body(message) == "the snippet"
+
+
+@pytest.mark.parametrize("chunk", [4, 8, 12])
+def test_b64_decoding_splits_multibyte_characters_across_chunks(monkeypatch, chunk):
+    # Small chunks put the boundaries inside the 2-, 3- and 4-byte sequences.
+    monkeypatch.setattr(service, "B64_DECODE_CHUNK", chunk)
+    text = "Grüße — 東京 🎉 naïve café " * 3
+
+    pieces = list(service._iter_b64url_text(_b64(text)))
+
+    assert "".join(pieces) == text
+    assert len(pieces) > 2
+
+
+def test_decode_text_stops_at_budget(monkeypatch):
+    monkeypatch.setattr(service, "B64_DECODE_CHUNK", 8)
+    decoded = []
+    real = service._iter_b64url_text
+
+    def counting(data):
+        for piece in real(data):
+            decoded.append(piece)
+            yield piece
+
+    monkeypatch.setattr(service, "_iter_b64url_text", counting)
+
+    assert service._decode_text(_b64("abcdef" * 100), 10) == "abcdefabcd"
+    assert len(decoded) == 2
@@ -0,0 +1,48 @@
+from gmail.html_text import html_chunks_to_text, html_to_text
+
+
+def test_block_and_paragraph_breaks():
+    html = "<h1>Title</h1><p>First <b>bold</b> line</p><div>Block</div><div>Next</div><ul><li>a</li><li>b</li></ul>"
+    assert html_to_text(html) == "Title\n\nFirst bold line\n\nBlock\nNext\n\na\nb"
+
+
+def test_line_breaks_add_up_to_one_blank_line():
+    assert html_to_text("one<br>two<br><br>three<br><br><br><br>four") == "one\ntwo\n\nthree\n\nfour"
+
+
+def test_whitespace_collapses_and_cells_are_spaced():
+    html = "<p>  spread \n\t out  </p><table><tr><td>Qty</td><td>2</td></tr><tr><td>Total</td><td>$9</td></tr></table>"
+    assert html_to_text(html) == "spread out\n\nQty 2\nTotal $9"
+
+
+def test_script_style_dropped_and_pre_kept():
+    html = "<style>p {color: red}</style><script>alert(1)</script><p>Hi &amp; bye</p><pre>a  b\n  c</pre>"
+    assert html_to_text(html) == "Hi & bye\n\na  b\n  c"
+
+
+def test_budget_truncates_text():
+    html = "<p>" + "word " * 100 + "</p>"
+    assert html_to_text(html, max_chars=12) == "word word wo"
+    assert len(html_to_text(html, max_chars=12)) == 12
+
+
+def test_budget_stops_pulling_chunks():
+    pulled = []
+
+    def chunks():
+        for i in range(100):
+            pulled.append(i)
+            yield f"<p>paragraph {i}</p>"
+
+    text = html_chunks_to_text(chunks(), max_chars=40)
+
+    assert text.startswith("paragraph 0\n\nparagraph 1")
+    assert len(text) <= 40
+    assert len(pulled) < 10
+
+
+def test_no_budget_reads_everything():
+    html = "<div>" + "x" * 200_000 + "</div><p>end</p>"
+    text = html_to_text(html)
+    assert text.endswith("\n\nend")
+    assert len(text) == 200_005
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+import pytest
+
+from ai import service
+from core import loop as app_loop
+
+
+@pytest.fixture
+def running_loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    app_loop.bind_app_loop(loop)
+    yield loop
+    app_loop.bind_app_loop(None)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_worker_coroutines_run_on_the_bound_loop(running_loop):
+    async def which_loop():
+        return asyncio.get_running_loop()
+
+    assert app_loop.run_on_app_loop(which_loop()) is running_loop
+
+
+def test_runs_on_a_fresh_loop_when_none_is_bound():
+    async def answer():
+        await asyncio.sleep(0)
+        return 42
+
+    assert app_loop.run_on_app_loop(answer()) == 42
+
+
+def test_llm_slots_belong_to_the_running_loop():
+    async def slots():
+        first = service._llm_slots()
+        assert service._llm_slots() is first
+        return first
+
+    assert asyncio.run(slots()) is not asyncio.run(slots())
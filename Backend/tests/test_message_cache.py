@@ -0,0 +1,90 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from gmail import message_cache, routes
+from gmail.message_cache import encode_message, etag_matches, message_cache_forget, message_cache_get, message_cache_put
+
+MESSAGE = {"id": "m1", "subject": "Héllo", "snippet": "hi"}
+
+
+def test_etag_is_a_hash_of_the_body():
+    content, etag = encode_message(MESSAGE)
+    assert content == '{"id":"m1","subject":"Héllo","snippet":"hi"}'.encode("utf-8")
+    assert etag.startswith('"') and etag.endswith('"') and len(etag) == 34
+    assert encode_message(dict(MESSAGE))[1] == etag
+    assert encode_message({**MESSAGE, "snippet": "bye"})[1] != etag
+
+
+def test_if_none_match_comparison():
+    etag = encode_message(MESSAGE)[1]
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_entries_are_per_user_kind_and_forgotten_together():
+    message_cache_put("ann@example.com", "m1", "meta", MESSAGE)
+    message_cache_put("ann@example.com", "m1", "full", {**MESSAGE, "body": "text"})
+
+    assert message_cache_get("ann@example.com", "m1", "meta") == encode_message(MESSAGE)
+    assert message_cache_get("bob@example.com", "m1", "meta") is None
+
+    message_cache_forget("ann@example.com", "m1")
+    assert message_cache_get("ann@example.com", "m1", "meta") is None
+    assert message_cache_get("ann@example.com", "m1", "full") is None
+
+
+def test_cache_is_bounded_by_bytes(monkeypatch):
+    monkeypatch.setattr(message_cache, "_entries", type(message_cache._entries)())
+    monkeypatch.setattr(message_cache, "_bytes", 0)
+    size = len(encode_message({"id": "a0", "pad": "x" * 100})[0])
+    monkeypatch.setattr(message_cache, "MESSAGE_CACHE_MAX_BYTES", size * 2)
+
+    for i in range(3):
+        message_cache_put("u", f"a{i}", "meta", {"id": f"a{i}", "pad": "x" * 100})
+
+    assert message_cache_get("u", "a0", "meta") is None
+    assert message_cache_get("u", "a2", "meta") is not None
+    assert message_cache.message_cache_stats()["bytes"] <= size * 2
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fetched = []
+
+    async def owner(mode, request, authorization):
+        return "etag@example.com", "token"
+
+    async def fetch(token, message_id):
+        fetched.append(message_id)
+        return {"id": message_id, "subject": "Cached"}
+
+    monkeypatch.setattr(routes, "_message_owner", owner)
+    monkeypatch.setattr(routes, "mirror_message", fetch)
+    app = FastAPI()
+    app.include_router(routes.router)
+    message_cache_forget("etag@example.com", "etag-1")
+    return TestClient(app), fetched
+
+
+def test_revalidation_returns_304_without_a_body(client):
+    http, fetched = client
+
+    first = http.get("/gmail/message/etag-1")
+    assert first.status_code == 200
+    assert first.json() == {"id": "etag-1", "subject": "Cached"}
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == f"private, max-age={message_cache.MESSAGE_CACHE_MAX_AGE}"
+
+    again = http.get("/gmail/message/etag-1", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+    assert fetched == ["etag-1"]
+
+    stale = http.get("/gmail/message/etag-1", headers={"If-None-Match": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.headers["ETag"] == etag
@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import pytest
+
+from auth.tokens import forget_tokens, remember_tokens
+from gmail import mirror
+
+
+@pytest.fixture
+def google(monkeypatch):
+    """
+    Stands in for the Gmail profile call; tokens in `valid` map to a mailbox, the rest are rejected.
+    """
+    state = {"calls": 0, "valid": {"tok-a": "a@example.com"}}
+
+    async def profile(access_token):
+        state["calls"] += 1
+        user = state["valid"].get(access_token)
+        return {"emailAddress": user} if user else {"error": {"code": 401}}
+
+    monkeypatch.setattr(mirror, "fetch_gmail_profile_async", profile)
+    monkeypatch.setattr(mirror, "_users_by_token", {})
+    return state
+
+
+def test_mailbox_is_cached_until_the_ttl(google, monkeypatch):
+    assert asyncio.run(mirror.mirror_user("tok-a")) == "a@example.com"
+    assert asyncio.run(mirror.mirror_user("tok-a")) == "a@example.com"
+    assert google["calls"] == 1
+
+    monkeypatch.setattr(mirror, "MIRROR_USER_TTL_SECONDS", -1)
+    mirror.forget_mirror_user("tok-a")
+    asyncio.run(mirror.mirror_user("tok-a"))
+    assert google["calls"] == 2
+    # Expired entries are revalidated: a token Google now rejects gets nothing.
+    del google["valid"]["tok-a"]
+    assert asyncio.run(mirror.mirror_user("tok-a")) is None
+
+
+def test_entry_never_outlives_the_token(google):
+    session = {"access_token": "tok-a", "refresh_token": "r", "expires_at": time.time() + 5}
+    remember_tokens(session)
+    try:
+        asyncio.run(mirror.mirror_user("tok-a"))
+        _, trusted_until = mirror._users_by_token["tok-a"]
+        assert trusted_until <= session["expires_at"]
+    finally:
+        forget_tokens(session)
+
+
+def test_logout_forgets_the_token(google):
+    asyncio.run(mirror.mirror_user("tok-a"))
+    mirror.forget_mirror_user("tok-a")
+    del google["valid"]["tok-a"]
+    assert asyncio.run(mirror.mirror_user("tok-a")) is None
+    assert google["calls"] == 2
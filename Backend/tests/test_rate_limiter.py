@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from ai import service
+from ai.service import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(service.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_requests_per_minute(clock):
+    limiter = RateLimiter(2, 10_000)
+    assert limiter._try_acquire(10, False, True) == 0
+    assert limiter._try_acquire(10, False, True) == 0
+    assert limiter._try_acquire(10, False, True) == pytest.approx(30)
+
+    clock[0] += 30
+    assert limiter._try_acquire(10, False, True) == 0
+
+
+def test_tokens_per_minute(clock):
+    limiter = RateLimiter(100, 600)
+    assert limiter._try_acquire(500, False, True) == 0
+    assert limiter._try_acquire(200, False, True) == pytest.approx(10)
+
+    clock[0] += 10
+    assert limiter._try_acquire(200, False, True) == 0
+
+
+def test_oversized_call_takes_the_whole_bucket_instead_of_waiting_forever(clock):
+    limiter = RateLimiter(100, 600)
+    assert limiter._try_acquire(5000, False, True) == 0
+    assert limiter._try_acquire(1, False, True) == pytest.approx(0.1)
+
+
+def test_settle_refunds_and_charges_the_difference(clock):
+    limiter = RateLimiter(100, 600)
+    limiter._try_acquire(500, False, True)
+    limiter.settle(500, 100)
+    assert limiter._try_acquire(500, False, True) == 0
+    limiter.settle(500, 600)
+    assert limiter._try_acquire(1, False, True) > 0
+
+
+def test_pause_holds_everyone_back(clock):
+    limiter = RateLimiter(100, 600)
+    limiter.pause(5)
+    assert limiter._try_acquire(1, False, True) == pytest.approx(5)
+    clock[0] += 5
+    assert limiter._try_acquire(1, False, True) == 0
+
+
+def test_background_leaves_the_reserve_for_interactive_calls(clock):
+    limiter = RateLimiter(10, 1000, reserve=0.5)
+    assert [limiter._try_acquire(10, True, False) for _ in range(5)] == [0] * 5
+    assert limiter._try_acquire(10, True, False) > 0
+    # Interactive calls may use the reserved half.
+    assert [limiter._try_acquire(10, False, True) for _ in range(5)] == [0] * 5
+    assert limiter._try_acquire(10, False, True) > 0
+
+
+def test_background_token_reserve(clock):
+    limiter = RateLimiter(100, 1000, reserve=0.5)
+    assert limiter._try_acquire(400, True, False) == 0
+    assert limiter._try_acquire(200, True, False) == pytest.approx(6)
+    assert limiter._try_acquire(200, False, True) == 0
+
+
+def test_background_yields_while_interactive_callers_wait(clock):
+    limiter = RateLimiter(1, 10_000, reserve=0.0)
+    assert limiter._try_acquire(1, False, False) == 0
+    # An interactive caller starts waiting; its first failed attempt registers it.
+    assert limiter._try_acquire(1, False, False) == pytest.approx(60)
+    clock[0] += 60
+    assert limiter._try_acquire(1, True, False) == pytest.approx(0.25)
+    assert limiter._try_acquire(1, False, True) == 0
+
+    limiter._stop_waiting()
+    clock[0] += 60
+    assert limiter._try_acquire(1, True, False) == 0
+
+
+def test_acquire_async_waits_then_deregisters():
+    limiter = RateLimiter(6000, 1_000_000)
+
+    async def run():
+        for _ in range(6000):
+            limiter._try_acquire(1, False, True)
+        await limiter.acquire_async(1)
+
+    asyncio.run(run())
+    assert limiter._waiting == 0
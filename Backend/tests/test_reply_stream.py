@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from ai import service
+
+
+class FakeStream:
+    """Upstream chat stream that records whether it was closed."""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+
+    async def __aiter__(self):
+        for piece in self.pieces:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    streams = []
+
+    async def create(**kwargs):
+        streams.append(FakeStream(["Hi Sam,", " thanks", " for", " the", " note."]))
+        return streams[-1]
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(service, "async_client", client)
+    monkeypatch.setattr(service, "cache_get", lambda key: None)
+    monkeypatch.setattr(service, "cache_put", lambda key, value: None)
+    return streams
+
+
+def test_early_close_releases_slot_and_upstream(upstream):
+    async def run():
+        stream = service.stream_draft_reply("sam@example.com", "Lunch", "Are you free on Friday?")
+        first = await stream.__anext__()
+        held = service._llm_slots()._value
+        await stream.aclose()
+        return first, held, service._llm_slots()._value
+
+    first, held, after = asyncio.run(run())
+
+    assert first == "Hi Sam,"
+    assert held == service.LLM_CONCURRENCY - 1
+    assert after == service.LLM_CONCURRENCY
+    assert upstream[0].closed
+
+
+def test_full_stream_closes_upstream(upstream):
+    async def run():
+        pieces = [piece async for piece in service.stream_draft_reply("sam@example.com", "Lunch", "Free Friday?")]
+        return pieces, service._llm_slots()._value
+
+    pieces, free = asyncio.run(run())
+
+    assert "".join(pieces) == "Hi Sam, thanks for the note."
+    assert upstream[0].closed
+    assert free == service.LLM_CONCURRENCY
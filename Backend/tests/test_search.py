@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from core.fts import fts_query, marked_html
+from gmail import mirror
+
+USER = "search@example.com"
+
+
+def _message(mid, subject, snippet):
+    return {
+        "id": mid,
+        "threadId": mid,
+        "labelIds": ["INBOX"],
+        "snippet": snippet,
+        "internalDate": "1700000000000",
+        "payload": {"headers": [{"name": "Subject", "value": subject}, {"name": "From", "value": "x@example.com"}]},
+    }
+
+
+@pytest.fixture
+def synced(monkeypatch):
+    calls = []
+
+    async def sync(access_token, force=False):
+        calls.append(access_token)
+        return USER
+
+    monkeypatch.setattr(mirror, "sync_mailbox", sync)
+    return calls
+
+
+def test_marked_html_escapes_text_and_keeps_only_marks():
+    text = '<img src=x onerror="alert(1)"> \x02invoice\x03 & co'
+    assert marked_html(text) == "&lt;img src=x onerror=&quot;alert(1)&quot;&gt; <mark>invoice</mark> &amp; co"
+    assert marked_html(None) is None
+
+
+def test_mirror_hits_are_escaped(synced):
+    mirror._store_message(
+        USER,
+        _message("xss-1", "<script>alert('x')</script> Invoice due", "Pay <b>now</b>"),
+        "Your invoice <iframe src=evil></iframe> is attached.",
+    )
+
+    hits = asyncio.run(mirror.search_mirror("tok", "invoice"))
+
+    assert [h["id"] for h in hits] == ["xss-1"]
+    assert hits[0]["subject_highlighted"] == (
+        "&lt;script&gt;alert(&#x27;x&#x27;)&lt;/script&gt; <mark>Invoice</mark> due"
+    )
+
+    body_hit = asyncio.run(mirror.search_mirror("tok", "attached"))[0]
+    assert "&lt;iframe src=evil&gt;&lt;/iframe&gt;" in body_hit["match_snippet"]
+    assert "<mark>attached</mark>" in body_hit["match_snippet"]
+
+
+def test_search_syncs_the_mirror_first(synced):
+    mirror._store_message(USER, _message("sync-1", "Quarterly roadmap", "Agenda enclosed"), None)
+
+    assert [h["id"] for h in asyncio.run(mirror.search_mirror("tok", "roadmap"))] == ["sync-1"]
+    assert synced == ["tok"]
+
+
+def test_unsearchable_query_skips_sync(synced):
+    assert fts_query('""') is None
+    assert asyncio.run(mirror.search_mirror("tok", '""')) == []
+    assert synced == []
@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from google.auth import exceptions as google_exceptions
+from starlette.requests import Request
+
+from auth import tokens
+from core.session import require_user
+
+
+def _request(session):
+    return Request({"type": "http", "headers": [], "session": session})
+
+
+def _login(refresh_token, expires_in=10):
+    # Session as auth_callback leaves it, with a token about to expire.
+    return {"user": {
+        "access_token": "old",
+        "bearer_token": "old",
+        "refresh_token": refresh_token,
+        "expires_at": time.time() + expires_in,
+    }}
+
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    calls = []
+
+    def refresh(refresh_token):
+        calls.append(refresh_token)
+        time.sleep(0.05)
+        return f"fresh-{len(calls)}", time.time() + 3600
+
+    monkeypatch.setattr(tokens, "_refresh", refresh)
+    return calls
+
+
+def test_session_token_is_refreshed_once_for_concurrent_requests(refreshes):
+    session = _login("r-concurrent")
+
+    async def many():
+        return await asyncio.gather(*(require_user(_request(session), "Bearer old") for _ in range(5)))
+
+    users = asyncio.run(many())
+    assert refreshes == ["r-concurrent"]
+    assert {u["access_token"] for u in users} == {"fresh-1"}
+    assert session["user"]["access_token"] == "fresh-1"
+    assert session["user"]["bearer_token"] == "old"
+
+    # The frontend keeps sending the token it was given; the cached fresh token is used.
+    assert asyncio.run(require_user(_request(session), "Bearer old"))["access_token"] == "fresh-1"
+    assert refreshes == ["r-concurrent"]
+
+
+def test_fresh_session_token_needs_no_refresh(refreshes):
+    session = _login("r-fresh", expires_in=3600)
+    assert asyncio.run(require_user(_request(session), "Bearer old"))["access_token"] == "old"
+    assert refreshes == []
+
+
+def test_foreign_bearer_token_is_used_as_sent(refreshes):
+    session = _login("r-foreign")
+    assert asyncio.run(require_user(_request(session), "Bearer someone-else"))["access_token"] == "someone-else"
+    assert asyncio.run(require_user(_request({}), "Bearer no-session"))["access_token"] == "no-session"
+    assert refreshes == []
+
+
+def test_failed_refresh_is_a_401(monkeypatch):
+    def refresh(refresh_token):
+        raise google_exceptions.RefreshError("invalid_grant")
+
+    monkeypatch.setattr(tokens, "_refresh", refresh)
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(require_user(_request(_login("r-revoked")), "Bearer old"))
+    assert e.value.status_code == 401
+
+
+def test_bearer_only_request_uses_the_remembered_login(refreshes):
+    # The dashboard calls the API cross-origin: Authorization header, no session cookie.
+    tokens.remember_tokens({**_login("r-bearer")["user"], "access_token": "given", "bearer_token": "given"})
+
+    async def many():
+        return await asyncio.gather(*(require_user(_request({}), "Bearer given") for _ in range(5)))
+
+    users = asyncio.run(many())
+    assert refreshes == ["r-bearer"]
+    assert {u["access_token"] for u in users} == {"fresh-1"}
+
+    assert asyncio.run(require_user(_request({}), "Bearer given"))["access_token"] == "fresh-1"
+    assert refreshes == ["r-bearer"]
+
+
+def test_forgotten_login_bearer_is_used_as_sent(refreshes):
+    login = {**_login("r-logout")["user"], "access_token": "gone", "bearer_token": "gone"}
+    tokens.remember_tokens(login)
+    tokens.forget_tokens(login)
+
+    assert tokens.login_for_bearer("gone") is None
+    assert asyncio.run(require_user(_request({}), "Bearer gone"))["access_token"] == "gone"
+    assert refreshes == []
@@ -0,0 +1,65 @@
+import sqlite3
+import threading
+
+from core import sqlite as pool
+from core.fts import fts_query, init_search_index
+
+
+def test_pools_are_kept_per_path(tmp_path):
+    first, second = tmp_path / "a.sqlite3", tmp_path / "b.sqlite3"
+    with pool.pooled(first, 2) as a:
+        a.execute("CREATE TABLE t (x INTEGER)")
+    with pool.pooled(second, 2) as b:
+        assert b is not a
+        assert b.execute("SELECT 1 FROM sqlite_master WHERE name = 't'").fetchone() is None
+    with pool.pooled(first, 2) as again:
+        assert again is a
+
+
+def test_pool_never_opens_more_than_its_size(tmp_path, monkeypatch):
+    opened = []
+    real_open = pool.open_db
+
+    def counting_open(path, timeout):
+        opened.append(path)
+        return real_open(path, timeout)
+
+    monkeypatch.setattr(pool, "open_db", counting_open)
+    path = tmp_path / "bounded.sqlite3"
+    barrier = threading.Barrier(6)
+
+    def work():
+        barrier.wait()
+        for _ in range(20):
+            with pool.pooled(path, 2) as conn:
+                conn.execute("SELECT 1").fetchone()
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(opened) == 2
+
+
+def test_search_index_follows_inserts_updates_and_deletes(tmp_path):
+    conn = sqlite3.connect(tmp_path / "fts.sqlite3")
+    conn.execute("CREATE TABLE mail (subject TEXT, from_email TEXT, snippet TEXT, body TEXT)")
+    conn.execute("INSERT INTO mail VALUES ('Old invoice', 'a@x', '', '')")
+    init_search_index(conn, "mail")
+
+    def hits(text):
+        sql = "SELECT m.subject FROM mail_fts JOIN mail m ON m.rowid = mail_fts.rowid WHERE mail_fts MATCH ?"
+        return [r[0] for r in conn.execute(sql, (fts_query(text),))]
+
+    assert hits("invoice") == ["Old invoice"]
+    conn.execute("INSERT INTO mail VALUES ('Roadmap', 'b@x', '', 'quarterly plan')")
+    conn.execute("UPDATE mail SET subject = 'Paid receipt' WHERE subject = 'Old invoice'")
+    assert hits("invoice") == []
+    assert hits("receipt") == ["Paid receipt"]
+    conn.execute("DELETE FROM mail WHERE subject = 'Roadmap'")
+    assert hits("quarterly") == []
+
+    init_search_index(conn, "mail")
+    assert hits("receipt") == ["Paid receipt"]
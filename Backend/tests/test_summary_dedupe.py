@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+
+from ai import dedupe, service
+from core.metrics import SUMMARY_ROUTES
+
+NEWSLETTER = (
+    "Hi {name},\n\n"
+    "This week the product team shipped the new billing dashboard, moved the reports service to the "
+    "new cluster and fixed the export timeout customers kept running into. Next week we start the "
+    "quarterly roadmap review with design and sales, and the mobile beta opens to the first hundred "
+    "accounts on the waiting list. Office hours move to Thursday afternoons from now on.\n\n"
+    "Thanks,\nThe Product Team"
+)
+OTHER = (
+    "Legal still needs to sign the vendor contract before the end of the month, and finance asked "
+    "for an updated forecast covering the new hires planned for the support team. Can you send both "
+    "over by Wednesday so the budget review can go ahead as planned?"
+)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """
+    Replaces the async LLM call; records each prompt and answers batches in JSON.
+    """
+    calls = []
+
+    async def complete(messages, temperature, max_tokens, json_output=False, op="completion", model=None):
+        prompt = messages[-1]["content"]
+        calls.append((op, prompt))
+        if json_output:
+            count = prompt.count("<email id=")
+            return json.dumps({"summaries": [{"id": str(i), "summary": f"batch {i}"} for i in range(1, count + 1)]})
+        return f"summary {len(calls)}"
+
+    monkeypatch.setattr(service, "_complete_async", complete)
+    monkeypatch.setattr(dedupe, "_recent", dedupe.SimHashIndex(dedupe.SIMHASH_MAX_DISTANCE, 100))
+    return calls
+
+
+def _routes():
+    values = SUMMARY_ROUTES.values()
+    return {route: values.get((route,), 0) for route in ("duplicate", "small")}
+
+
+def test_recalled_near_duplicate_makes_no_llm_call(llm):
+    first = asyncio.run(service.summarize_many_async([NEWSLETTER.format(name="Ann")], "ann@example.com"))
+    assert len(llm) == 1
+
+    llm.clear()
+    before = _routes()
+    second = asyncio.run(service.summarize_many_async([NEWSLETTER.format(name="Bob"), OTHER], "ann@example.com"))
+
+    assert second[0] == first[0]
+    assert [op for op, _ in llm] == ["summary_small"]
+    assert "Bob" not in llm[0][1]
+    after = _routes()
+    assert after["duplicate"] - before["duplicate"] == 1
+    assert after["small"] - before["small"] == 1
+
+
+def test_near_duplicates_in_one_request_share_a_call(llm):
+    bodies = [NEWSLETTER.format(name=name) for name in ("Cid", "Dee", "Eve")]
+    summaries = asyncio.run(service.summarize_many_async(bodies, "cid@example.com"))
+
+    assert len(llm) == 1
+    assert len(set(summaries)) == 1
+
+
+def test_other_mailbox_never_gets_the_recalled_summary(llm):
+    kim = asyncio.run(service.summarize_email_async(NEWSLETTER.format(name="Kim"), "kim@example.com"))
+    lou = asyncio.run(service.summarize_many_async([NEWSLETTER.format(name="Lou")], "lou@example.com"))
+    max_ = asyncio.run(service.summarize_email_async(NEWSLETTER.format(name="Max"), "lou@example.com"))
+
+    assert len(llm) == 2
+    assert lou[0] != kim
+    assert "Lou" in llm[1][1]
+    # Within Lou's own mailbox the near-duplicate is still reused.
+    assert max_ == lou[0]
+
+
+def test_no_owner_keeps_no_history(llm):
+    asyncio.run(service.summarize_many_async([NEWSLETTER.format(name="Ned")], None))
+    asyncio.run(service.summarize_many_async([NEWSLETTER.format(name="Oda")], None))
+
+    assert len(llm) == 2
+    assert len(dedupe._recent) == 0
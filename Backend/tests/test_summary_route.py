@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from ai import service
+
+
+@pytest.fixture
+def thresholds(monkeypatch):
+    monkeypatch.setattr(service, "SUMMARY_HEURISTIC_CHARS", 40)
+    monkeypatch.setattr(service, "SUMMARY_LARGE_TOKENS", 50)
+    monkeypatch.setattr(service, "SUMMARY_LARGE_QUESTIONS", 3)
+    monkeypatch.setattr(service, "SUMMARY_TEMPLATE_CHARS", 60)
+    monkeypatch.setattr(service, "LARGE_MODEL", "big-model")
+
+
+def _routes():
+    return {route: value for (route,), value in service.SUMMARY_ROUTES.values().items()}
+
+
+def test_short_emails_take_the_heuristic_path(thresholds):
+    assert service.summary_route("x" * 40) == "heuristic"
+    assert service.summary_route("x" * 41) == "small"
+
+
+def test_long_or_questioning_emails_go_to_the_large_model(thresholds):
+    assert service.summary_route("word " * 30) == "small"
+    assert service.summary_route("word " * 60) == "large"
+    assert service.summary_route("Can you? Will you? " + "x" * 40) == "small"
+    assert service.summary_route("Can you? Will you? Should we? " + "x" * 40) == "large"
+
+
+def test_without_a_large_model_everything_stays_small(thresholds, monkeypatch):
+    monkeypatch.setattr(service, "LARGE_MODEL", "")
+    assert service.summary_route("word " * 60) == "small"
+    assert service._route_model(service.summary_route("a? b? c? d? " + "x" * 40)) == service.DEFAULT_MODEL
+
+
+def test_large_model_is_opt_in():
+    assert service.LARGE_MODEL == ""
+
+
+def test_heuristic_summary_drops_greeting_and_sign_off():
+    assert service.heuristic_summary("Hi Sam,\nLunch moved to 1pm.\nSee you there.\nThanks,\nAl") == (
+        "Lunch moved to 1pm. See you there."
+    )
+    assert service.heuristic_summary("Thanks!") == "Thanks!"
+    assert service.heuristic_summary("") == "Empty email content."
+
+
+def test_templated_emails_need_no_llm_call(thresholds):
+    body = (
+        "View this email in your browser\n"
+        "Your order #4821 has shipped and will arrive on Thursday. Track it from your account page.\n"
+        "You are receiving this email because you shopped with us. Unsubscribe here."
+    )
+    before = _routes().get("template", 0)
+
+    route, _, summary = service._routed_summary(body)
+
+    assert service.is_templated(body)
+    assert route == "template"
+    assert summary == "Your order #4821 has shipped and will arrive on Thursday…"
+    assert _routes()["template"] == before + 1
+    assert service._summary_fingerprint(body) is None
+
+
+def test_personal_email_is_not_templated(thresholds, monkeypatch):
+    body = "Hi Ana,\nCould you review the contract before Friday? I left comments on section 4.\nBest,\nLee"
+    assert not service.is_templated(body)
+    assert service._routed_summary(body)[0] == "small"
+
+    monkeypatch.setattr(service, "SUMMARY_TEMPLATE_CHARS", 0)
+    assert not service.is_templated("Weekly digest with lots of news.\nUnsubscribe")
+
+
+def test_cache_hits_count_as_llm_free(thresholds, monkeypatch):
+    monkeypatch.setattr(service, "cache_get", lambda key: "Cached summary.")
+    before = service.summary_route_stats()
+
+    summary = asyncio.run(service.summarize_email_async("Please send the signed contract by Friday. " * 2, None))
+
+    after = service.summary_route_stats()
+    assert summary == "Cached summary."
+    assert after["cached"] == before["cached"] + 1
+    assert after["small"] == before["small"]
+    assert after["llm_free_rate"] >= before["llm_free_rate"]